@@ -1,17 +1,22 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import date
 from app.models.schemas import AnalysisRequest, AnalysisResult, DailyAnalysisRequest, DailyAnalysisResponse
-from app.services.analysis_service import AnalysisService
+from app.services.analysis_service import get_analysis_service, is_historical, utc_today
+from app.services.correlation_service import get_correlation_service
+from app.services.forecast_service import get_forecast_service
+from app.services.feature_store import SCORE_WEIGHTS, rerank
+from app.utils.responses import TrustedJSONResponse
+from app.utils.circuit_breaker import track_degradation
 
 router = APIRouter()
-analysis_service = AnalysisService()
+analysis_service = get_analysis_service()
 
 @router.post("/stocks", response_model=List[AnalysisResult])
 async def analyze_stocks(request: AnalysisRequest):
     """Analyze multiple stocks and return recommendations"""
     try:
-        results = await analysis_service.analyze_multiple_stocks(request.symbols)
+        results = await analysis_service.analyze_multiple_stocks(request.symbols, request.date)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -20,26 +25,59 @@ async def analyze_stocks(request: AnalysisRequest):
 async def daily_analysis(request: DailyAnalysisRequest, background_tasks: BackgroundTasks):
     """Perform daily analysis and generate recommendations"""
     try:
-        analysis_date = request.date or datetime.now().date()
+        analysis_date = request.date or utc_today()
         
-        # Get recommendations
-        recommendations = await analysis_service.get_daily_recommendations(analysis_date)
+        with track_degradation() as degraded:
+            # Get recommendations
+            recommendations = await analysis_service.get_daily_recommendations(analysis_date, request.diversify, request.full_refresh)
+            
+            if request.persist:
+                # Persist server-side and only hand back a compact summary
+                summary = await analysis_service.save_recommendations(
+                    recommendations, transactional=request.transactional
+                )
+                return DailyAnalysisResponse(
+                    success=summary.failed_count == 0,
+                    message=f"Daily analysis completed for {analysis_date}",
+                    analysis_count=len(recommendations),
+                    saved=summary,
+                    top_stock_ids=[rec.stock_id for rec in recommendations],
+                    degraded=sorted(degraded)
+                )
         
         return DailyAnalysisResponse(
             success=True,
             message=f"Daily analysis completed for {analysis_date}",
             recommendations=recommendations,
-            analysis_count=len(recommendations)
+            analysis_count=len(recommendations),
+            degraded=sorted(degraded)
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Daily analysis failed: {str(e)}")
 
 @router.get("/stock/{ticker}", response_model=AnalysisResult)
-async def analyze_single_stock(ticker: str):
+async def analyze_single_stock(
+    ticker: str,
+    date: Optional[date] = Query(None, description="Score using only data available on this date")
+):
     """Analyze a single stock"""
     try:
-        result = await analysis_service.calculate_final_score(ticker)
-        return result
+        if is_historical(date):
+            # Historical dates are served from the persisted snapshot cache
+            return await analysis_service.calculate_final_score(ticker, date)
+        
+        with track_degradation() as degraded:
+            try:
+                return await analysis_service.get_cached_analysis(
+                    'final', ticker, lambda: analysis_service.calculate_final_score(ticker)
+                )
+            except Exception as e:
+                # Serve the last snapshot rather than an error while a dependency is down
+                snapshot = analysis_service.snapshot_result(ticker, sorted(degraded))
+                if snapshot is None:
+                    raise
+                print(f"Serving last snapshot for {ticker}: {e}")
+                return snapshot
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed for {ticker}: {str(e)}")
 
@@ -47,12 +85,16 @@ async def analyze_single_stock(ticker: str):
 async def get_sentiment_analysis(ticker: str):
     """Get sentiment analysis for a stock"""
     try:
-        sentiment_score, confidence = await analysis_service.analyze_sentiment(ticker)
+        with track_degradation() as degraded:
+            sentiment_score, confidence = await analysis_service.get_cached_analysis(
+                'sentiment', ticker, lambda: analysis_service.analyze_sentiment(ticker)
+            )
         return {
             "ticker": ticker,
             "sentiment_score": sentiment_score,
             "confidence": confidence,
-            "sentiment_label": "긍정적" if sentiment_score > 0.1 else "부정적" if sentiment_score < -0.1 else "중립"
+            "sentiment_label": "긍정적" if sentiment_score > 0.1 else "부정적" if sentiment_score < -0.1 else "중립",
+            "degraded": sorted(degraded)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sentiment analysis failed for {ticker}: {str(e)}")
@@ -61,10 +103,115 @@ async def get_sentiment_analysis(ticker: str):
 async def get_technical_analysis(ticker: str):
     """Get technical analysis for a stock"""
     try:
-        technical_analysis = await analysis_service.analyze_technical(ticker)
+        with track_degradation() as degraded:
+            technical_analysis = await analysis_service.get_cached_analysis(
+                'technical', ticker, lambda: analysis_service.analyze_technical(ticker)
+            )
         return {
             "ticker": ticker,
-            **technical_analysis
+            **technical_analysis,
+            "degraded": sorted(degraded)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Technical analysis failed for {ticker}: {str(e)}")
+
+@router.get("/technical/{ticker}/intraday")
+async def get_intraday_technical_analysis(
+    ticker: str,
+    interval: str = Query("5m", description="Bar interval (1m, 5m, 15m, 1h)"),
+    days: int = Query(5, description="Number of days of 1-minute bars to resample")
+):
+    """Get technical analysis on intraday bars"""
+    try:
+        technical_analysis = await analysis_service.analyze_intraday(ticker, interval, days)
+        return {
+            "ticker": ticker,
+            "interval": interval,
+            **technical_analysis
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Intraday analysis failed for {ticker}: {str(e)}")
+
+@router.get("/correlation")
+async def get_correlation(
+    tickers: str = Query(..., description="Comma-separated tickers")
+):
+    """Get the rolling return correlation matrix for a set of stocks"""
+    try:
+        correlation_service = get_correlation_service()
+        correlation_service.refresh()
+        return correlation_service.pairwise([t.strip() for t in tickers.split(',') if t.strip()])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Correlation analysis failed: {str(e)}")
+
+@router.get("/correlation/sectors")
+async def get_sector_correlation():
+    """Get average return correlation within and between sectors"""
+    try:
+        correlation_service = get_correlation_service()
+        correlation_service.refresh()
+        return correlation_service.sector_correlation()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sector correlation analysis failed: {str(e)}")
+
+@router.post("/forecasts/refresh")
+async def refresh_forecasts(max_refits: Optional[int] = Query(None, ge=1, description="Cap on models refit in this run")):
+    """Refit return forecasts for stocks with new bars and report throughput"""
+    try:
+        return get_forecast_service().refresh(max_refits)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Forecast refresh failed: {str(e)}")
+
+@router.get("/rollups")
+async def get_score_rollups(
+    level: str = Query("sector", description="Grouping level: sector, industry or market"),
+    date: Optional[date] = Query(None, description="Analysis date (latest available when omitted)")
+):
+    """Average scores per sector, industry or market from the daily analysis"""
+    try:
+        return TrustedJSONResponse(analysis_service.rollup_service.load(level, date))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch score rollups: {str(e)}")
+
+@router.get("/rerank")
+async def rerank_features(
+    date: Optional[date] = Query(None, description="Feature table date (latest available when omitted)"),
+    momentum: Optional[float] = Query(None, ge=0, description="Momentum weight (the weight the file was scored with when omitted)"),
+    sentiment: Optional[float] = Query(None, ge=0, description="Sentiment weight (the weight the file was scored with when omitted)"),
+    volume: Optional[float] = Query(None, ge=0, description="Volume weight (the weight the file was scored with when omitted)"),
+    technical: Optional[float] = Query(None, ge=0, description="Technical weight (the weight the file was scored with when omitted)"),
+    forecast_weight: Optional[float] = Query(None, ge=0, le=1, description="Forecast blend weight (the file's setting when omitted)"),
+    market: Optional[str] = Query(None, description="Filter by market (US or KR)"),
+    limit: int = Query(20, ge=1, le=500, description="Number of ranked stocks to return")
+):
+    """Rescore a day's feature table with different weights, without rerunning any model"""
+    try:
+        frame = analysis_service.feature_store.load(date, date)
+        if frame.empty:
+            raise HTTPException(status_code=404, detail=f"No feature table for {date or 'any date'}")
+        if market:
+            frame = frame[frame['market'] == market]
+        
+        # Omitted weights default to the ones stored with the file, so a bare call reproduces its scores
+        settings = analysis_service.feature_store.settings(frame['analysis_date'].iloc[0]) if len(frame) else {}
+        stored = dict(settings.get('score_weights') or SCORE_WEIGHTS)
+        overrides = {"momentum_score": momentum, "sentiment_score": sentiment, "volume_score": volume, "technical_score": technical}
+        weights = [(column, stored.get(column, weight) if overrides[column] is None else overrides[column]) for column, weight in SCORE_WEIGHTS]
+        if forecast_weight is None:
+            forecast_weight = settings.get('forecast_weight', analysis_service.forecast_weight)
+        ranked = rerank(frame, weights, forecast_weight)
+        
+        columns = [
+            'analysis_date', 'stock_id', 'ticker', 'market', 'sector', 'industry', 'carried',
+            'momentum_score', 'sentiment_score', 'volume_score', 'technical_score', 'forecast_score',
+            'final_score', 'recommendation', 'reason'
+        ]
+        return TrustedJSONResponse(ranked[columns].head(limit).to_dict('records'))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Re-ranking failed: {str(e)}")
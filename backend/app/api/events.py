@@ -0,0 +1,45 @@
+import asyncio
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.services.event_hub import get_event_hub
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    types: Optional[str] = Query(None, description="Comma-separated event types (score, recommendation, news)")
+):
+    """Server-Sent Events stream of live score, recommendation and news updates"""
+    hub = get_event_hub()
+    event_types = {t.strip() for t in types.split(',') if t.strip()} if types else None
+    subscriber = hub.subscribe(event_types)
+    
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not subscriber.closed:
+                if await request.is_disconnected():
+                    break
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), timeout=HEARTBEAT_SECONDS)
+                    yield frame
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": heartbeat\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+async def get_event_stats():
+    """Get event hub subscriber and delivery counts"""
+    return get_event_hub().stats()
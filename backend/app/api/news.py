@@ -1,16 +1,24 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime, timedelta
-from app.models.schemas import News, NewsCreate
+from app.models.schemas import News, NewsCreate, ArticleCreate
 from app.utils.database import get_supabase
+from app.utils.responses import TrustedJSONResponse
+from app.utils.pagination import MAX_PAGE_SIZE, apply_keyset, decode_cursor, split_page, page_headers
+from app.services.article_store import ArticleStore
+from app.services.analysis_cache import get_analysis_cache
 
 router = APIRouter()
 
+NEWS_KEYS = [('published_at', True), ('id', True)]
+SEARCH_KEYS = [('rank', True), ('published_at', True), ('id', True)]
+
 @router.get("/", response_model=List[News])
 async def get_news(
     ticker: Optional[str] = Query(None, description="Filter by stock ticker"),
     days: int = Query(7, description="Number of days of news to return"),
-    limit: int = Query(50, description="Maximum number of news items to return")
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of news items to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header")
 ):
     """Get news articles"""
     try:
@@ -31,14 +39,55 @@ async def get_news(
             stock_id = stock_response.data[0]['id']
             query = query.eq('stock_id', stock_id)
         
-        response = query.gte('published_at', start_date.isoformat()).order('published_at', desc=True).limit(limit).execute()
+        # Keyset order matches idx_news_stock_id_published_at; id breaks ties
+        response = apply_keyset(query.gte('published_at', start_date.isoformat()), NEWS_KEYS, cursor, limit).execute()
+        page, next_cursor = split_page(NEWS_KEYS, response.data, limit)
         
-        return response.data
+        return TrustedJSONResponse(page, headers=page_headers(next_cursor))
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch news: {str(e)}")
 
+@router.get("/search")
+async def search_news(
+    q: Optional[str] = Query(None, description="Keywords (web-search syntax: quotes, OR, -exclude); typos match headlines by trigram"),
+    ticker: Optional[str] = Query(None, description="Filter by stock ticker"),
+    published_from: Optional[datetime] = Query(None, description="Earliest publish time (inclusive)"),
+    published_to: Optional[datetime] = Query(None, description="Latest publish time (exclusive)"),
+    min_sentiment: Optional[float] = Query(None, ge=-1, le=1, description="Lowest article sentiment score; unscored articles are excluded"),
+    max_sentiment: Optional[float] = Query(None, ge=-1, le=1, description="Highest article sentiment score; unscored articles are excluded"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of hits to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header")
+):
+    """Ranked search over the article store (every stored article, one hit each) backed by the full-text and trigram indexes"""
+    try:
+        after = decode_cursor(SEARCH_KEYS, cursor) if cursor else [None, None, None]
+        
+        supabase = get_supabase()
+        response = supabase.rpc('search_news', {
+            "search_query": q,
+            "search_ticker": ticker,
+            "published_from": published_from.isoformat() if published_from else None,
+            "published_to": published_to.isoformat() if published_to else None,
+            "min_sentiment": min_sentiment,
+            "max_sentiment": max_sentiment,
+            # One look-ahead row tells whether there is a next page (search_news allows MAX_PAGE_SIZE + 1)
+            "page_size": limit + 1,
+            "after_rank": after[0],
+            "after_published_at": after[1],
+            "after_id": after[2]
+        }).execute()
+        
+        page, next_cursor = split_page(SEARCH_KEYS, response.data or [], limit)
+        return TrustedJSONResponse(page, headers=page_headers(next_cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"News search failed: {str(e)}")
+
 @router.get("/{news_id}", response_model=News)
 async def get_news_item(news_id: int):
     """Get a specific news item"""
@@ -65,10 +114,36 @@ async def create_news(news: NewsCreate):
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to create news item")
         
+        get_analysis_cache().invalidate_watermarks()
+        
         return response.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create news item: {str(e)}")
 
+@router.post("/articles")
+async def create_article(article: ArticleCreate):
+    """Store an article once and link it to every ticker it mentions"""
+    try:
+        supabase = get_supabase()
+        
+        stock_response = supabase.table('stocks').select('id, ticker, name').in_('ticker', article.tickers).execute()
+        if not stock_response.data:
+            raise HTTPException(status_code=404, detail=f"None of the stocks {article.tickers} were found")
+        
+        saved = ArticleStore().save_article(article.dict(), stock_response.data)
+        
+        if not saved:
+            raise HTTPException(status_code=400, detail="Failed to create article")
+        
+        for stock in stock_response.data:
+            get_analysis_cache().bump(stock['ticker'])
+        
+        return saved
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create article: {str(e)}")
+
 @router.get("/sentiment/summary")
 async def get_sentiment_summary(
     ticker: Optional[str] = Query(None, description="Filter by stock ticker"),
@@ -1,16 +1,23 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
-from datetime import datetime, date
-from app.models.schemas import Recommendation, RecommendationCreate
+from datetime import datetime, date, timedelta
+from app.models.schemas import Recommendation, RecommendationCreate, RecommendationBatchRequest, RecommendationSaveSummary
+from app.services.analysis_service import get_analysis_service
 from app.utils.database import get_supabase
+from app.utils.responses import TrustedJSONResponse
+from app.utils.pagination import MAX_PAGE_SIZE, apply_keyset, split_page, page_headers
 
 router = APIRouter()
 
+SCORE_KEYS = [('score', True), ('id', True)]
+DATE_KEYS = [('recommended_date', True), ('id', True)]
+
 @router.get("/", response_model=List[Recommendation])
 async def get_recommendations(
     date: Optional[date] = Query(None, description="Filter by recommendation date"),
     market: Optional[str] = Query(None, description="Filter by market (US or KR)"),
-    limit: int = Query(20, description="Maximum number of recommendations to return")
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of recommendations to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header")
 ):
     """Get stock recommendations"""
     try:
@@ -28,9 +35,12 @@ async def get_recommendations(
         if market:
             query = query.eq('stocks.market', market)
         
-        response = query.order('score', desc=True).limit(limit).execute()
+        response = apply_keyset(query, SCORE_KEYS, cursor, limit).execute()
+        page, next_cursor = split_page(SCORE_KEYS, response.data, limit)
         
-        return response.data
+        return TrustedJSONResponse(page, headers=page_headers(next_cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch recommendations: {str(e)}")
 
@@ -52,7 +62,7 @@ async def get_todays_recommendations(
         
         response = query.order('score', desc=True).limit(limit).execute()
         
-        return response.data
+        return TrustedJSONResponse(response.data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch today's recommendations: {str(e)}")
 
@@ -86,10 +96,22 @@ async def create_recommendation(recommendation: RecommendationCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create recommendation: {str(e)}")
 
+@router.post("/batch", response_model=RecommendationSaveSummary)
+async def create_recommendations_batch(request: RecommendationBatchRequest):
+    """Upsert many recommendations in batched round trips"""
+    try:
+        return await get_analysis_service().save_recommendations(
+            request.recommendations, transactional=request.transactional
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save recommendations: {str(e)}")
+
 @router.get("/stock/{ticker}", response_model=List[Recommendation])
 async def get_stock_recommendations(
     ticker: str,
-    days: int = Query(30, description="Number of days of recommendations to return")
+    days: int = Query(30, description="Number of days of recommendations to return"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of recommendations to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header")
 ):
     """Get recommendations for a specific stock"""
     try:
@@ -106,11 +128,15 @@ async def get_stock_recommendations(
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days)
         
-        response = supabase.table('recommendations').select('*, stocks(*)').eq('stock_id', stock_id).gte('recommended_date', start_date.isoformat()).order('recommended_date', desc=True).execute()
+        query = supabase.table('recommendations').select('*, stocks(*)').eq('stock_id', stock_id).gte('recommended_date', start_date.isoformat())
+        response = apply_keyset(query, DATE_KEYS, cursor, limit).execute()
+        page, next_cursor = split_page(DATE_KEYS, response.data, limit)
         
-        return response.data
+        return TrustedJSONResponse(page, headers=page_headers(next_cursor))
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch recommendations for {ticker}: {str(e)}")
 
@@ -1,14 +1,28 @@
+import numpy as np
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from app.models.schemas import Stock, StockCreate, StockPrice, StockPriceCreate
+from typing import List, Optional, Union
+from app.models.schemas import Stock, StockCreate, StockPrice, StockPriceColumns, StockPriceCreate, TickBatch
 from app.utils.database import get_supabase
+from app.utils.responses import TrustedJSONResponse, to_columnar
+from app.utils.pagination import MAX_PAGE_SIZE, apply_keyset, split_page, page_headers
+from app.services.analysis_cache import get_analysis_cache
+from app.services.intraday import IntradayStore, TickBarBuilder
+from app.services.price_collector import PriceCollector
+from app.services.price_store import get_price_store
 
 router = APIRouter()
 
+# Open 1-minute bars per ticker, fed by the streaming tick endpoint. Per process: with several
+# uvicorn workers a ticker's ticks would be split across builders, so ticks need a single worker
+bar_builder = TickBarBuilder()
+
+STOCK_KEYS = [('id', False)]
+
 @router.get("/", response_model=List[Stock])
 async def get_stocks(
     market: Optional[str] = Query(None, description="Filter by market (US or KR)"),
-    limit: int = Query(100, description="Maximum number of stocks to return")
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of stocks to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header")
 ):
     """Get list of stocks"""
     try:
@@ -18,11 +32,27 @@ async def get_stocks(
         if market:
             query = query.eq('market', market)
         
-        response = query.limit(limit).execute()
-        return response.data
+        response = apply_keyset(query, STOCK_KEYS, cursor, limit).execute()
+        page, next_cursor = split_page(STOCK_KEYS, response.data, limit)
+        return TrustedJSONResponse(page, headers=page_headers(next_cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch stocks: {str(e)}")
 
+@router.post("/collect")
+async def collect_prices(
+    tickers: Optional[str] = Query(None, description="Comma-separated tickers (all stocks when omitted)"),
+    concurrency: int = Query(8, ge=1, le=64, description="Concurrent provider requests")
+):
+    """Backfill daily prices since each stock's latest stored bar"""
+    try:
+        collector = PriceCollector(concurrency=concurrency)
+        ticker_list = [t.strip() for t in tickers.split(',') if t.strip()] if tickers else None
+        return await collector.collect(ticker_list)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Price collection failed: {str(e)}")
+
 @router.get("/{ticker}", response_model=Stock)
 async def get_stock(ticker: str):
     """Get stock by ticker"""
@@ -53,10 +83,11 @@ async def create_stock(stock: StockCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create stock: {str(e)}")
 
-@router.get("/{ticker}/prices", response_model=List[StockPrice])
+@router.get("/{ticker}/prices", response_model=Union[List[StockPrice], StockPriceColumns])
 async def get_stock_prices(
     ticker: str,
-    days: int = Query(30, description="Number of days of price data to return")
+    days: int = Query(30, description="Number of days of price data to return"),
+    shape: str = Query("rows", alias="format", description="Response shape: rows (list of objects) or columnar (one array per field)")
 ):
     """Get stock price history"""
     try:
@@ -72,7 +103,11 @@ async def get_stock_prices(
         # Get price data
         response = supabase.table('stock_prices').select('*').eq('stock_id', stock_id).order('date', desc=True).limit(days).execute()
         
-        return response.data
+        # Rows come straight from the database, so skip per-row model validation
+        if shape == "columnar":
+            return TrustedJSONResponse(to_columnar(response.data, list(StockPriceColumns.model_fields)))
+        
+        return TrustedJSONResponse(response.data)
     except HTTPException:
         raise
     except Exception as e:
@@ -100,15 +135,19 @@ async def create_stock_price(ticker: str, price: StockPriceCreate):
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to create stock price")
         
+        # A new bar moves the ticker's watermark and lands in the resident price ring
+        get_analysis_cache().bump(ticker)
+        get_price_store().append_bars(ticker, [response.data[0]])
+        
         return response.data[0]
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create stock price: {str(e)}")
 
-@router.get("/{ticker}/performance")
-async def get_stock_performance(ticker: str, days: int = Query(30)):
-    """Get stock performance metrics"""
+@router.post("/{ticker}/ticks")
+async def ingest_ticks(ticker: str, batch: TickBatch):
+    """Stream ticks into 1-minute bars; completed bars are written to the intraday store"""
     try:
         supabase = get_supabase()
         
@@ -119,30 +158,67 @@ async def get_stock_performance(ticker: str, days: int = Query(30)):
         
         stock_id = stock_response.data[0]['id']
         
-        # Get recent price data
-        price_response = supabase.table('stock_prices').select('*').eq('stock_id', stock_id).order('date', desc=True).limit(days).execute()
+        completed = []
+        for tick in sorted(batch.ticks, key=lambda t: t.ts):
+            bar = bar_builder.add_tick(ticker, tick.ts.timestamp(), tick.price, tick.size)
+            if bar:
+                completed.append(bar)
+        
+        if batch.flush:
+            completed.extend(bar_builder.flush(ticker=ticker))
+        
+        result = IntradayStore().save_bars(stock_id, completed) if completed else {"saved": 0, "failed": 0, "chunks": 0}
         
-        if not price_response.data:
+        return {
+            "ticker": ticker,
+            "ticks": len(batch.ticks),
+            "bars_written": result['saved'],
+            "bars_failed": result['failed']
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to ingest ticks for {ticker}: {str(e)}")
+
+@router.get("/{ticker}/performance")
+async def get_stock_performance(ticker: str, days: int = Query(30)):
+    """Get stock performance metrics"""
+    try:
+        # Last `days` bars straight from the resident price ring
+        window = get_price_store().get_window(ticker, bars=days)
+        
+        if window is None:
+            supabase = get_supabase()
+            
+            # Get stock ID
+            stock_response = supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+            if not stock_response.data:
+                raise HTTPException(status_code=404, detail=f"Stock {ticker} not found")
+            
+            stock_id = stock_response.data[0]['id']
+            
+            # Ring cannot cover the request; read the closes from the database
+            price_response = supabase.table('stock_prices').select('close').eq('stock_id', stock_id).order('date', desc=True).limit(days).execute()
+            closes = np.array([row['close'] for row in reversed(price_response.data or [])], dtype=np.float64)
+        else:
+            closes = window['close'].astype(np.float64)
+        
+        if len(closes) == 0:
             return {
                 "ticker": ticker,
                 "performance": "No data available",
                 "metrics": {}
             }
         
-        prices = price_response.data
-        current_price = prices[0]['close']
-        previous_price = prices[-1]['close'] if len(prices) > 1 else current_price
+        current_price = float(closes[-1])
+        previous_price = float(closes[0])
         
         # Calculate performance metrics
         total_return = (current_price - previous_price) / previous_price if previous_price > 0 else 0
         
         # Calculate volatility (standard deviation of daily returns)
-        daily_returns = []
-        for i in range(1, len(prices)):
-            daily_return = (prices[i-1]['close'] - prices[i]['close']) / prices[i]['close']
-            daily_returns.append(daily_return)
-        
-        volatility = np.std(daily_returns) if daily_returns else 0
+        daily_returns = np.diff(closes) / closes[:-1]
+        volatility = float(np.std(daily_returns)) if len(daily_returns) else 0
         
         return {
             "ticker": ticker,
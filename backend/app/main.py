@@ -4,12 +4,13 @@ from fastapi.responses import JSONResponse
 import os
 from dotenv import load_dotenv
 
-from app.api import analysis, stocks, news, recommendations
-from app.utils.database import init_db
-
-# Load environment variables
+# Load environment variables (before routers, which read settings at import time)
 load_dotenv()
 
+from app.api import analysis, stocks, news, recommendations, events
+from app.utils.database import init_db
+from app.utils.circuit_breaker import breaker_stats
+
 app = FastAPI(
     title="StockPulse AI Server",
     description="AI-powered stock analysis and recommendation service",
@@ -25,6 +26,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -32,6 +34,7 @@ app.include_router(analysis.router, prefix="/api/analyze", tags=["analysis"])
 app.include_router(stocks.router, prefix="/api/stocks", tags=["stocks"])
 app.include_router(news.router, prefix="/api/news", tags=["news"])
 app.include_router(recommendations.router, prefix="/api/recommendations", tags=["recommendations"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
 
 @app.on_event("startup")
 async def startup_event():
@@ -44,7 +47,10 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "StockPulse AI Server"}
+    # Still serving (on fallbacks) while a breaker is open, so report degraded rather than failing
+    dependencies = breaker_stats()
+    status = "degraded" if any(breaker['state'] != "closed" for breaker in dependencies) else "healthy"
+    return {"status": status, "service": "StockPulse AI Server", "dependencies": dependencies}
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -2,6 +2,9 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime, date
 
+# Alias for fields named `date`, which would otherwise shadow the type in the class body
+DateType = date
+
 class StockBase(BaseModel):
     ticker: str = Field(..., description="Stock ticker symbol")
     name: str = Field(..., description="Company name")
@@ -41,6 +44,25 @@ class StockPrice(StockPriceBase):
     class Config:
         from_attributes = True
 
+class StockPriceColumns(BaseModel):
+    """Price history as one array per field (GET /stocks/{ticker}/prices?format=columnar)"""
+    date: List[DateType]
+    open: List[Optional[float]]
+    high: List[Optional[float]]
+    low: List[Optional[float]]
+    close: List[Optional[float]]
+    volume: List[Optional[int]]
+    adjusted_close: List[Optional[float]]
+
+class Tick(BaseModel):
+    ts: datetime
+    price: float
+    size: int = 0
+
+class TickBatch(BaseModel):
+    ticks: List[Tick]
+    flush: bool = Field(False, description="Also close and store the currently open bar")
+
 class NewsBase(BaseModel):
     stock_id: int
     headline: str
@@ -61,6 +83,14 @@ class News(NewsBase):
     class Config:
         from_attributes = True
 
+class ArticleCreate(BaseModel):
+    headline: str
+    url: str
+    content: Optional[str] = None
+    source: Optional[str] = None
+    published_at: datetime
+    tickers: List[str] = Field(..., description="Tickers mentioned in the article")
+
 class RecommendationBase(BaseModel):
     stock_id: int
     score: float = Field(..., ge=0, le=1)
@@ -83,7 +113,7 @@ class Recommendation(RecommendationBase):
 
 class AnalysisRequest(BaseModel):
     symbols: List[str] = Field(..., description="List of stock symbols to analyze")
-    date: Optional[date] = Field(None, description="Analysis date (defaults to today)")
+    date: Optional[DateType] = Field(None, description="Analysis date (defaults to today)")
 
 class AnalysisResult(BaseModel):
     symbol: str
@@ -91,15 +121,33 @@ class AnalysisResult(BaseModel):
     sentiment_score: float
     volume_score: float
     technical_score: float
+    forecast_score: Optional[float] = None
     final_score: float
     recommendation: str
     reason: str
+    degraded: List[str] = Field([], description="Dependencies that fell back while scoring (e.g. database, sentiment, finbert)")
 
 class DailyAnalysisRequest(BaseModel):
-    date: Optional[date] = Field(None, description="Analysis date (defaults to today)")
+    date: Optional[DateType] = Field(None, description="Analysis date (defaults to today)")
+    persist: bool = Field(False, description="Upsert recommendations from the server and return a summary only")
+    transactional: bool = Field(False, description="Save all recommendations in one transaction (all-or-nothing)")
+    diversify: bool = Field(False, description="Re-rank the top picks to penalize highly correlated names")
+    full_refresh: bool = Field(False, description="Re-analyze every stock instead of only those with new data")
+
+class RecommendationSaveSummary(BaseModel):
+    saved_count: int
+    failed_count: int
+    chunk_count: int
 
 class DailyAnalysisResponse(BaseModel):
     success: bool
     message: str
-    recommendations: List[RecommendationCreate]
+    recommendations: List[RecommendationCreate] = []
     analysis_count: int
+    saved: Optional[RecommendationSaveSummary] = None
+    top_stock_ids: List[int] = []
+    degraded: List[str] = []
+
+class RecommendationBatchRequest(BaseModel):
+    recommendations: List[RecommendationCreate]
+    transactional: bool = Field(False, description="Save all recommendations in one transaction (all-or-nothing)")
@@ -0,0 +1,104 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from app.utils.database import get_supabase
+
+class LRUDict(OrderedDict):
+    """Dict that keeps at most max_entries items, evicting the least recently used"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        super().__init__()
+    
+    def __getitem__(self, key: Hashable) -> Any:
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+    
+    def __setitem__(self, key: Hashable, value: Any):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+class AnalysisCache:
+    """LRU cache of per-ticker analysis results keyed by the ticker's data watermark"""
+    
+    def __init__(self, max_entries: int = 4096, watermark_ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.watermark_ttl = watermark_ttl
+        self._results: "OrderedDict[Hashable, Any]" = OrderedDict()
+        # ticker -> (watermark, fetched_at)
+        self._watermarks: Dict[str, Tuple[Tuple, float]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def _fetch_watermark(self, ticker: str) -> Tuple:
+        """Latest price date, latest legacy news item and latest linked article for a ticker"""
+        supabase = get_supabase()
+        
+        stock_response = supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+        if not stock_response.data:
+            return (None, None, None, None)
+        
+        stock_id = stock_response.data[0]['id']
+        
+        price_response = supabase.table('stock_prices').select('date').eq('stock_id', stock_id).order('date', desc=True).limit(1).execute()
+        news_response = supabase.table('news').select('id, published_at').eq('stock_id', stock_id).order('id', desc=True).limit(1).execute()
+        # Sentiment reads articles through article_tickers; POST /news/articles never touches news
+        article_response = supabase.table('article_tickers').select('article_id').eq('stock_id', stock_id).order('article_id', desc=True).limit(1).execute()
+        
+        price_date = price_response.data[0]['date'] if price_response.data else None
+        news = news_response.data[0] if news_response.data else {}
+        article_id = article_response.data[0]['article_id'] if article_response.data else None
+        return (price_date, news.get('id'), news.get('published_at'), article_id)
+    
+    def get_watermark(self, ticker: str) -> Tuple:
+        """Watermark for a ticker, refreshed from the database at most once per TTL"""
+        entry = self._watermarks.get(ticker)
+        if entry and time.monotonic() - entry[1] < self.watermark_ttl:
+            return entry[0]
+        
+        watermark = self._fetch_watermark(ticker)
+        self._watermarks[ticker] = (watermark, time.monotonic())
+        return watermark
+    
+    def bump(self, ticker: str):
+        """Force the next lookup to re-read the watermark (call when new bars or news land)"""
+        self._watermarks.pop(ticker, None)
+    
+    def invalidate_watermarks(self):
+        """Re-read every watermark on next use, e.g. when the affected ticker is not known"""
+        self._watermarks.clear()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return self._results[key]
+        self.misses += 1
+        return None
+    
+    def put(self, key: Hashable, value: Any):
+        self._results[key] = value
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._results),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+analysis_cache = AnalysisCache(
+    max_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", "4096")),
+    watermark_ttl=float(os.getenv("ANALYSIS_CACHE_WATERMARK_TTL", "60"))
+)
+
+def get_analysis_cache() -> AnalysisCache:
+    """Get the process-wide analysis result cache"""
+    return analysis_cache
@@ -1,20 +1,110 @@
+import asyncio
+import os
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from app.utils.database import get_supabase
-from app.services.sentiment_analyzer import SentimentAnalyzer
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.utils.database import get_supabase, upsert_in_chunks
+from app.services.sentiment_server import create_sentiment_analyzer, VaderSentimentAnalyzer
+from app.services.inference_scheduler import BatchScheduler
 from app.services.technical_analyzer import TechnicalAnalyzer
-from app.models.schemas import RecommendationCreate, AnalysisResult
+from app.services.news_preprocessor import NewsPreprocessor
+from app.services.article_store import ArticleStore
+from app.services.sentiment_aggregator import SentimentAggregator, parse_timestamp
+from app.services.analysis_cache import get_analysis_cache, LRUDict
+from app.services.event_hub import get_event_hub
+from app.services.correlation_service import get_correlation_service
+from app.services.forecast_service import get_forecast_service
+from app.services.price_store import get_price_store
+from app.services.rollup_service import RollupService
+from app.services.run_planner import RunPlanner, load_run_budget
+from app.services.feature_store import get_feature_store, technical_features, SCORE_WEIGHTS, REASON_RULES, NEUTRAL_REASON
+from app.services.intraday import IntradayStore, INTERVALS, resample_bars, bars_to_frame
+from app.models.schemas import RecommendationCreate, AnalysisResult, RecommendationSaveSummary
+from app.utils.circuit_breaker import get_breaker, track_degradation, mark_degraded, text_budget_scale
+
+# Bump whenever scoring logic changes so cached scores are not reused across versions
+MODEL_VERSION = "2024.1"
+
+# Feature table columns that make up a ticker's last snapshot
+SNAPSHOT_COLUMNS = (
+    'momentum_score', 'sentiment_score', 'sentiment_confidence', 'volume_score',
+    'technical_score', 'forecast_score', 'final_score', 'recommendation'
+)
+
+def as_of_cutoff(as_of: date) -> datetime:
+    """Exclusive UTC cutoff for data available on an as-of date (end of that day)"""
+    return datetime.combine(as_of + timedelta(days=1), time.min, tzinfo=timezone.utc)
+
+def utc_today() -> date:
+    """Current date in UTC, the same calendar as_of_cutoff uses"""
+    return datetime.now(timezone.utc).date()
+
+def is_historical(as_of: Optional[date]) -> bool:
+    return as_of is not None and as_of < utc_today()
 
 class AnalysisService:
     def __init__(self):
-        self.sentiment_analyzer = SentimentAnalyzer()
+        self.sentiment_analyzer = create_sentiment_analyzer()
+        self.sentiment_scheduler = BatchScheduler(
+            self.sentiment_analyzer.score_batch,
+            max_batch=int(os.getenv("SENTIMENT_MAX_BATCH", "32")),
+            max_wait_ms=float(os.getenv("SENTIMENT_BATCH_WAIT_MS", "10"))
+        )
+        # Scoring (queueing included) is bounded by the sentiment breaker; VADER alone stands in when it trips
+        self.sentiment_breaker = get_breaker("sentiment")
+        self.fallback_sentiment = VaderSentimentAnalyzer()
         self.technical_analyzer = TechnicalAnalyzer()
+        # Long-document sentiment scores whole articles in windows, so keep more than one window of text
+        long_documents = os.getenv("SENTIMENT_LONG_DOCUMENTS", "true").lower() in ("1", "true", "yes")
+        self.news_preprocessor = NewsPreprocessor(
+            max_tokens=int(os.getenv("SENTIMENT_MAX_DOCUMENT_TOKENS", "4096")) if long_documents else 512
+        )
         self.supabase = get_supabase()
+        self.article_store = ArticleStore()
+        self.sentiment_aggregator = SentimentAggregator()
+        self.sentiment_refresh_seconds = 300
+        self.result_cache = get_analysis_cache()
+        self.intraday_store = IntradayStore()
+        self.price_store = get_price_store()
+        self.rollup_service = RollupService(MODEL_VERSION)
+        self.run_planner = RunPlanner(MODEL_VERSION, budget=load_run_budget())
+        self.event_hub = get_event_hub()
+        self.forecast_service = get_forecast_service()
+        self.forecast_weight = float(os.getenv("FORECAST_WEIGHT", "0.1"))
+        # Article sentiment keyed by URL hash, shared across every ticker in a run
+        # (bounded: a long-running server would otherwise keep every article it ever scored)
+        self.article_cache_size = int(os.getenv("ARTICLE_SCORE_CACHE_SIZE", "50000"))
+        self._article_scores: Dict[str, Tuple[float, float]] = LRUDict(self.article_cache_size)
+        # Per-model (FinBERT, TextBlob, VADER) scores of articles scored in this process
+        self._article_model_scores: Dict[str, Tuple[float, float, float]] = LRUDict(self.article_cache_size)
+        # Daily feature table of each run's scoring intermediates
+        self.feature_store = get_feature_store(MODEL_VERSION)
+        # Latest live scores computed with every dependency healthy, served when one fails
+        self._last_scores: Dict[str, Dict] = {}
     
-    async def get_stock_data(self, ticker: str, days: int = 30) -> Optional[pd.DataFrame]:
-        """Get stock price data from database"""
+    async def get_cached_analysis(self, kind: str, ticker: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Serve a live analysis result from the watermark-keyed cache, computing it on a miss"""
+        try:
+            watermark = self.result_cache.get_watermark(ticker)
+        except Exception as e:
+            print(f"Error reading data watermark for {ticker}: {e}")
+            return await compute()
+        
+        key = (kind, ticker, watermark, MODEL_VERSION)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        with track_degradation() as degraded:
+            result = await compute()
+        # A fallback result is only good until the dependency recovers
+        if not degraded:
+            self.result_cache.put(key, result)
+        return result
+    
+    async def get_stock_data(self, ticker: str, days: int = 30, as_of: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """Get stock price data from database, up to and including the as-of date"""
         try:
             # Get stock info
             stock_response = self.supabase.table('stocks').select('id').eq('ticker', ticker).execute()
@@ -24,7 +114,7 @@ class AnalysisService:
             stock_id = stock_response.data[0]['id']
             
             # Get price data
-            end_date = datetime.now().date()
+            end_date = as_of or utc_today()
             start_date = end_date - timedelta(days=days)
             
             price_response = self.supabase.table('stock_prices').select('*').eq('stock_id', stock_id).gte('date', start_date.isoformat()).lte('date', end_date.isoformat()).order('date').execute()
@@ -62,39 +152,231 @@ class AnalysisService:
             print(f"Error getting news data for {ticker}: {e}")
             return []
     
-    async def analyze_sentiment(self, ticker: str) -> Tuple[float, float]:
-        """Analyze sentiment for a stock based on recent news"""
-        news_data = await self.get_news_data(ticker)
+    async def _score_clusters(self, clusters: List[Dict]) -> List[Tuple[float, float]]:
+        """Score each cluster once, reusing sentiment already computed for any of its articles"""
+        scores: List[Optional[Tuple[float, float]]] = []
+        pending = []
+        
+        for cluster in clusters:
+            known = None
+            for article in cluster['articles']:
+                url_hash = article.get('url_hash')
+                if url_hash in self._article_scores:
+                    known = self._article_scores[url_hash]
+                    break
+                if article.get('scored_at') and article.get('sentiment') is not None:
+                    known = (float(article['sentiment']), float(article.get('confidence') or 0.0))
+                    break
+            scores.append(known)
+            if known is None:
+                pending.append(len(scores) - 1)
         
-        if not news_data:
-            return 0.0, 0.0
+        # Scores from a partial ensemble are used for this request but neither cached nor persisted
+        provisional = set()
+        if pending:
+            texts = [clusters[i]['text'] for i in pending]
+            headlines = [clusters[i].get('headline') for i in pending]
+            try:
+                # Batched with concurrent requests by the scheduler rather than scored on its own
+                results = await self.sentiment_breaker.call(
+                    lambda: self.sentiment_scheduler.submit(texts, headlines), text_budget_scale(texts)
+                )
+            except Exception as e:
+                print(f"Sentiment models unavailable, scoring {len(texts)} texts with VADER only: {e!r}")
+                mark_degraded("sentiment")
+                results = self.fallback_sentiment.score_batch(texts)
+                provisional.update(pending)
+            else:
+                for name in ('finbert', 'textblob'):
+                    skipped = np.isnan(results[f'{name}_score'])
+                    if skipped.any():
+                        mark_degraded(name)
+                        provisional.update(i for i, flag in zip(pending, skipped.tolist()) if flag)
+            
+            for i, sentiment, confidence in zip(pending, results['sentiment'].tolist(), results['confidence'].tolist()):
+                scores[i] = (sentiment, confidence)
+            
+            model_scores = np.column_stack([results[f'{name}_score'] for name in ('finbert', 'textblob', 'vader')]).tolist()
+            for i, row in zip(pending, model_scores):
+                if i in provisional:
+                    continue
+                for article in clusters[i]['articles']:
+                    if article.get('url_hash'):
+                        self._article_model_scores[article['url_hash']] = tuple(row)
+        
+        # Fan the score out to every article in the cluster and persist the new ones
+        newly_scored = []
+        for i, (cluster, score) in enumerate(zip(clusters, scores)):
+            if i in provisional:
+                continue
+            for article in cluster['articles']:
+                url_hash = article.get('url_hash')
+                if url_hash and url_hash not in self._article_scores:
+                    self._article_scores[url_hash] = score
+                    if not article.get('scored_at'):
+                        newly_scored.append({**article, "sentiment": score[0], "confidence": score[1]})
         
-        # Combine headlines and content for analysis
-        texts = []
-        for news in news_data:
-            text = news.get('headline', '')
-            if news.get('content'):
-                text += ' ' + news['content']
-            texts.append(text)
+        if newly_scored:
+            try:
+                self.article_store.save_scores(newly_scored)
+            except Exception as e:
+                print(f"Error saving article scores: {e}")
+            
+            self.event_hub.publish('news', [
+                {
+                    "url": article['url'],
+                    "headline": article['headline'],
+                    "published_at": article['published_at'],
+                    "sentiment": article['sentiment'],
+                    "confidence": article['confidence']
+                }
+                for article in newly_scored
+            ])
         
-        # Analyze sentiment
-        sentiment_results = self.sentiment_analyzer.analyze_batch(texts)
+        return scores
+    
+    async def _weigh_new_articles(self, articles: List[Dict]) -> None:
+        """Score new articles and assign the base weight each contributes to the aggregate"""
+        # Normalize, truncate and collapse syndicated duplicates so each story is scored once
+        clusters = self.news_preprocessor.preprocess(articles)
+        for cluster in clusters:
+            cluster['articles'] = [articles[i] for i in cluster['members']]
         
-        # Calculate weighted average (recent news has higher weight)
-        weights = np.exp(np.linspace(-1, 0, len(sentiment_results)))
-        weights = weights / weights.sum()
+        # Sentiment is computed once per article and shared by every ticker it mentions
+        scores = await self._score_clusters(clusters)
         
-        sentiment_scores = [result['sentiment'] for result in sentiment_results]
-        confidence_scores = [result['confidence'] for result in sentiment_results]
+        for cluster, (sentiment, confidence) in zip(clusters, scores):
+            # Duplicates add weight sub-linearly so wire stories cannot dominate the average
+            count = cluster['duplicate_count']
+            share = (1 + np.log(count)) / count
+            for article in cluster['articles']:
+                article['sentiment'] = sentiment
+                article['confidence'] = confidence
+                article['aggregate_weight'] = float(article.get('relevance', 1.0) * share)
+    
+    async def _analyze_sentiment_as_of(self, ticker: str, as_of: date) -> Tuple[float, float, Dict]:
+        """Time-decayed sentiment (plus feature details) using only articles published by the end of the as-of date"""
+        try:
+            # Get stock info
+            stock_response = self.supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+            if not stock_response.data:
+                return 0.0, 0.0, {}
+            
+            stock_id = stock_response.data[0]['id']
+            aggregator = self.sentiment_aggregator
+            cutoff = as_of_cutoff(as_of)
+            
+            articles = self.article_store.get_articles_for_stock(stock_id, cutoff - aggregator.window, until=cutoff)
+        except Exception as e:
+            print(f"Error getting articles for {ticker} as of {as_of}: {e}")
+            return 0.0, 0.0, {}
         
-        avg_sentiment = np.average(sentiment_scores, weights=weights)
-        avg_confidence = np.average(confidence_scores, weights=weights)
+        if not articles:
+            return 0.0, 0.0, {}
         
-        return float(avg_sentiment), float(avg_confidence)
+        # Built from scratch and not persisted; the live aggregate tracks the present only
+        await self._weigh_new_articles(articles)
+        state = aggregator.advance(aggregator.empty_state(stock_id, cutoff), cutoff, articles, [])
+        return (*aggregator.value(state), self._sentiment_details(articles, state))
+    
+    def _sentiment_details(self, articles: List[Dict], state: Dict) -> Dict:
+        """Per-model means over the ticker's articles scored in this process, and its window article count"""
+        model_scores = np.array(
+            [self._article_model_scores[a['url_hash']] for a in articles if a.get('url_hash') in self._article_model_scores],
+            dtype=float
+        ).reshape(-1, 3)
+        means = model_scores.mean(axis=0) if len(model_scores) else np.full(3, np.nan)
+        return {
+            "finbert_score": float(means[0]),
+            "textblob_score": float(means[1]),
+            "vader_score": float(means[2]),
+            "scored_article_count": len(model_scores),
+            "news_count": int(state['article_count'])
+        }
+    
+    async def analyze_sentiment(self, ticker: str, as_of: Optional[date] = None) -> Tuple[float, float]:
+        """Analyze sentiment for a stock from its time-decayed news aggregate"""
+        sentiment, confidence, _ = await self._analyze_sentiment(ticker, as_of)
+        return sentiment, confidence
     
-    async def analyze_technical(self, ticker: str) -> Dict[str, float]:
+    async def _analyze_sentiment(self, ticker: str, as_of: Optional[date] = None) -> Tuple[float, float, Dict]:
+        """analyze_sentiment plus the feature-table details of the articles it folded in"""
+        if is_historical(as_of):
+            return await self._analyze_sentiment_as_of(ticker, as_of)
+        
+        try:
+            # Get stock info
+            stock_response = self.supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+            if not stock_response.data:
+                return 0.0, 0.0, {}
+            
+            stock_id = stock_response.data[0]['id']
+            aggregator = self.sentiment_aggregator
+            now = datetime.now(timezone.utc)
+            
+            state = aggregator.load(stock_id)
+            if state and (now - parse_timestamp(state['as_of'])).total_seconds() < self.sentiment_refresh_seconds:
+                return (*aggregator.value(state), {})
+            
+            if state is None:
+                # First build (or decay settings changed): fold in the whole window
+                state = aggregator.empty_state(stock_id, now)
+                added = self.article_store.get_articles_for_stock(stock_id, now - aggregator.window)
+                expired = []
+            else:
+                # Only articles not yet aggregated, and those that slid out of the window since as_of
+                added = self.article_store.get_articles_for_stock(
+                    stock_id, now - aggregator.window, aggregated=False
+                )
+                expired = self.article_store.get_articles_for_stock(
+                    stock_id,
+                    parse_timestamp(state['as_of']) - aggregator.window,
+                    until=now - aggregator.window,
+                    aggregated=True
+                )
+        except Exception as e:
+            print(f"Error loading sentiment aggregate for {ticker}: {e}")
+            snapshot = self.last_snapshot(ticker)
+            if snapshot is None:
+                return 0.0, 0.0, {}
+            return float(snapshot['sentiment_score']), float(snapshot.get('sentiment_confidence') or 0.0), {}
+        
+        with track_degradation() as degraded:
+            if added:
+                await self._weigh_new_articles(added)
+        
+        expired = [article for article in expired if article.get('sentiment') is not None]
+        state = aggregator.advance(state, now, added, expired)
+        
+        # Fallback scores are not folded into the stored aggregate, so those articles are rescored later
+        if not degraded:
+            try:
+                aggregator.save(state, added)
+            except Exception as e:
+                print(f"Error saving sentiment aggregate for {ticker}: {e}")
+        
+        return (*aggregator.value(state), self._sentiment_details(added, state))
+    
+    async def analyze_technical(self, ticker: str, as_of: Optional[date] = None) -> Dict[str, float]:
         """Perform technical analysis on a stock"""
-        df = await self.get_stock_data(ticker)
+        # One window sized to the longest horizon covers every horizon; served from the resident
+        # price rings when they reach back far enough, otherwise from the database
+        days = self.technical_analyzer.lookback_days()
+        end_date = as_of or utc_today()
+        try:
+            df = self.price_store.get_frame(ticker, start=end_date - timedelta(days=days), end=end_date)
+        except Exception as e:
+            print(f"Error reading price store for {ticker}: {e}")
+            df = None
+        if df is None:
+            with track_degradation() as degraded:
+                df = await self.get_stock_data(ticker, days=days, as_of=as_of)
+            
+            # Database unavailable: the last cached technical scores beat neutral ones for a live request
+            if df is None and degraded and not is_historical(as_of):
+                snapshot = self.last_snapshot(ticker)
+                if snapshot is not None:
+                    return {name: float(snapshot[name]) for name in ('momentum_score', 'volume_score', 'technical_score')}
         
         if df is None or len(df) < 20:
             return {
@@ -105,90 +387,248 @@ class AnalysisService:
         
         return self.technical_analyzer.analyze_stock(df)
     
-    async def calculate_final_score(self, ticker: str) -> AnalysisResult:
-        """Calculate final recommendation score for a stock"""
-        # Get sentiment analysis
-        sentiment_score, sentiment_confidence = await self.analyze_sentiment(ticker)
-        
-        # Get technical analysis
-        technical_analysis = await self.analyze_technical(ticker)
-        
-        # Calculate final score with weights
-        momentum_score = technical_analysis['momentum_score']
-        volume_score = technical_analysis['volume_score']
-        technical_score = technical_analysis['technical_score']
-        
-        # Weighted final score
-        final_score = (
-            momentum_score * 0.3 +
-            sentiment_score * 0.4 +
-            volume_score * 0.2 +
-            technical_score * 0.1
-        )
+    async def analyze_intraday(self, ticker: str, interval: str = "5m", days: int = 5) -> Dict[str, float]:
+        """Technical analysis on intraday bars resampled from the stored 1-minute series"""
+        if interval not in INTERVALS:
+            raise ValueError(f"Unsupported interval {interval}; expected one of {list(INTERVALS)}")
         
-        # Normalize to [0, 1] range
-        final_score = max(0, min(1, (final_score + 1) / 2))
+        neutral = {
+            "momentum_score": 0.5,
+            "volume_score": 0.5,
+            "technical_score": 0.5,
+            "bar_count": 0
+        }
         
-        # Determine recommendation
-        if final_score >= 0.7:
-            recommendation = "BUY"
-        elif final_score >= 0.4:
-            recommendation = "HOLD"
-        else:
-            recommendation = "SELL"
+        stock_response = self.supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+        if not stock_response.data:
+            return neutral
         
-        # Generate reason
-        reason = self._generate_reason(
-            momentum_score, sentiment_score, volume_score, technical_score, final_score
-        )
+        stock_id = stock_response.data[0]['id']
+        since = datetime.now(timezone.utc) - timedelta(days=days)
         
-        return AnalysisResult(
-            symbol=ticker,
-            momentum_score=momentum_score,
-            sentiment_score=sentiment_score,
-            volume_score=volume_score,
-            technical_score=technical_score,
-            final_score=final_score,
-            recommendation=recommendation,
-            reason=reason
-        )
+        bars = resample_bars(self.intraday_store.load_bars(stock_id, since), interval)
+        if len(bars['ts']) < 20:
+            return {**neutral, "bar_count": int(len(bars['ts']))}
+        
+        result = self.technical_analyzer.analyze_stock(bars_to_frame(bars))
+        result['bar_count'] = int(len(bars['ts']))
+        return result
+    
+    def get_cached_scores(self, ticker: str, as_of: date) -> Optional[Dict]:
+        """Look up persisted component scores for a (ticker, date) at the current model version"""
+        try:
+            response = self.supabase.table('analysis_snapshots').select(
+                '*, stocks!inner(ticker)'
+            ).eq('stocks.ticker', ticker).eq('analysis_date', as_of.isoformat()).eq('model_version', MODEL_VERSION).execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"Error reading cached scores for {ticker} on {as_of}: {e}")
+            return None
+    
+    def save_scores(self, ticker: str, as_of: date, components: Dict[str, float]):
+        """Persist component scores for a (ticker, date) so repeat historical queries hit the cache"""
+        try:
+            stock_response = self.supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+            if not stock_response.data:
+                return
+            
+            row = {
+                "stock_id": stock_response.data[0]['id'],
+                "analysis_date": as_of.isoformat(),
+                "model_version": MODEL_VERSION,
+                **components
+            }
+            self.supabase.table('analysis_snapshots').upsert(
+                row, on_conflict='stock_id,analysis_date,model_version'
+            ).execute()
+        except Exception as e:
+            print(f"Error caching scores for {ticker} on {as_of}: {e}")
+    
+    async def calculate_final_score(self, ticker: str, as_of: Optional[date] = None) -> AnalysisResult:
+        """Calculate final recommendation score for a stock, optionally as of a past date"""
+        result, _ = await self.score_with_features(ticker, as_of)
+        return result
+    
+    async def score_with_features(self, ticker: str, as_of: Optional[date] = None) -> Tuple[AnalysisResult, Dict]:
+        """calculate_final_score plus the ticker's feature-table row, built from this call's intermediates only"""
+        # Every fallback taken while scoring is reported on the result
+        with track_degradation() as degraded:
+            cached = self.get_cached_scores(ticker, as_of) if is_historical(as_of) else None
+            technical_analysis = {}
+            sentiment_details = {}
+            
+            if cached:
+                momentum_score = float(cached['momentum_score'])
+                sentiment_score = float(cached['sentiment_score'])
+                sentiment_confidence = cached.get('sentiment_confidence')
+                volume_score = float(cached['volume_score'])
+                technical_score = float(cached['technical_score'])
+            else:
+                # Get sentiment analysis
+                sentiment_score, sentiment_confidence, sentiment_details = await self._analyze_sentiment(ticker, as_of)
+                
+                # Get technical analysis
+                technical_analysis = await self.analyze_technical(ticker, as_of)
+                
+                # Calculate final score with weights
+                momentum_score = technical_analysis['momentum_score']
+                volume_score = technical_analysis['volume_score']
+                technical_score = technical_analysis['technical_score']
+                
+                # Only completed days are cached: a live score is partial until the day closes,
+                # and scores built on fallbacks must not become the snapshot for the date
+                if is_historical(as_of) and not degraded:
+                    self.save_scores(ticker, as_of, {
+                        "momentum_score": momentum_score,
+                        "sentiment_score": sentiment_score,
+                        "sentiment_confidence": sentiment_confidence,
+                        "volume_score": volume_score,
+                        "technical_score": technical_score
+                    })
+            
+            # Weighted final score
+            components = {
+                "momentum_score": momentum_score,
+                "sentiment_score": sentiment_score,
+                "volume_score": volume_score,
+                "technical_score": technical_score
+            }
+            final_score = sum(components[name] * weight for name, weight in SCORE_WEIGHTS)
+            
+            # Blend in the cached return forecast; only meaningful for the current date
+            forecast_score = None
+            if not is_historical(as_of) and self.forecast_weight > 0:
+                try:
+                    expected_return = self.forecast_service.get_expected_return(ticker)
+                except Exception as e:
+                    print(f"Error reading forecast for {ticker}: {e}")
+                    expected_return = None
+                if expected_return is not None:
+                    forecast_score = float(np.tanh(expected_return / 0.05))
+                    final_score = (1 - self.forecast_weight) * final_score + self.forecast_weight * forecast_score
+            
+            # Normalize to [0, 1] range
+            final_score = max(0, min(1, (final_score + 1) / 2))
+            
+            # Determine recommendation
+            if final_score >= 0.7:
+                recommendation = "BUY"
+            elif final_score >= 0.4:
+                recommendation = "HOLD"
+            else:
+                recommendation = "SELL"
+            
+            # Generate reason
+            reason = self._generate_reason(
+                momentum_score, sentiment_score, volume_score, technical_score, final_score
+            )
+            
+            result = AnalysisResult(
+                symbol=ticker,
+                momentum_score=momentum_score,
+                sentiment_score=sentiment_score,
+                volume_score=volume_score,
+                technical_score=technical_score,
+                forecast_score=forecast_score,
+                final_score=final_score,
+                recommendation=recommendation,
+                reason=reason,
+                degraded=sorted(degraded)
+            )
+            
+            if not degraded and not is_historical(as_of):
+                self._last_scores[ticker] = {
+                    **components,
+                    "sentiment_confidence": sentiment_confidence,
+                    "forecast_score": forecast_score,
+                    "final_score": final_score,
+                    "recommendation": recommendation
+                }
+            
+            features = {
+                **technical_features(technical_analysis),
+                **sentiment_details,
+                **components,
+                "sentiment_confidence": sentiment_confidence,
+                "forecast_score": forecast_score,
+                "final_score": final_score,
+                "recommendation": recommendation
+            }
+            
+            if not is_historical(as_of):
+                self.event_hub.publish('score', result.dict(), dedupe_key=f"score:{ticker}")
+            
+            return result, features
     
     def _generate_reason(self, momentum: float, sentiment: float, volume: float, technical: float, final: float) -> str:
         """Generate human-readable reason for recommendation"""
+        values = {
+            "momentum_score": momentum,
+            "sentiment_score": sentiment,
+            "volume_score": volume,
+            "technical_score": technical
+        }
         reasons = []
         
-        if momentum > 0.7:
-            reasons.append("강한 상승 모멘텀")
-        elif momentum < 0.3:
-            reasons.append("하락 모멘텀")
+        # Same thresholds the feature table's vectorized reasons use
+        for column, above, high_label, below, low_label in REASON_RULES:
+            if values[column] > above:
+                reasons.append(high_label)
+            elif values[column] < below:
+                reasons.append(low_label)
         
-        if sentiment > 0.3:
-            reasons.append("긍정적 뉴스 감성")
-        elif sentiment < -0.3:
-            reasons.append("부정적 뉴스 감성")
+        if not reasons:
+            reasons.append(NEUTRAL_REASON)
         
-        if volume > 0.7:
-            reasons.append("거래량 급증")
-        elif volume < 0.3:
-            reasons.append("거래량 감소")
+        return f"종합 점수 {final:.1%} - {', '.join(reasons)}"
+    
+    def last_snapshot(self, ticker: str) -> Optional[Dict]:
+        """Latest healthy scores for a ticker from this process, else from the newest feature table (no database access)"""
+        snapshot = self._last_scores.get(ticker)
+        if snapshot is not None:
+            return snapshot
         
-        if technical > 0.7:
-            reasons.append("기술적 지표 양호")
-        elif technical < 0.3:
-            reasons.append("기술적 지표 약화")
+        try:
+            frame = self.feature_store.load(columns=SNAPSHOT_COLUMNS, tickers=[ticker])
+        except Exception as e:
+            print(f"Error reading feature table snapshot for {ticker}: {e}")
+            return None
+        if frame.empty:
+            return None
         
-        if not reasons:
-            reasons.append("종합적으로 중립적")
+        row = frame.iloc[0].to_dict()
+        return {key: None if isinstance(value, float) and np.isnan(value) else value for key, value in row.items()}
+    
+    def snapshot_result(self, ticker: str, degraded: List[str]) -> Optional[AnalysisResult]:
+        """The last snapshot as an analysis result, for when scoring fails outright"""
+        snapshot = self.last_snapshot(ticker)
+        if snapshot is None:
+            return None
         
-        return f"종합 점수 {final:.1%} - {', '.join(reasons)}"
+        final_score = float(snapshot['final_score'])
+        return AnalysisResult(
+            symbol=ticker,
+            momentum_score=float(snapshot['momentum_score']),
+            sentiment_score=float(snapshot['sentiment_score']),
+            volume_score=float(snapshot['volume_score']),
+            technical_score=float(snapshot['technical_score']),
+            forecast_score=snapshot.get('forecast_score'),
+            final_score=final_score,
+            recommendation=snapshot['recommendation'],
+            reason=self._generate_reason(
+                float(snapshot['momentum_score']), float(snapshot['sentiment_score']),
+                float(snapshot['volume_score']), float(snapshot['technical_score']), final_score
+            ),
+            degraded=sorted({*degraded, "snapshot"})
+        )
     
-    async def analyze_multiple_stocks(self, tickers: List[str]) -> List[AnalysisResult]:
+    async def analyze_multiple_stocks(self, tickers: List[str], as_of: Optional[date] = None) -> List[AnalysisResult]:
         """Analyze multiple stocks and return results"""
         results = []
         
         for ticker in tickers:
             try:
-                result = await self.calculate_final_score(ticker)
+                result = await self.calculate_final_score(ticker, as_of)
                 results.append(result)
             except Exception as e:
                 print(f"Error analyzing {ticker}: {e}")
@@ -199,23 +639,93 @@ class AnalysisService:
         
         return results
     
-    async def get_daily_recommendations(self, date: Optional[datetime] = None) -> List[RecommendationCreate]:
+    def get_sentiment_token_stats(self) -> Optional[Dict[str, int]]:
+        """Cumulative FinBERT workload of the local analyzer or the shared sentiment server"""
+        try:
+            return self.sentiment_analyzer.get_token_stats()
+        except Exception as e:
+            print(f"Error reading sentiment token stats: {e}")
+            return None
+    
+    async def get_daily_recommendations(
+        self,
+        date: Optional[datetime] = None,
+        diversify: bool = False,
+        full_refresh: bool = False
+    ) -> List[RecommendationCreate]:
         """Get daily stock recommendations"""
         if date is None:
-            date = datetime.now().date()
+            date = utc_today()
         
         # Get all stocks
-        stocks_response = self.supabase.table('stocks').select('id, ticker').execute()
+        stocks_response = self.supabase.table('stocks').select('id, ticker, sector, industry, market').execute()
         
         if not stocks_response.data:
             return []
         
+        # Bring stale return forecasts up to date (capped per run) before scoring
+        if self.forecast_weight > 0:
+            try:
+                self.forecast_service.refresh()
+            except Exception as e:
+                print(f"Error refreshing forecasts: {e}")
+        
+        # Live runs only re-analyze tickers with new information; the rest carry their last result
+        use_planner = not full_refresh and not is_historical(date)
+        if use_planner:
+            try:
+                plan = self.run_planner.plan(stocks_response.data, date)
+            except Exception as e:
+                print(f"Error planning daily run, analyzing every stock: {e}")
+                use_planner = False
+        if not use_planner:
+            plan = {"analyze": stocks_response.data, "carried": [], "deferred": [], "activity": {}}
+        
+        tokens_before = self.get_sentiment_token_stats()
+        results = []
+        analyzed = []
+        # Feature rows come back from each scoring call, so concurrent requests cannot mix into the run
+        features_by_ticker: Dict[str, Dict] = {}
+        for stock in plan['analyze']:
+            try:
+                analysis, features_by_ticker[stock['ticker']] = await self.score_with_features(stock['ticker'], date)
+                results.append((stock, analysis))
+                analyzed.append({"stock": stock, "result": analysis.dict()})
+            except Exception as e:
+                print(f"Error analyzing {stock['ticker']}: {e}")
+        
+        for entry in plan['carried']:
+            try:
+                results.append((entry['stock'], AnalysisResult(**entry['result'])))
+            except Exception as e:
+                print(f"Error carrying forward {entry['stock']['ticker']}: {e}")
+        
+        tokens_after = self.get_sentiment_token_stats()
+        if tokens_before and tokens_after:
+            used = {key: tokens_after[key] - tokens_before.get(key, 0) for key in ('tokens', 'padded_tokens', 'windows', 'long_documents', 'batches')}
+            print(
+                f"Daily run {date}: FinBERT processed {used['tokens']} tokens ({used['padded_tokens']} padded) "
+                f"in {used['windows']} windows over {used['batches']} batches, {used['long_documents']} long articles"
+            )
+        
+        if use_planner:
+            print(
+                f"Daily run {date}: analyzed {len(analyzed)}, carried forward {len(plan['carried'])}, "
+                f"deferred {len(plan['deferred'])} over budget"
+            )
+            try:
+                # Tickers scored on fallbacks are not recorded, so the next run analyzes them again
+                healthy = [entry for entry in analyzed if not entry['result'].get('degraded')]
+                self.run_planner.record(date, healthy, plan['activity'])
+            except Exception as e:
+                print(f"Error saving run state: {e}")
+        
         recommendations = []
+        scored = []
         
-        # Analyze each stock
-        for stock in stocks_response.data:
+        for stock, analysis in results:
             try:
-                analysis = await self.calculate_final_score(stock['ticker'])
+                scored.append({**stock, **analysis.dict()})
                 
                 # Only include stocks with score > 0.5
                 if analysis.final_score > 0.5:
@@ -231,11 +741,117 @@ class AnalysisService:
                     )
                     recommendations.append(recommendation)
             except Exception as e:
-                print(f"Error analyzing {stock['ticker']}: {e}")
+                print(f"Error building recommendation for {stock['ticker']}: {e}")
                 continue
         
+        # Sector/industry/market rollups over every scored ticker, stored next to the snapshots
+        try:
+            self.rollup_service.save(date, self.rollup_service.compute(scored))
+        except Exception as e:
+            print(f"Error saving score rollups: {e}")
+        
+        # Every intermediate per ticker in one columnar file, so re-ranking and research need no model reruns
+        try:
+            analyzed_tickers = {entry['stock']['ticker'] for entry in analyzed}
+            # Carried tickers keep the intermediates of the run that last scored them
+            try:
+                previous = self.feature_store.previous_rows(
+                    date, [stock['ticker'] for stock, _ in results if stock['ticker'] not in analyzed_tickers]
+                )
+            except Exception as e:
+                print(f"Error loading previous feature rows: {e}")
+                previous = {}
+            feature_rows = []
+            for stock, analysis in results:
+                if stock['ticker'] in analyzed_tickers:
+                    features = features_by_ticker.get(stock['ticker'])
+                else:
+                    features = previous.get(stock['ticker'])
+                feature_rows.append({
+                    **(features or analysis.dict()),
+                    "stock_id": stock['id'],
+                    "ticker": stock['ticker'],
+                    "market": stock.get('market'),
+                    "sector": stock.get('sector'),
+                    "industry": stock.get('industry'),
+                    "carried": stock['ticker'] not in analyzed_tickers
+                })
+            written = self.feature_store.write(date, feature_rows, {"forecast_weight": self.forecast_weight})
+            print(f"Daily run {date}: wrote {written['rows']} feature rows to {written['path']}")
+        except Exception as e:
+            print(f"Error writing feature table: {e}")
+        
         # Sort by score (descending)
         recommendations.sort(key=lambda x: x.score, reverse=True)
         
+        if diversify:
+            # Penalize names highly correlated with ones already picked
+            try:
+                correlation_service = get_correlation_service()
+                correlation_service.refresh()
+                order = correlation_service.diversify([(rec.stock_id, rec.score) for rec in recommendations], k=20)
+                by_id = {rec.stock_id: rec for rec in recommendations}
+                return [by_id[stock_id] for stock_id in order]
+            except Exception as e:
+                print(f"Error diversifying recommendations: {e}")
+        
         # Return top 20 recommendations
         return recommendations[:20]
+    
+    async def save_recommendations(
+        self,
+        recommendations: List[RecommendationCreate],
+        chunk_size: int = 500,
+        max_retries: int = 3,
+        transactional: bool = False
+    ) -> RecommendationSaveSummary:
+        """Persist recommendations with a batched upsert on (stock_id, recommended_date)"""
+        loop = asyncio.get_running_loop()
+        rows = []
+        for recommendation in recommendations:
+            row = recommendation.dict()
+            row['recommended_date'] = row['recommended_date'].isoformat()
+            rows.append(row)
+        
+        if not rows:
+            return RecommendationSaveSummary(saved_count=0, failed_count=0, chunk_count=0)
+        
+        if transactional:
+            # Single RPC call so the whole batch commits or rolls back together
+            try:
+                response = await loop.run_in_executor(
+                    None, lambda: self.supabase.rpc('upsert_recommendations', {'payload': rows}).execute()
+                )
+                saved = response.data if isinstance(response.data, int) else len(rows)
+                self.event_hub.publish('recommendation', rows)
+                return RecommendationSaveSummary(saved_count=saved, failed_count=0, chunk_count=1)
+            except Exception as e:
+                print(f"Error saving recommendations transactionally: {e}")
+                return RecommendationSaveSummary(saved_count=0, failed_count=len(rows), chunk_count=1)
+        
+        # Retries back off with blocking sleeps, so keep them off the event loop
+        result = await loop.run_in_executor(None, lambda: upsert_in_chunks(
+            'recommendations',
+            rows,
+            on_conflict='stock_id,recommended_date',
+            chunk_size=chunk_size,
+            max_retries=max_retries
+        ))
+        
+        if result['saved']:
+            self.event_hub.publish('recommendation', rows)
+        
+        return RecommendationSaveSummary(
+            saved_count=result['saved'],
+            failed_count=result['failed'],
+            chunk_count=result['chunks']
+        )
+
+analysis_service: Optional[AnalysisService] = None
+
+def get_analysis_service() -> AnalysisService:
+    """Get the process-wide analysis service, created on first use"""
+    global analysis_service
+    if analysis_service is None:
+        analysis_service = AnalysisService()
+    return analysis_service
@@ -0,0 +1,110 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.utils.database import get_supabase, upsert_in_chunks
+
+class ArticleStore:
+    """Articles keyed by URL hash with a many-to-many ticker mapping"""
+    
+    def __init__(self):
+        self.supabase = get_supabase()
+    
+    @staticmethod
+    def url_hash(url: str) -> str:
+        """SHA-256 of the URL, matching the hash used by the database trigger"""
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def relevance(article: Dict, stock: Dict) -> float:
+        """Heuristic relevance of an article to a stock based on where it is mentioned"""
+        headline = (article.get('headline') or '').lower()
+        content = (article.get('content') or '').lower()
+        names = [name.lower() for name in (stock.get('ticker'), stock.get('name')) if name]
+        
+        if any(name in headline for name in names):
+            return 1.0
+        if any(name in content for name in names):
+            return 0.6
+        return 0.3
+    
+    def save_article(self, article: Dict, stocks: List[Dict]) -> Optional[Dict]:
+        """Store an article once and link it to every mentioned stock"""
+        row = {
+            "url_hash": self.url_hash(article['url']),
+            "url": article['url'],
+            "headline": article['headline'],
+            "content": article.get('content'),
+            "source": article.get('source'),
+            "published_at": article['published_at'].isoformat() if isinstance(article['published_at'], datetime) else article['published_at']
+        }
+        
+        response = self.supabase.table('articles').upsert(row, on_conflict='url_hash').execute()
+        if not response.data:
+            return None
+        
+        saved = response.data[0]
+        links = [
+            {"article_id": saved['id'], "stock_id": stock['id'], "relevance": self.relevance(article, stock)}
+            for stock in stocks
+        ]
+        if links:
+            upsert_in_chunks('article_tickers', links, on_conflict='article_id,stock_id')
+        
+        saved['tickers'] = links
+        return saved
+    
+    def get_articles_for_stock(
+        self,
+        stock_id: int,
+        since: datetime,
+        until: Optional[datetime] = None,
+        include_since: bool = True,
+        aggregated: Optional[bool] = None
+    ) -> List[Dict]:
+        """Articles linked to a stock in a publish-time range, newest first, with their relevance"""
+        query = self.supabase.table('article_tickers').select(
+            'relevance, aggregate_weight, articles!inner(*)'
+        ).eq('stock_id', stock_id)
+        
+        if include_since:
+            query = query.gte('articles.published_at', since.isoformat())
+        else:
+            query = query.gt('articles.published_at', since.isoformat())
+        
+        if until is not None:
+            query = query.lt('articles.published_at', until.isoformat())
+        
+        # Whether the article has already been folded into the stock's sentiment aggregate
+        if aggregated is True:
+            query = query.not_.is_('aggregate_weight', 'null')
+        elif aggregated is False:
+            query = query.is_('aggregate_weight', 'null')
+        
+        response = query.execute()
+        
+        articles = []
+        for link in response.data or []:
+            article = dict(link['articles'])
+            article['relevance'] = float(link['relevance'])
+            article['aggregate_weight'] = link.get('aggregate_weight')
+            articles.append(article)
+        
+        articles.sort(key=lambda article: article['published_at'], reverse=True)
+        return articles
+    
+    def save_scores(self, articles: List[Dict]) -> Dict[str, int]:
+        """Write computed sentiment back so every linked ticker reuses it"""
+        scored_at = datetime.now().isoformat()
+        rows = [
+            {
+                "url_hash": article['url_hash'],
+                "url": article['url'],
+                "headline": article['headline'],
+                "published_at": article['published_at'],
+                "sentiment": round(article['sentiment'], 2),
+                "confidence": round(article['confidence'], 2),
+                "scored_at": scored_at
+            }
+            for article in articles
+        ]
+        return upsert_in_chunks('articles', rows, on_conflict='url_hash')
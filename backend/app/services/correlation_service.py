@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.utils.database import get_supabase, fetch_all_pages
+
+class CorrelationService:
+    """Rolling return covariance/correlation over the whole stock universe"""
+    
+    # Running sums and the float32 cross-product matrix of daily log returns make each
+    # new day an O(N^2) rank-one update instead of a full recomputation. Missing
+    # returns count as zero moves. Adding and expiring float32 outer products leaves
+    # rounding residue behind, so the matrix is recomputed from the window every
+    # rebuild_every updates.
+    
+    def __init__(self, window: int = 60, block_size: int = 1024, rebuild_every: int = 20):
+        self.window = window
+        self.block_size = block_size
+        self.rebuild_every = rebuild_every
+        self.supabase = get_supabase()
+        self._reset()
+    
+    def _reset(self):
+        self.stock_ids = np.empty(0, dtype=np.int64)
+        self.index: Dict[int, int] = {}
+        self.tickers: List[str] = []
+        self.sectors: List[str] = []
+        self.returns = np.empty((0, 0), dtype=np.float32)
+        self.dates: List[date] = []
+        self.sums = np.empty(0, dtype=np.float64)
+        self.cross = np.empty((0, 0), dtype=np.float32)
+        self.last_close: Optional[np.ndarray] = None
+        # Close before the newest day, so that day can be replaced when it was partial
+        self.prev_close: Optional[np.ndarray] = None
+        self.updates_since_rebuild = 0
+        self.built = False
+    
+    def _load_universe(self):
+        response = self.supabase.table('stocks').select('id, ticker, sector').order('id').execute()
+        stocks = response.data or []
+        self.stock_ids = np.array([s['id'] for s in stocks], dtype=np.int64)
+        self.index = {int(stock_id): i for i, stock_id in enumerate(self.stock_ids)}
+        self.tickers = [s['ticker'] for s in stocks]
+        self.sectors = [s.get('sector') or 'Unknown' for s in stocks]
+    
+    def _load_closes(self, since: date) -> pd.DataFrame:
+        """Aligned close panel (dates x stocks), forward-filled across missing days"""
+        rows = fetch_all_pages(
+            lambda: self.supabase.table('stock_prices').select('stock_id, date, close').gte('date', since.isoformat()).order('date')
+        )
+        if not rows:
+            return pd.DataFrame(columns=self.stock_ids)
+        
+        df = pd.DataFrame(rows)
+        panel = df.pivot_table(index='date', columns='stock_id', values='close', aggfunc='last')
+        panel.index = pd.to_datetime(panel.index).date
+        return panel.reindex(columns=self.stock_ids).sort_index().ffill()
+    
+    def build(self):
+        """Full rebuild from the last window+1 trading days of closes"""
+        self._load_universe()
+        n = len(self.stock_ids)
+        
+        # Calendar days generously covering window+1 trading days
+        since = datetime.now().date() - timedelta(days=int(self.window * 7 / 5) + 10)
+        panel = self._load_closes(since)
+        
+        closes = panel.to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(closes[1:] / closes[:-1])
+        returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)[-self.window:]
+        
+        self.returns = returns
+        self.dates = list(panel.index[1:])[-self.window:]
+        self.last_close = closes[-1] if len(closes) else None
+        self.prev_close = closes[-2] if len(closes) > 1 else None
+        self._rebuild_sums()
+        self.built = True
+    
+    def _rebuild_sums(self):
+        """Recompute the running sums and cross products from the returns in the window"""
+        n = self.returns.shape[1]
+        self.sums = self.returns.sum(axis=0, dtype=np.float64)
+        
+        # Block-wise X^T X keeps temporaries bounded for very large universes
+        self.cross = np.zeros((n, n), dtype=np.float32)
+        for start in range(0, n, self.block_size):
+            stop = min(start + self.block_size, n)
+            self.cross[start:stop] = self.returns[:, start:stop].T @ self.returns
+        self.updates_since_rebuild = 0
+    
+    def _count_update(self):
+        self.updates_since_rebuild += 1
+        if self.updates_since_rebuild >= self.rebuild_every:
+            self._rebuild_sums()
+    
+    def update(self, day: date, closes: np.ndarray):
+        """Push one day of closes (aligned to stock_ids) and expire the oldest day beyond the window"""
+        if self.last_close is None:
+            self.last_close = closes
+            return
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            row = np.log(closes / self.last_close)
+        row = np.nan_to_num(row, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
+        self.prev_close = self.last_close
+        self.last_close = np.where(np.isnan(closes), self.last_close, closes)
+        
+        self.returns = np.vstack([self.returns, row[None, :]])
+        self.dates.append(day)
+        self.sums += row
+        self.cross += np.outer(row, row)
+        
+        if len(self.returns) > self.window:
+            oldest = self.returns[0]
+            self.sums -= oldest
+            self.cross -= np.outer(oldest, oldest)
+            self.returns = self.returns[1:]
+            self.dates = self.dates[1:]
+        
+        self._count_update()
+    
+    def _drop_last(self):
+        """Take back the newest day so it can be pushed again with its final closes"""
+        row = self.returns[-1]
+        self.sums -= row
+        self.cross -= np.outer(row, row)
+        self.returns = self.returns[:-1]
+        self.dates = self.dates[:-1]
+        self.last_close = self.prev_close
+        self.prev_close = None
+        self._count_update()
+    
+    def refresh(self):
+        """Build on first use; afterwards re-read the newest day seen (it may have been partial) and fold in later ones"""
+        if not self.built:
+            self.build()
+            return
+        
+        response = self.supabase.table('stocks').select('id').order('id').execute()
+        if [s['id'] for s in response.data or []] != self.stock_ids.tolist():
+            # Universe changed; positions no longer line up
+            self.build()
+            return
+        
+        if not self.dates or self.prev_close is None:
+            self.build()
+            return
+        
+        panel = self._load_closes(self.dates[-1])
+        if len(panel.index) and panel.index[0] == self.dates[-1]:
+            self._drop_last()
+        for day, closes in zip(panel.index, panel.to_numpy(dtype=np.float64)):
+            self.update(day, closes)
+    
+    def _covariance_block(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        count = max(len(self.returns), 2)
+        mean_rows = self.sums[rows] / count
+        mean_cols = self.sums[cols] / count
+        cross = self.cross[np.ix_(rows, cols)].astype(np.float64)
+        return (cross - count * np.outer(mean_rows, mean_cols)) / (count - 1)
+    
+    def _std(self, indices: np.ndarray) -> np.ndarray:
+        count = max(len(self.returns), 2)
+        diag = self.cross[indices, indices].astype(np.float64)
+        variance = (diag - self.sums[indices] ** 2 / count) / (count - 1)
+        return np.sqrt(np.maximum(variance, 0))
+    
+    def correlation(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Correlation sub-matrix; zero where a stock had no variance"""
+        cov = self._covariance_block(rows, cols)
+        denom = np.outer(self._std(rows), self._std(cols))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where(denom > 0, cov / denom, 0.0)
+        return np.clip(corr, -1, 1).astype(np.float32)
+    
+    def indices_for(self, tickers: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        found = [ticker for ticker in tickers if ticker in positions]
+        return found, np.array([positions[ticker] for ticker in found], dtype=np.int64)
+    
+    def pairwise(self, tickers: Sequence[str]) -> Dict:
+        found, idx = self.indices_for(tickers)
+        return {
+            "tickers": found,
+            "window": len(self.returns),
+            "matrix": self.correlation(idx, idx).round(4).tolist()
+        }
+    
+    def sector_correlation(self) -> Dict:
+        """Average pairwise correlation between and within sectors, accumulated block by block"""
+        sectors = sorted(set(self.sectors))
+        sector_index = {sector: i for i, sector in enumerate(sectors)}
+        membership = np.zeros((len(self.sectors), len(sectors)), dtype=np.float32)
+        for i, sector in enumerate(self.sectors):
+            membership[i, sector_index[sector]] = 1
+        
+        all_idx = np.arange(len(self.stock_ids))
+        totals = np.zeros((len(sectors), len(sectors)), dtype=np.float64)
+        for start in range(0, len(all_idx), self.block_size):
+            block = all_idx[start:start + self.block_size]
+            corr = self.correlation(block, all_idx)
+            # Exclude self-correlation so within-sector averages are over distinct pairs
+            corr[np.arange(len(block)), block] = 0
+            totals += membership[block].T @ corr @ membership
+        
+        sizes = membership.sum(axis=0)
+        pairs = np.outer(sizes, sizes) - np.diag(sizes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(pairs > 0, totals / pairs, 0.0)
+        
+        return {
+            "sectors": sectors,
+            "window": len(self.returns),
+            "matrix": averages.round(4).tolist()
+        }
+    
+    def diversify(self, candidates: List[Tuple[int, float]], k: int = 20, penalty: float = 0.5) -> List[int]:
+        """Greedy top-k of (stock_id, score) pairs by score minus penalty x highest correlation with picks so far"""
+        known = [(stock_id, score) for stock_id, score in candidates if stock_id in self.index]
+        unknown = [stock_id for stock_id, _ in sorted(candidates, key=lambda c: c[1], reverse=True) if stock_id not in self.index]
+        if not known:
+            return unknown[:k]
+        
+        ids = np.array([stock_id for stock_id, _ in known])
+        scores = np.array([score for _, score in known], dtype=np.float64)
+        idx = np.array([self.index[int(stock_id)] for stock_id in ids])
+        corr = self.correlation(idx, idx)
+        
+        chosen: List[int] = []
+        max_corr = np.zeros(len(ids))
+        available = np.ones(len(ids), dtype=bool)
+        for _ in range(min(k, len(ids))):
+            adjusted = np.where(available, scores - penalty * np.maximum(max_corr, 0), -np.inf)
+            pick = int(np.argmax(adjusted))
+            chosen.append(pick)
+            available[pick] = False
+            max_corr = np.maximum(max_corr, corr[pick])
+        
+        return [int(ids[i]) for i in chosen] + unknown[:max(0, k - len(chosen))]
+
+correlation_service: Optional[CorrelationService] = None
+
+def get_correlation_service() -> CorrelationService:
+    """Get the process-wide correlation service, created on first use"""
+    global correlation_service
+    if correlation_service is None:
+        correlation_service = CorrelationService()
+    return correlation_service
@@ -0,0 +1,94 @@
+import asyncio
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Set
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'dict'):
+        return value.dict()
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class Subscriber:
+    """A single stream client with a bounded outgoing queue"""
+    
+    def __init__(self, max_queue: int, event_types: Optional[Set[str]] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.event_types = event_types
+        self.dropped = 0
+        self.closed = False
+    
+    def wants(self, event_type: str) -> bool:
+        return self.event_types is None or event_type in self.event_types
+
+class EventHub:
+    """Fan-out hub: each update is serialized once and pushed to every subscriber's queue"""
+    
+    # In-process only: subscribers receive events published by the same process, and event
+    # ids are a per-process counter. Streaming therefore needs a single uvicorn worker.
+    
+    def __init__(self, max_queue: int = 100, max_dropped: int = 500):
+        self.max_queue = max_queue
+        self.max_dropped = max_dropped
+        self.subscribers: Set[Subscriber] = set()
+        self.event_id = 0
+        # Last published value per key, so unchanged scores are not re-broadcast
+        self._last_values: Dict[str, Any] = {}
+    
+    def subscribe(self, event_types: Optional[Set[str]] = None) -> Subscriber:
+        subscriber = Subscriber(self.max_queue, event_types)
+        self.subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.closed = True
+        self.subscribers.discard(subscriber)
+    
+    def publish(self, event_type: str, data: Any, dedupe_key: Optional[str] = None) -> int:
+        """Broadcast an event; returns the number of subscribers it was queued for"""
+        if dedupe_key is not None:
+            if self._last_values.get(dedupe_key) == data:
+                return 0
+            self._last_values[dedupe_key] = data
+        
+        if not self.subscribers:
+            return 0
+        
+        self.event_id += 1
+        frame = f"id: {self.event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=_json_default, ensure_ascii=False)}\n\n"
+        
+        delivered = 0
+        for subscriber in list(self.subscribers):
+            if not subscriber.wants(event_type):
+                continue
+            
+            if subscriber.queue.full():
+                # Slow client: drop its oldest pending event rather than blocking the pipeline
+                subscriber.queue.get_nowait()
+                subscriber.dropped += 1
+                if subscriber.dropped > self.max_dropped:
+                    self.unsubscribe(subscriber)
+                    continue
+            
+            subscriber.queue.put_nowait(frame)
+            delivered += 1
+        
+        return delivered
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "events_published": self.event_id,
+            "events_dropped": sum(subscriber.dropped for subscriber in self.subscribers)
+        }
+
+# Per process: with several uvicorn workers a stream client only sees events published in
+# its own worker (e.g. the daily run's scores reach only the worker that ran it)
+event_hub = EventHub()
+
+def get_event_hub() -> EventHub:
+    """Get the process-wide event hub"""
+    return event_hub
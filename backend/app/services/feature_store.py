@@ -0,0 +1,220 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.services.technical_analyzer import DEFAULT_HORIZONS
+
+# Component weights of the final score, summed in this order
+SCORE_WEIGHTS: Tuple[Tuple[str, float], ...] = (
+    ('momentum_score', 0.3),
+    ('sentiment_score', 0.4),
+    ('volume_score', 0.2),
+    ('technical_score', 0.1)
+)
+
+# (column, above, label above, below, label below) for the recommendation reason
+REASON_RULES = (
+    ('momentum_score', 0.7, "강한 상승 모멘텀", 0.3, "하락 모멘텀"),
+    ('sentiment_score', 0.3, "긍정적 뉴스 감성", -0.3, "부정적 뉴스 감성"),
+    ('volume_score', 0.7, "거래량 급증", 0.3, "거래량 감소"),
+    ('technical_score', 0.7, "기술적 지표 양호", 0.3, "기술적 지표 약화")
+)
+NEUTRAL_REASON = "종합적으로 중립적"
+
+INDICATOR_COLUMNS = ('rsi', 'macd', 'bb_position', 'stoch', 'williams_r')
+
+# Fixed column order and types, so every daily file has the same schema
+FEATURE_COLUMNS: List[Tuple[str, str]] = (
+    [
+        ('analysis_date', 'date'),
+        ('stock_id', 'int64'),
+        ('ticker', 'string'),
+        ('market', 'string'),
+        ('sector', 'string'),
+        ('industry', 'string'),
+        ('model_version', 'string'),
+        ('carried', 'bool'),
+        ('close', 'float64'),
+        ('volume', 'float64'),
+        ('bars', 'int64')
+    ]
+    + [(name, 'float64') for name in INDICATOR_COLUMNS]
+    + [(f"{kind}_{h}", 'float64') for h in DEFAULT_HORIZONS for kind in ('momentum', 'volume')]
+    + [
+        ('momentum_score', 'float64'),
+        ('volume_score', 'float64'),
+        ('technical_score', 'float64'),
+        ('sentiment_score', 'float64'),
+        ('sentiment_confidence', 'float64'),
+        ('forecast_score', 'float64'),
+        ('finbert_score', 'float64'),
+        ('textblob_score', 'float64'),
+        ('vader_score', 'float64'),
+        ('scored_article_count', 'int64'),
+        ('news_count', 'int64'),
+        ('final_score', 'float64'),
+        ('recommendation', 'string')
+    ]
+)
+
+def technical_features(technical: Dict) -> Dict[str, float]:
+    """Flatten TechnicalAnalyzer.analyze_stock output (indicators, per-horizon scores) into feature columns"""
+    features = dict(technical.get('indicators') or {})
+    for h, scores in (technical.get('horizon_scores') or {}).items():
+        features[f"momentum_{h}"] = scores['momentum_score']
+        features[f"volume_{h}"] = scores['volume_score']
+    for key, column in (('last_close', 'close'), ('last_volume', 'volume'), ('bars', 'bars')):
+        if key in technical:
+            features[column] = technical[key]
+    return features
+
+def final_scores(frame: pd.DataFrame, weights: Sequence[Tuple[str, float]] = SCORE_WEIGHTS, forecast_weight: float = 0.0) -> np.ndarray:
+    """calculate_final_score over every row at once: weighted components, optional forecast blend, mapped to [0, 1]"""
+    total = np.zeros(len(frame))
+    for column, weight in weights:
+        total = total + frame[column].to_numpy(dtype=float) * weight
+    
+    if forecast_weight > 0 and 'forecast_score' in frame:
+        forecast = frame['forecast_score'].to_numpy(dtype=float)
+        total = np.where(np.isnan(forecast), total, (1 - forecast_weight) * total + forecast_weight * forecast)
+    
+    return np.clip((total + 1) / 2, 0, 1)
+
+def recommendation_labels(scores: np.ndarray) -> np.ndarray:
+    return np.select([scores >= 0.7, scores >= 0.4], ["BUY", "HOLD"], "SELL")
+
+def generate_reasons(frame: pd.DataFrame, scores: np.ndarray) -> np.ndarray:
+    """AnalysisService._generate_reason for every row, built with array string operations"""
+    joined = np.full(len(frame), '', dtype=object)
+    for column, above, high_label, below, low_label in REASON_RULES:
+        values = frame[column].to_numpy(dtype=float)
+        label = np.where(values > above, high_label, np.where(values < below, low_label, '')).astype(object)
+        separator = np.where((joined != '') & (label != ''), ', ', '')
+        joined = joined + separator + label
+    
+    joined = np.where(joined == '', NEUTRAL_REASON, joined)
+    prefixes = np.char.mod("종합 점수 %.1f%% - ", scores * 100).astype(object)
+    return prefixes + joined
+
+def rerank(frame: pd.DataFrame, weights: Sequence[Tuple[str, float]] = SCORE_WEIGHTS, forecast_weight: float = 0.0) -> pd.DataFrame:
+    """Rescore a feature frame with new weights; best first, ties broken by ticker"""
+    ranked = frame.copy()
+    scores = final_scores(ranked, weights, forecast_weight)
+    ranked['final_score'] = scores
+    ranked['recommendation'] = recommendation_labels(scores)
+    ranked['reason'] = generate_reasons(ranked, scores)
+    return ranked.sort_values(['final_score', 'ticker'], ascending=[False, True], kind='mergesort').reset_index(drop=True)
+
+class FeatureStore:
+    """Daily per-ticker feature table: one Parquet file per analysis date and model version"""
+    
+    def __init__(self, root: str, model_version: str):
+        self.root = root
+        self.model_version = model_version
+    
+    @property
+    def directory(self) -> str:
+        return os.path.join(self.root, self.model_version)
+    
+    def path(self, analysis_date: date) -> str:
+        return os.path.join(self.directory, f"{analysis_date.isoformat()}.parquet")
+    
+    def to_frame(self, analysis_date: date, rows: List[Dict]) -> pd.DataFrame:
+        """Rows in FEATURE_COLUMNS order and types, sorted by ticker; missing features are NaN"""
+        data = {}
+        for column, kind in FEATURE_COLUMNS:
+            if column == 'analysis_date':
+                data[column] = [analysis_date] * len(rows)
+            elif column == 'model_version':
+                data[column] = [self.model_version] * len(rows)
+            elif kind == 'float64':
+                data[column] = np.array([np.nan if row.get(column) is None else row[column] for row in rows], dtype=np.float64)
+            elif kind == 'int64':
+                data[column] = np.array([row.get(column) or 0 for row in rows], dtype=np.int64)
+            elif kind == 'bool':
+                data[column] = np.array([bool(row.get(column)) for row in rows], dtype=bool)
+            else:
+                data[column] = [row.get(column) for row in rows]
+        
+        frame = pd.DataFrame(data, columns=[column for column, _ in FEATURE_COLUMNS])
+        return frame.sort_values('ticker', kind='mergesort').reset_index(drop=True)
+    
+    def write(self, analysis_date: date, rows: List[Dict], metadata: Optional[Dict] = None) -> Dict:
+        """Write (replace) the file for a date in one bulk columnar write"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        frame = self.to_frame(analysis_date, rows)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        
+        # Scoring settings travel with the data so a file can be rescored exactly as it was produced
+        settings = {"model_version": self.model_version, "score_weights": list(SCORE_WEIGHTS), **(metadata or {})}
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"stockpulse": json.dumps(settings, sort_keys=True).encode("utf-8")
+        })
+        
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(analysis_date)
+        temporary = f"{path}.tmp"
+        pq.write_table(table, temporary, compression="zstd")
+        os.replace(temporary, path)
+        return {"rows": len(frame), "path": path}
+    
+    def settings(self, analysis_date: date) -> Dict:
+        """Scoring settings stored with a date's file (weights, forecast_weight, model_version)"""
+        import pyarrow.parquet as pq
+        
+        metadata = pq.read_schema(self.path(analysis_date)).metadata or {}
+        return json.loads(metadata[b"stockpulse"]) if b"stockpulse" in metadata else {}
+    
+    def previous_rows(self, analysis_date: date, tickers: Sequence[str]) -> Dict[str, Dict]:
+        """Each ticker's row from the latest file before analysis_date, keyed by ticker"""
+        earlier = [d for d in self.dates() if d < analysis_date]
+        if not earlier or not tickers:
+            return {}
+        frame = self.load(earlier[-1], earlier[-1], tickers=tickers)
+        return {row['ticker']: row for row in frame.to_dict('records')}
+    
+    def dates(self) -> List[date]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            date.fromisoformat(name[:-len(".parquet")])
+            for name in os.listdir(self.directory)
+            if name.endswith(".parquet")
+        )
+    
+    def load(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        columns: Optional[Sequence[str]] = None,
+        tickers: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Feature rows for dates in [start, end] (the latest date when both are omitted)"""
+        available = self.dates()
+        if start is None and end is None:
+            selected = available[-1:]
+        else:
+            selected = [d for d in available if (start is None or d >= start) and (end is None or d <= end)]
+        
+        if columns is not None:
+            columns = list(dict.fromkeys(['analysis_date', 'ticker', *columns]))
+        filters = [('ticker', 'in', list(tickers))] if tickers else None
+        
+        frames = [pd.read_parquet(self.path(d), columns=columns, filters=filters) for d in selected]
+        if not frames:
+            return pd.DataFrame(columns=columns or [column for column, _ in FEATURE_COLUMNS])
+        return pd.concat(frames, ignore_index=True)
+
+feature_store: Optional[FeatureStore] = None
+
+def get_feature_store(model_version: str) -> FeatureStore:
+    """Get the process-wide feature store rooted at FEATURE_STORE_DIR"""
+    global feature_store
+    if feature_store is None or feature_store.model_version != model_version:
+        feature_store = FeatureStore(os.getenv("FEATURE_STORE_DIR", "data/features"), model_version)
+    return feature_store
@@ -0,0 +1,326 @@
+import os
+import time
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from app.utils.database import get_supabase, fetch_all_pages, upsert_in_chunks
+
+# Ridge autoregression on log returns: features are the last LAGS daily returns,
+# target is the cumulative return over the next `horizon` days.
+LAGS = 10
+RIDGE_ALPHA = 1e-4
+
+def _lagged_samples(closes: np.ndarray, horizon: int, skip: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Design matrix and targets for every complete sample after the first `skip`"""
+    returns = np.diff(np.log(closes))
+    n = len(returns) - horizon - LAGS + 1
+    if n <= skip:
+        return np.empty((0, LAGS)), np.empty(0)
+    
+    windows = np.lib.stride_tricks.sliding_window_view(returns, LAGS)[:n]
+    targets = np.convolve(returns[LAGS:], np.ones(horizon), mode='valid')[:n]
+    return windows[skip:], targets[skip:]
+
+def fit_ridge(closes: np.ndarray, dates: List[str], horizon: int, previous: Optional[Dict]) -> Dict:
+    """Fit the ridge AR model, warm-started from cached sufficient statistics"""
+    features = LAGS + 1
+    # Sample k's target ends on the close at index k + LAGS + horizon
+    sample_dates = dates[LAGS + horizon:]
+    
+    # X^T X and X^T y are cached with the model, so a refit only folds in samples whose
+    # target ends after the last trained date, wherever the closes passed in start
+    if previous and previous.get('samples_through'):
+        xtx = np.array(previous['xtx'])
+        xty = np.array(previous['xty'])
+        n_samples = previous.get('n_samples') or 0
+        skip = bisect_right(sample_dates, previous['samples_through'])
+        samples_through = previous['samples_through']
+    else:
+        xtx = np.zeros((features, features))
+        xty = np.zeros(features)
+        n_samples = 0
+        skip = 0
+        samples_through = None
+    
+    X, y = _lagged_samples(closes, horizon, skip=skip)
+    if len(X):
+        X = np.hstack([np.ones((len(X), 1)), X])
+        xtx += X.T @ X
+        xty += X.T @ y
+        samples_through = sample_dates[-1]
+    
+    coef = np.linalg.solve(xtx + RIDGE_ALPHA * np.eye(features), xty) if xtx[0, 0] > 0 else np.zeros(features)
+    
+    latest = np.diff(np.log(closes))[-LAGS:]
+    expected_return = float(np.expm1(coef[0] + latest @ coef[1:])) if len(latest) == LAGS else 0.0
+    
+    return {
+        "xtx": xtx.tolist(),
+        "xty": xty.tolist(),
+        "coef": coef.tolist(),
+        "n_samples": n_samples + len(X),
+        "samples_through": samples_through,
+        "expected_return": expected_return
+    }
+
+def fit_prophet(closes: np.ndarray, dates: List[str], horizon: int, previous: Optional[Dict]) -> Dict:
+    """Fit Prophet on log closes, warm-started from the previous fit's parameters"""
+    from prophet import Prophet
+    
+    df = pd.DataFrame({"ds": pd.to_datetime(dates), "y": np.log(closes)})
+    model = Prophet(daily_seasonality=False, yearly_seasonality=False)
+    
+    fit_kwargs = {}
+    if previous and previous.get('stan_init'):
+        fit_kwargs['init'] = {
+            name: np.array(value) if isinstance(value, list) else value
+            for name, value in previous['stan_init'].items()
+        }
+    model.fit(df, **fit_kwargs)
+    
+    future = model.make_future_dataframe(periods=horizon, freq='B', include_history=False)
+    forecast = model.predict(future)
+    expected_return = float(np.expm1(forecast['yhat'].iloc[-1] - df['y'].iloc[-1]))
+    
+    # Same shape Prophet expects for `init` on the next fit
+    stan_init = {name: float(model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+    stan_init.update({name: model.params[name][0].tolist() for name in ('delta', 'beta')})
+    
+    return {
+        "stan_init": stan_init,
+        "expected_return": expected_return
+    }
+
+def fit_job(job: Dict) -> Dict:
+    """Process-pool entry point: fit one ticker and report how long it took"""
+    started = time.perf_counter()
+    try:
+        closes = np.asarray(job['closes'], dtype=float)
+        if job['model'] == 'prophet':
+            params = fit_prophet(closes, job['dates'], job['horizon'], job.get('previous'))
+        else:
+            params = fit_ridge(closes, job['dates'], job['horizon'], job.get('previous'))
+        return {"stock_id": job['stock_id'], "params": params, "seconds": time.perf_counter() - started}
+    except Exception as e:
+        return {"stock_id": job['stock_id'], "error": str(e), "seconds": time.perf_counter() - started}
+
+class ForecastService:
+    """Per-ticker short-horizon return forecasts with cached, incrementally refit models"""
+    
+    def __init__(
+        self,
+        model: str = "ridge",
+        horizon: int = 5,
+        history_days: int = 365,
+        max_refits: int = 200,
+        workers: Optional[int] = None
+    ):
+        self.model = model
+        self.horizon = horizon
+        self.history_days = history_days
+        self.max_refits = max_refits
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.parallel_ridge = False
+        self.supabase = get_supabase()
+        # stock_id -> cached forecast_models row
+        self._models: Dict[int, Dict] = {}
+        self._by_ticker: Dict[str, Dict] = {}
+        self.loaded = False
+    
+    def load_cache(self):
+        rows = fetch_all_pages(
+            lambda: self.supabase.table('forecast_models').select('*, stocks(ticker)').eq('model', self.model).eq('horizon', self.horizon)
+        )
+        self._models = {row['stock_id']: row for row in rows}
+        self._by_ticker = {row['stocks']['ticker']: row for row in rows if row.get('stocks')}
+        self.loaded = True
+    
+    def get_expected_return(self, ticker: str) -> Optional[float]:
+        """Cached forecast of the cumulative return over the horizon, if the ticker has a model"""
+        if not self.loaded:
+            self.load_cache()
+        row = self._by_ticker.get(ticker)
+        return float(row['expected_return']) if row and row.get('expected_return') is not None else None
+    
+    def _stale_stocks(self) -> List[Tuple[int, str]]:
+        """Stocks whose latest bar is newer than the one their model was fitted on, most stale first"""
+        latest = fetch_all_pages(lambda: self.supabase.table('latest_price_dates').select('stock_id, last_date'))
+        stale = []
+        for row in latest:
+            cached = self._models.get(row['stock_id'])
+            fitted_through = cached['last_bar_date'] if cached else None
+            if fitted_through is None or fitted_through < row['last_date']:
+                stale.append((row['stock_id'], fitted_through or ''))
+        stale.sort(key=lambda item: item[1])
+        return stale
+    
+    def _warm_through(self, stock_id: int) -> Optional[str]:
+        """Last trained sample date of a ridge model that can be warm-started"""
+        cached = self._models.get(stock_id)
+        if self.model != 'ridge' or not cached:
+            return None
+        return (cached.get('params') or {}).get('samples_through')
+    
+    def _build_jobs(self, stock_ids: List[int]) -> List[Dict]:
+        """One fit job per stock over an expanding window from its first fitted bar"""
+        default_start = (datetime.now().date() - timedelta(days=self.history_days)).isoformat()
+        # Calendar days generously covering the LAGS + horizon bars a new sample looks back over
+        context_days = int((LAGS + self.horizon) * 7 / 5) + 10
+        starts = {}
+        for stock_id in stock_ids:
+            through = self._warm_through(stock_id)
+            if through:
+                # Warm ridge fits only need the bars after the last trained sample plus their lags
+                starts[stock_id] = (date.fromisoformat(through) - timedelta(days=context_days)).isoformat()
+            else:
+                starts[stock_id] = (self._models.get(stock_id) or {}).get('history_start') or default_start
+        since = min(starts.values())
+        
+        rows = fetch_all_pages(
+            lambda: self.supabase.table('stock_prices').select('stock_id, date, close').in_('stock_id', stock_ids).gte('date', since).order('stock_id').order('date')
+        )
+        
+        by_stock: Dict[int, List[Dict]] = {}
+        for row in rows:
+            if row['close'] is not None and row['date'] >= starts[row['stock_id']]:
+                by_stock.setdefault(row['stock_id'], []).append(row)
+        
+        jobs = []
+        for stock_id, bars in by_stock.items():
+            if len(bars) < LAGS + self.horizon + 2:
+                continue
+            
+            cached = self._models.get(stock_id)
+            if self._warm_through(stock_id):
+                previous = cached['params']
+                history_start = cached.get('history_start') or bars[0]['date']
+            else:
+                previous = cached['params'] if cached and cached.get('history_start') == bars[0]['date'] else None
+                history_start = bars[0]['date']
+            jobs.append({
+                "stock_id": stock_id,
+                "model": self.model,
+                "horizon": self.horizon,
+                "closes": [bar['close'] for bar in bars],
+                "dates": [bar['date'] for bar in bars],
+                "history_start": history_start,
+                "previous": previous
+            })
+        return jobs
+    
+    def run_jobs(self, jobs: List[Dict]) -> List[Dict]:
+        # Ridge fits take well under a millisecond, so pickling them to a pool costs more than it saves
+        if self.workers <= 1 or len(jobs) <= 1 or (self.model == 'ridge' and not self.parallel_ridge):
+            return [fit_job(job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(fit_job, jobs, chunksize=max(1, len(jobs) // (self.workers * 4))))
+    
+    def refresh(self, max_refits: Optional[int] = None) -> Dict:
+        """Refit models for stocks with new bars, at most max_refits per run"""
+        started = time.perf_counter()
+        self.load_cache()
+        
+        stale = self._stale_stocks()
+        selected = [stock_id for stock_id, _ in stale[:max_refits or self.max_refits]]
+        jobs = self._build_jobs(selected) if selected else []
+        results = self.run_jobs(jobs)
+        
+        rows = []
+        errors = 0
+        for job, result in zip(jobs, results):
+            if 'error' in result:
+                errors += 1
+                print(f"Error fitting forecast for stock {job['stock_id']}: {result['error']}")
+                continue
+            rows.append({
+                "stock_id": job['stock_id'],
+                "model": self.model,
+                "horizon": self.horizon,
+                "history_start": job['history_start'],
+                "last_bar_date": job['dates'][-1],
+                "params": result['params'],
+                "expected_return": result['params']['expected_return'],
+                "fitted_at": datetime.now().isoformat()
+            })
+        
+        if rows:
+            upsert_in_chunks('forecast_models', rows, on_conflict='stock_id')
+            self.load_cache()
+        
+        elapsed = time.perf_counter() - started
+        return {
+            "stale": len(stale),
+            "refit": len(rows),
+            "errors": errors,
+            "deferred": max(0, len(stale) - len(selected)),
+            "seconds": elapsed,
+            "fits_per_second": len(jobs) / elapsed if elapsed > 0 else 0.0
+        }
+
+forecast_service: Optional[ForecastService] = None
+
+def get_forecast_service() -> ForecastService:
+    """Get the process-wide forecast service, created on first use"""
+    global forecast_service
+    if forecast_service is None:
+        forecast_service = ForecastService(
+            model=os.getenv("FORECAST_MODEL", "ridge"),
+            max_refits=int(os.getenv("FORECAST_MAX_REFITS", "200"))
+        )
+    return forecast_service
+
+def benchmark(tickers: int = 500, bars: int = 250, new_bars: int = 1, model: str = "ridge", workers: int = 1) -> Dict:
+    """Fits per second on synthetic random walks, cold and warm-started"""
+    rng = np.random.default_rng(0)
+    paths = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (tickers, bars + new_bars)), axis=1))
+    dates = [d.date().isoformat() for d in pd.bdate_range('2023-01-02', periods=bars + new_bars)]
+    
+    service = ForecastService.__new__(ForecastService)
+    service.model = model
+    service.workers = workers
+    service.parallel_ridge = True
+    
+    def make_jobs(length: int, previous: Optional[List[Dict]] = None) -> List[Dict]:
+        return [
+            {
+                "stock_id": i,
+                "model": model,
+                "horizon": 5,
+                "closes": paths[i, :length].tolist(),
+                "dates": dates[:length],
+                "previous": previous[i]['params'] if previous else None
+            }
+            for i in range(tickers)
+        ]
+    
+    started = time.perf_counter()
+    cold = service.run_jobs(make_jobs(bars))
+    cold_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    service.run_jobs(make_jobs(bars + new_bars, cold))
+    warm_seconds = time.perf_counter() - started
+    
+    return {
+        "model": model,
+        "tickers": tickers,
+        "workers": workers,
+        "cold_fits_per_second": tickers / cold_seconds,
+        "warm_fits_per_second": tickers / warm_seconds
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    
+    parser = argparse.ArgumentParser(description="Benchmark forecast fits per second")
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=250)
+    parser.add_argument("--model", default="ridge", choices=["ridge", "prophet"])
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    
+    print(json.dumps(benchmark(args.tickers, args.bars, model=args.model, workers=args.workers), indent=2))
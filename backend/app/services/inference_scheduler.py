@@ -0,0 +1,111 @@
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+class BatchScheduler:
+    """Collects texts from concurrent callers into micro-batches for a batch scoring function"""
+    
+    # A batch is released once it reaches max_batch texts or max_wait after its first
+    # request, whichever comes first. Inference runs on a single worker thread, so
+    # requests arriving during a pass queue up for the next batch.
+    
+    def __init__(self, score_fn: Callable[[List[str], List[Optional[str]]], np.ndarray], max_batch: int = 32, max_wait_ms: float = 10.0):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        # (texts, headlines, future, arrival time) in arrival order
+        self._pending: List[Tuple[List[str], List[Optional[str]], asyncio.Future, float]] = []
+        self._pending_texts = 0
+        self._ready: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.texts = 0
+    
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._full = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def submit(self, texts: List[str], headlines: Optional[List[Optional[str]]] = None) -> np.ndarray:
+        """Score texts (and their optional headlines) as part of the next batch; returns this caller's rows of the result"""
+        if not texts:
+            return self.score_fn([], [])
+        
+        self._ensure_running()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        self._pending.append((list(texts), list(headlines) if headlines else [None] * len(texts), future, loop.time()))
+        self._pending_texts += len(texts)
+        
+        self._ready.set()
+        if self._pending_texts >= self.max_batch:
+            self._full.set()
+        
+        return await future
+    
+    def _take_batch(self) -> List[Tuple[List[str], List[Optional[str]], asyncio.Future]]:
+        """Whole requests up to max_batch texts (always at least one request)"""
+        batch = []
+        size = 0
+        while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch):
+            texts, headlines, future, _ = self._pending.pop(0)
+            # Callers that gave up waiting (cancelled on timeout) are dropped instead of scored
+            if future.cancelled():
+                self._pending_texts -= len(texts)
+                continue
+            batch.append((texts, headlines, future))
+            size += len(texts)
+        
+        self._pending_texts -= size
+        if not self._pending:
+            self._ready.clear()
+        if self._pending_texts < self.max_batch:
+            self._full.clear()
+        return batch
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            
+            # The window is measured from the oldest waiting request, not from when this pass started
+            remaining = self._pending[0][3] + self.max_wait - loop.time()
+            if self._pending_texts < self.max_batch and remaining > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+            
+            batch = self._take_batch()
+            if not batch:
+                continue
+            texts = [text for request, _, _ in batch for text in request]
+            headlines = [headline for _, request, _ in batch for headline in request]
+            try:
+                results = await loop.run_in_executor(self._executor, self.score_fn, texts, headlines)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for request, _, future in batch:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(request)])
+                offset += len(request)
+    
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "pending": self._pending_texts
+        }
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from app.utils.database import get_supabase, upsert_in_chunks
+
+# Supported bar intervals in seconds; 1m is the stored base resolution
+INTERVALS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "1h": 3600
+}
+
+BAR_FIELDS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+
+def empty_bars() -> Dict[str, np.ndarray]:
+    return {
+        "ts": np.empty(0, dtype=np.int64),
+        "open": np.empty(0, dtype=np.float32),
+        "high": np.empty(0, dtype=np.float32),
+        "low": np.empty(0, dtype=np.float32),
+        "close": np.empty(0, dtype=np.float32),
+        "volume": np.empty(0, dtype=np.int64)
+    }
+
+def resample_bars(bars: Dict[str, np.ndarray], interval: str) -> Dict[str, np.ndarray]:
+    """Aggregate columnar bars (ts in epoch seconds, ascending) into a coarser interval"""
+    if interval not in INTERVALS:
+        raise ValueError(f"Unsupported interval {interval}; expected one of {list(INTERVALS)}")
+    
+    ts = bars['ts']
+    if len(ts) == 0:
+        return empty_bars()
+    
+    seconds = INTERVALS[interval]
+    buckets = ts - ts % seconds
+    
+    # Start index of every bucket; bars are sorted so each bucket is contiguous
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    
+    return {
+        "ts": buckets[starts],
+        "open": bars['open'][starts],
+        "high": np.maximum.reduceat(bars['high'], starts),
+        "low": np.minimum.reduceat(bars['low'], starts),
+        "close": bars['close'][ends],
+        "volume": np.add.reduceat(bars['volume'], starts)
+    }
+
+def bars_to_frame(bars: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """DataFrame view of columnar bars for the indicator engine"""
+    df = pd.DataFrame({field: bars[field] for field in BAR_FIELDS if field != 'ts'})
+    df['date'] = pd.to_datetime(bars['ts'], unit='s', utc=True)
+    return df
+
+class TickBarBuilder:
+    """Streams ticks into 1-minute bars, emitting each bar once its minute has closed"""
+    
+    # Open bars live in this process's memory, so every tick of a ticker must reach the same
+    # builder: run the tick endpoint on a single worker (see DEVELOPMENT.md)
+    
+    def __init__(self, bar_seconds: int = 60):
+        self.bar_seconds = bar_seconds
+        # ticker -> [bucket, open, high, low, close, volume]
+        self._open_bars: Dict[str, List] = {}
+    
+    def add_tick(self, ticker: str, ts: float, price: float, size: int = 0) -> Optional[Dict]:
+        """Fold a tick into the ticker's open bar; returns the previous bar if this tick closed it"""
+        bucket = int(ts) - int(ts) % self.bar_seconds
+        current = self._open_bars.get(ticker)
+        
+        if current is None or bucket > current[0]:
+            self._open_bars[ticker] = [bucket, price, price, price, price, size]
+            return self._as_bar(ticker, current) if current is not None else None
+        
+        if bucket < current[0]:
+            # Late tick for an already-emitted bar; dropped rather than rewriting history
+            return None
+        
+        current[2] = max(current[2], price)
+        current[3] = min(current[3], price)
+        current[4] = price
+        current[5] += size
+        return None
+    
+    def flush(self, before: Optional[float] = None, ticker: Optional[str] = None) -> List[Dict]:
+        """Emit open bars whose minute ended before the given time (all bars when omitted)"""
+        closed = []
+        for open_ticker, current in list(self._open_bars.items()):
+            if ticker is not None and open_ticker != ticker:
+                continue
+            if before is None or current[0] + self.bar_seconds <= before:
+                closed.append(self._as_bar(open_ticker, current))
+                del self._open_bars[open_ticker]
+        return closed
+    
+    @staticmethod
+    def _as_bar(ticker: str, values: List) -> Dict:
+        bucket, open_, high, low, close, volume = values
+        return {
+            "ticker": ticker,
+            "ts": bucket,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume
+        }
+
+# Months whose intraday_bars partition is known to exist
+ensured_months: Set[str] = set()
+
+class IntradayStore:
+    """Reads and writes 1-minute bars in the time-partitioned intraday_bars table"""
+    
+    def __init__(self, page_size: int = 1000):
+        self.supabase = get_supabase()
+        self.page_size = page_size
+    
+    def ensure_partitions(self, timestamps: List[int]):
+        """Create the monthly partition for every month the bars fall in, once per process"""
+        for month in sorted({datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-01') for ts in timestamps}):
+            if month in ensured_months:
+                continue
+            # Without it the bars would land in the default partition and block the month's partition
+            self.supabase.rpc('create_intraday_partition', {'month_start': month}).execute()
+            ensured_months.add(month)
+    
+    def save_bars(self, stock_id: int, bars: List[Dict]) -> Dict[str, int]:
+        try:
+            self.ensure_partitions([bar['ts'] for bar in bars])
+        except Exception as e:
+            print(f"Error creating intraday partitions: {e}")
+        
+        rows = [
+            {
+                "stock_id": stock_id,
+                "ts": datetime.fromtimestamp(bar['ts'], tz=timezone.utc).isoformat(),
+                "open": bar['open'],
+                "high": bar['high'],
+                "low": bar['low'],
+                "close": bar['close'],
+                "volume": bar['volume']
+            }
+            for bar in bars
+        ]
+        return upsert_in_chunks('intraday_bars', rows, on_conflict='stock_id,ts')
+    
+    def load_bars(self, stock_id: int, since: datetime, until: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+        """Load 1-minute bars as columnar arrays, selecting only the OHLCV columns"""
+        rows = []
+        offset = 0
+        while True:
+            query = self.supabase.table('intraday_bars').select(
+                'ts, open, high, low, close, volume'
+            ).eq('stock_id', stock_id).gte('ts', since.isoformat())
+            
+            if until is not None:
+                query = query.lt('ts', until.isoformat())
+            
+            # PostgREST caps rows per response, so page through the range
+            page = query.order('ts').range(offset, offset + self.page_size - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+            offset += self.page_size
+        
+        if not rows:
+            return empty_bars()
+        
+        return {
+            "ts": np.fromiter(
+                (int(pd.Timestamp(row['ts']).timestamp()) for row in rows), dtype=np.int64, count=len(rows)
+            ),
+            "open": np.fromiter((row['open'] for row in rows), dtype=np.float32, count=len(rows)),
+            "high": np.fromiter((row['high'] for row in rows), dtype=np.float32, count=len(rows)),
+            "low": np.fromiter((row['low'] for row in rows), dtype=np.float32, count=len(rows)),
+            "close": np.fromiter((row['close'] for row in rows), dtype=np.float32, count=len(rows)),
+            "volume": np.fromiter((row['volume'] or 0 for row in rows), dtype=np.int64, count=len(rows))
+        }
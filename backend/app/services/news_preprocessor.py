@@ -0,0 +1,155 @@
+import hashlib
+import html
+import re
+import unicodedata
+import numpy as np
+from typing import Dict, List, Optional
+
+TAG_RE = re.compile(r'<[^>]+>')
+URL_RE = re.compile(r'https?://\S+')
+SPACE_RE = re.compile(r'\s+')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+SENTENCE_END_RE = re.compile(r'[.!?。]\s')
+
+class NewsPreprocessor:
+    """Normalize news text and collapse syndicated near-duplicates before scoring"""
+    
+    def __init__(
+        self,
+        max_tokens: int = 512,
+        words_per_token: float = 0.75,
+        shingle_size: int = 3,
+        num_perm: int = 64,
+        bands: int = 16,
+        similarity_threshold: float = 0.7,
+        seed: int = 42
+    ):
+        self.max_tokens = max_tokens
+        self.words_per_token = words_per_token
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.similarity_threshold = similarity_threshold
+        
+        rng = np.random.default_rng(seed)
+        self._perm_a = rng.integers(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+        self._perm_b = rng.integers(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+    
+    def normalize(self, text: str) -> str:
+        """Strip markup, URLs and redundant whitespace"""
+        if not text:
+            return ''
+        text = html.unescape(text)
+        text = TAG_RE.sub(' ', text)
+        text = URL_RE.sub(' ', text)
+        text = unicodedata.normalize('NFKC', text)
+        return SPACE_RE.sub(' ', text).strip()
+    
+    def truncate(self, text: str, max_tokens: Optional[int] = None) -> str:
+        """Cut text to the approximate token budget, preferring a sentence boundary"""
+        max_tokens = max_tokens or self.max_tokens
+        max_words = int(max_tokens * self.words_per_token)
+        words = text.split(' ')
+        if len(words) <= max_words:
+            return text
+        
+        clipped = ' '.join(words[:max_words])
+        
+        # Back off to the last full sentence if it keeps most of the budget
+        boundary = None
+        for match in SENTENCE_END_RE.finditer(clipped):
+            boundary = match.end()
+        if boundary and boundary > len(clipped) * 0.6:
+            return clipped[:boundary].strip()
+        
+        return clipped
+    
+    def prepare_text(self, news: Dict) -> str:
+        """Build the normalized, budget-truncated text for a news row"""
+        text = self.normalize(news.get('headline', ''))
+        if news.get('content'):
+            content = self.normalize(news['content'])
+            # Syndicated content often repeats the headline as its first line
+            if content.startswith(text):
+                content = content[len(text):].strip()
+            text = f"{text} {content}" if content else text
+        return self.truncate(text)
+    
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        """Stable 64-bit hashes of the word shingles in a text"""
+        words = WORD_RE.findall(text.lower())
+        if not words:
+            return np.zeros(0, dtype=np.uint64)
+        
+        size = min(self.shingle_size, len(words))
+        shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        return np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+    
+    def minhash(self, text: str) -> np.ndarray:
+        """MinHash signature using multiply-shift permutations of the shingle hashes"""
+        hashes = self._shingle_hashes(text)
+        if len(hashes) == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        
+        # uint64 arithmetic wraps, which is exactly what multiply-shift hashing needs
+        with np.errstate(over='ignore'):
+            permuted = (hashes[:, None] * self._perm_a + self._perm_b) >> np.uint64(32)
+        return permuted.min(axis=0)
+    
+    def cluster(self, signatures: List[np.ndarray]) -> List[List[int]]:
+        """Group indices whose estimated Jaccard similarity reaches the threshold"""
+        parent = list(range(len(signatures)))
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        # LSH banding: only articles sharing a whole band are compared
+        for band in range(self.bands):
+            start = band * self.rows_per_band
+            buckets: Dict[bytes, List[int]] = {}
+            for index, signature in enumerate(signatures):
+                key = signature[start:start + self.rows_per_band].tobytes()
+                buckets.setdefault(key, []).append(index)
+            
+            for members in buckets.values():
+                for i in range(len(members)):
+                    for j in range(i + 1, len(members)):
+                        a, b = members[i], members[j]
+                        root_a, root_b = find(a), find(b)
+                        if root_a == root_b:
+                            continue
+                        similarity = float(np.mean(signatures[a] == signatures[b]))
+                        if similarity >= self.similarity_threshold:
+                            # Keep the lowest index (most recent article) as the root
+                            parent[max(root_a, root_b)] = min(root_a, root_b)
+        
+        clusters: Dict[int, List[int]] = {}
+        for index in range(len(signatures)):
+            clusters.setdefault(find(index), []).append(index)
+        return sorted(clusters.values(), key=lambda members: members[0])
+    
+    def preprocess(self, news_data: List[Dict]) -> List[Dict]:
+        """Return one entry per near-duplicate cluster, in the input order of its representative"""
+        texts = [self.prepare_text(news) for news in news_data]
+        signatures = [self.minhash(text) for text in texts]
+        
+        results = []
+        for members in self.cluster(signatures):
+            representative = members[0]
+            results.append({
+                "text": texts[representative],
+                "headline": self.normalize(news_data[representative].get('headline', '')),
+                "news": news_data[representative],
+                "members": members,
+                "duplicate_count": len(members),
+                "sources": sorted({news_data[i].get('source') or '' for i in members} - {''})
+            })
+        return results
@@ -0,0 +1,249 @@
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+from app.utils.database import get_supabase, fetch_all_pages, upsert_in_chunks
+from app.services.analysis_cache import get_analysis_cache
+from app.services.price_store import get_price_store
+
+PRICE_FIELDS = ('date', 'open', 'high', 'low', 'close', 'volume', 'adjusted_close')
+
+class PriceProvider(ABC):
+    """Source of daily OHLCV bars; fetch is blocking and runs on a worker thread"""
+    
+    name = "base"
+    
+    def symbols(self, ticker: str, market: Optional[str]) -> List[str]:
+        """Provider symbols to try for a stock, in order; each is one request"""
+        return [ticker]
+    
+    def resolved(self, ticker: str, symbol: str):
+        """Called with the symbol that returned bars for a stock"""
+    
+    @abstractmethod
+    def fetch(self, symbol: str, start: date, end: date) -> List[Dict]:
+        """Daily bars for start <= date <= end as dicts with PRICE_FIELDS, oldest first"""
+
+# Stock ticker -> Yahoo symbol that returned data. Module level so every collector in the
+# process (one per POST /api/stocks/collect) skips re-probing KR suffixes.
+yahoo_symbols: Dict[str, str] = {}
+
+class YFinanceProvider(PriceProvider):
+    name = "yfinance"
+    
+    # Yahoo lists Korean stocks under KOSPI (.KS) or KOSDAQ (.KQ) suffixes
+    KR_SUFFIXES = ('.KS', '.KQ')
+    
+    def symbols(self, ticker: str, market: Optional[str]) -> List[str]:
+        if ticker in yahoo_symbols:
+            return [yahoo_symbols[ticker]]
+        if market == 'KR' and '.' not in ticker:
+            return [ticker + suffix for suffix in self.KR_SUFFIXES]
+        return [ticker]
+    
+    def resolved(self, ticker: str, symbol: str):
+        yahoo_symbols[ticker] = symbol
+    
+    def fetch(self, symbol: str, start: date, end: date) -> List[Dict]:
+        import yfinance as yf
+        
+        # yfinance treats `end` as exclusive
+        history = yf.Ticker(symbol).history(
+            start=start.isoformat(), end=(end + timedelta(days=1)).isoformat(), interval='1d', auto_adjust=False
+        )
+        if history is None or history.empty:
+            return []
+        
+        history = history.rename(columns={
+            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume', 'Adj Close': 'adjusted_close'
+        })
+        history['date'] = pd.to_datetime(history.index).date
+        if 'adjusted_close' not in history:
+            history['adjusted_close'] = history['close']
+        return _frame_to_bars(history, start, end)
+
+class FileProvider(PriceProvider):
+    """Reads <directory>/<TICKER>.csv (date, open, high, low, close, volume[, adjusted_close]) for offline runs"""
+    
+    name = "file"
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    def fetch(self, symbol: str, start: date, end: date) -> List[Dict]:
+        path = os.path.join(self.directory, f"{symbol}.csv")
+        if not os.path.exists(path):
+            return []
+        
+        df = pd.read_csv(path)
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        if 'adjusted_close' not in df:
+            df['adjusted_close'] = df['close']
+        return _frame_to_bars(df, start, end)
+
+def _frame_to_bars(df: pd.DataFrame, start: date, end: date) -> List[Dict]:
+    df = df[(df['date'] >= start) & (df['date'] <= end)].dropna(subset=['close']).sort_values('date')
+    bars = []
+    for row in df[list(PRICE_FIELDS)].itertuples(index=False):
+        bars.append({
+            "date": row.date.isoformat(),
+            "open": float(row.open),
+            "high": float(row.high),
+            "low": float(row.low),
+            "close": float(row.close),
+            "volume": int(row.volume) if pd.notna(row.volume) else 0,
+            "adjusted_close": float(row.adjusted_close)
+        })
+    return bars
+
+def get_price_provider(name: Optional[str] = None) -> PriceProvider:
+    """Provider from PRICE_PROVIDER (yfinance or file; file reads PRICE_FIXTURE_DIR)"""
+    name = name or os.getenv("PRICE_PROVIDER", "yfinance")
+    if name == "file":
+        return FileProvider(os.getenv("PRICE_FIXTURE_DIR", "fixtures/prices"))
+    if name == "yfinance":
+        return YFinanceProvider()
+    raise ValueError(f"Unknown price provider {name!r}")
+
+class RateLimiter:
+    """Token bucket shared by all concurrent fetches"""
+    
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class PriceCollector:
+    """Backfills each stock's price gap since its latest stored bar, fetching symbols concurrently"""
+    
+    def __init__(
+        self,
+        provider: Optional[PriceProvider] = None,
+        concurrency: int = 8,
+        rate_per_second: float = 5.0,
+        history_days: int = 365,
+        write_batch_size: int = 2000
+    ):
+        self.provider = provider or get_price_provider()
+        self.concurrency = concurrency
+        self.rate_limiter = RateLimiter(rate_per_second, burst=concurrency)
+        self.history_days = history_days
+        self.write_batch_size = write_batch_size
+        self.supabase = get_supabase()
+    
+    def _plan(self, tickers: Optional[Sequence[str]], end: date) -> List[Dict]:
+        """Stocks to fetch with the first missing date for each"""
+        query = self.supabase.table('stocks').select('id, ticker, market')
+        if tickers:
+            query = query.in_('ticker', list(tickers))
+        stocks = query.execute().data or []
+        
+        latest = {
+            row['stock_id']: date.fromisoformat(row['last_date'])
+            for row in fetch_all_pages(lambda: self.supabase.table('latest_price_dates').select('stock_id, last_date'))
+        }
+        
+        default_start = end - timedelta(days=self.history_days)
+        plan = []
+        for stock in stocks:
+            last = latest.get(stock['id'])
+            start = last + timedelta(days=1) if last else default_start
+            if start <= end:
+                plan.append({"stock_id": stock['id'], "ticker": stock['ticker'], "market": stock.get('market'), "start": start})
+        return plan
+    
+    async def collect(self, tickers: Optional[Sequence[str]] = None, end: Optional[date] = None) -> Dict:
+        """Fetch and store missing bars; returns counts and timing for the run"""
+        started = time.perf_counter()
+        end = end or datetime.now().date()
+        plan = self._plan(tickers, end)
+        
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        buffer: List[Dict] = []
+        updated_tickers = set()
+        summary = {"stocks": len(plan), "fetched": 0, "rows": 0, "saved": 0, "failed": 0, "errors": 0}
+        
+        async def flush():
+            if not buffer:
+                return
+            # Swap the buffer out on the event loop so fetches finishing during the write start a new one
+            rows = buffer[:]
+            buffer.clear()
+            # Blocking write; other fetches keep running on their threads meanwhile
+            result = await loop.run_in_executor(
+                None, lambda: upsert_in_chunks('stock_prices', rows, on_conflict='stock_id,date')
+            )
+            summary['saved'] += result['saved']
+            summary['failed'] += result['failed']
+        
+        async def fetch_one(item: Dict):
+            async with semaphore:
+                bars = []
+                for symbol in self.provider.symbols(item['ticker'], item['market']):
+                    # One token per provider request, including every symbol probed
+                    await self.rate_limiter.acquire()
+                    try:
+                        bars = await loop.run_in_executor(None, self.provider.fetch, symbol, item['start'], end)
+                    except Exception as e:
+                        summary['errors'] += 1
+                        print(f"Error fetching prices for {item['ticker']} ({symbol}): {e}")
+                        return
+                    if bars:
+                        self.provider.resolved(item['ticker'], symbol)
+                        break
+            
+            summary['fetched'] += 1
+            if not bars:
+                return
+            
+            buffer.extend({"stock_id": item['stock_id'], **bar} for bar in bars)
+            summary['rows'] += len(bars)
+            updated_tickers.add(item['ticker'])
+            get_price_store().append_bars(item['ticker'], bars)
+            if len(buffer) >= self.write_batch_size:
+                await flush()
+        
+        await asyncio.gather(*(fetch_one(item) for item in plan))
+        await flush()
+        
+        # New bars move each ticker's analysis watermark
+        cache = get_analysis_cache()
+        for ticker in updated_tickers:
+            cache.bump(ticker)
+        
+        summary['seconds'] = time.perf_counter() - started
+        return summary
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Backfill daily prices for every stock since its latest stored bar")
+    parser.add_argument("--provider", choices=["yfinance", "file"], default=None)
+    parser.add_argument("--tickers", default=None, help="Comma-separated subset of tickers")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5.0, help="Provider requests per second")
+    args = parser.parse_args()
+    
+    collector = PriceCollector(get_price_provider(args.provider), concurrency=args.concurrency, rate_per_second=args.rate)
+    tickers = [t.strip() for t in args.tickers.split(',') if t.strip()] if args.tickers else None
+    print(json.dumps(asyncio.run(collector.collect(tickers)), indent=2))
@@ -0,0 +1,215 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from app.utils.database import get_supabase
+from app.services.analysis_cache import get_analysis_cache
+from app.services.technical_analyzer import TechnicalAnalyzer
+
+EPOCH = date(1970, 1, 1)
+
+def to_day(value) -> int:
+    """Days since the epoch for a date or ISO date string"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return (value - EPOCH).days
+
+class PriceRing:
+    """Fixed-capacity daily OHLCV history for one ticker"""
+    
+    # Every bar is written twice, at i and i + capacity, so the latest n <= capacity
+    # bars are always one contiguous slice and windows are views, never copies.
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.day = np.zeros(2 * capacity, dtype=np.int32)
+        self.open = np.zeros(2 * capacity, dtype=np.float32)
+        self.high = np.zeros(2 * capacity, dtype=np.float32)
+        self.low = np.zeros(2 * capacity, dtype=np.float32)
+        self.close = np.zeros(2 * capacity, dtype=np.float32)
+        self.volume = np.zeros(2 * capacity, dtype=np.int64)
+        self.total = 0
+        # First day the ring holds complete history from (older days may exist only in the database)
+        self.complete_from = 0
+    
+    @property
+    def count(self) -> int:
+        return min(self.total, self.capacity)
+    
+    @property
+    def last_day(self) -> Optional[int]:
+        return int(self.day[(self.total - 1) % self.capacity]) if self.total else None
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.day, self.open, self.high, self.low, self.close, self.volume))
+    
+    def _write(self, position: int, day: int, bar: Dict):
+        for i in (position, position + self.capacity):
+            self.day[i] = day
+            self.open[i] = bar['open'] or 0
+            self.high[i] = bar['high'] or 0
+            self.low[i] = bar['low'] or 0
+            self.close[i] = bar['close'] or 0
+            self.volume[i] = bar.get('volume') or 0
+    
+    def append(self, bar: Dict) -> bool:
+        """Append a bar (or replace the latest one for the same day); False if it is older than the latest"""
+        day = to_day(bar['date'])
+        last = self.last_day
+        if last is not None and day < last:
+            return False
+        if last is not None and day == last:
+            self._write((self.total - 1) % self.capacity, day, bar)
+            return True
+        
+        self._write(self.total % self.capacity, day, bar)
+        self.total += 1
+        if self.total > self.capacity:
+            self.complete_from = int(self.day[self.total % self.capacity])
+        return True
+    
+    def window(self, start_day: Optional[int] = None, end_day: Optional[int] = None, bars: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Read-only views of the bars in [start_day, end_day], or of the last `bars` bars up to end_day"""
+        count = self.count
+        start = (self.total - count) % self.capacity
+        days = self.day[start:start + count]
+        
+        hi = count if end_day is None else int(np.searchsorted(days, end_day, side='right'))
+        if bars is not None:
+            lo = max(0, hi - bars)
+        else:
+            lo = 0 if start_day is None else int(np.searchsorted(days, start_day, side='left'))
+        
+        views = {}
+        for name in ('day', 'open', 'high', 'low', 'close', 'volume'):
+            view = getattr(self, name)[start + lo:start + hi]
+            view.flags.writeable = False
+            views[name] = view
+        return views
+
+class PriceStore:
+    """Resident per-ticker price rings for the API process, loaded on first use and fed by ingestion"""
+    
+    def __init__(self, capacity: int = 180):
+        self.capacity = capacity
+        self.supabase = get_supabase()
+        self._rings: Dict[str, PriceRing] = {}
+        self._stock_ids: Dict[str, int] = {}
+        # Monotonic time each ring last re-read its newest day from the database
+        self._refreshed: Dict[str, float] = {}
+    
+    def _stock_id(self, ticker: str) -> Optional[int]:
+        if ticker not in self._stock_ids:
+            response = self.supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+            if not response.data:
+                return None
+            self._stock_ids[ticker] = response.data[0]['id']
+        return self._stock_ids[ticker]
+    
+    def _fetch(self, stock_id: int, since: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        query = self.supabase.table('stock_prices').select('date, open, high, low, close, volume').eq('stock_id', stock_id)
+        if since is not None:
+            query = query.gte('date', (EPOCH + timedelta(days=since)).isoformat())
+        rows = query.order('date', desc=True).limit(limit or self.capacity).execute().data or []
+        return rows[::-1]
+    
+    def _load(self, ticker: str) -> Optional[PriceRing]:
+        stock_id = self._stock_id(ticker)
+        if stock_id is None:
+            return None
+        
+        rows = self._fetch(stock_id)
+        ring = PriceRing(self.capacity)
+        for row in rows:
+            ring.append(row)
+        # A full ring may be missing older history; a partial one holds everything there is
+        ring.complete_from = to_day(rows[0]['date']) if len(rows) >= self.capacity else 0
+        self._rings[ticker] = ring
+        self._refreshed[ticker] = time.monotonic()
+        return ring
+    
+    def get_ring(self, ticker: str) -> Optional[PriceRing]:
+        """The ticker's ring, loaded on first use and topped up when the price watermark moved past it or its TTL expired"""
+        ring = self._rings.get(ticker)
+        if ring is None:
+            return self._load(ticker)
+        
+        cache = get_analysis_cache()
+        watermark_date = cache.get_watermark(ticker)[0]
+        moved = watermark_date and (ring.last_day is None or to_day(watermark_date) > ring.last_day)
+        # The collector re-upserts the current day's bar through the session, so the newest
+        # day is re-read (and replaced in place) even when the date has not advanced
+        expired = time.monotonic() - self._refreshed.get(ticker, 0.0) >= cache.watermark_ttl
+        if moved or expired:
+            self._refreshed[ticker] = time.monotonic()
+            rows = self._fetch(self._stock_ids[ticker], since=ring.last_day)
+            if len(rows) >= self.capacity:
+                # The gap is at least a full ring; a fresh load is the same query
+                return self._load(ticker)
+            for row in rows:
+                ring.append(row)
+        return ring
+    
+    def append_bars(self, ticker: str, bars: List[Dict]):
+        """Feed newly ingested bars to a resident ring (tickers not loaded yet are read on first use)"""
+        ring = self._rings.get(ticker)
+        if ring is None:
+            return
+        for bar in sorted(bars, key=lambda b: str(b['date'])):
+            if not ring.append(bar):
+                # A backfilled older bar cannot be placed in the ring; reload it on next use
+                self._rings.pop(ticker, None)
+                return
+    
+    def get_window(self, ticker: str, start: Optional[date] = None, end: Optional[date] = None, bars: Optional[int] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Views over the requested range, or None when the ring cannot answer it (no data or older than held)"""
+        ring = self.get_ring(ticker)
+        if ring is None or ring.count == 0:
+            return None
+        
+        start_day = to_day(start) if start else None
+        end_day = to_day(end) if end else None
+        window = ring.window(start_day, end_day, bars)
+        
+        if ring.complete_from:
+            if start_day is not None and start_day < ring.complete_from:
+                return None
+            if bars is not None and len(window['day']) < bars:
+                return None
+        return window
+    
+    def get_frame(self, ticker: str, start: Optional[date] = None, end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """DataFrame over the ring views, shaped like AnalysisService.get_stock_data"""
+        window = self.get_window(ticker, start, end)
+        if window is None or len(window['day']) == 0:
+            return None
+        
+        return pd.DataFrame({
+            "date": pd.to_datetime(window['day'], unit='D'),
+            "open": pd.Series(window['open'], copy=False),
+            "high": pd.Series(window['high'], copy=False),
+            "low": pd.Series(window['low'], copy=False),
+            "close": pd.Series(window['close'], copy=False),
+            "volume": pd.Series(window['volume'], copy=False)
+        }, copy=False)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tickers": len(self._rings),
+            "capacity": self.capacity,
+            "bytes": sum(ring.nbytes for ring in self._rings.values())
+        }
+
+price_store: Optional[PriceStore] = None
+
+def get_price_store() -> PriceStore:
+    """Get the process-wide price store, created on first use"""
+    global price_store
+    if price_store is None:
+        # Sized to the longest indicator lookback unless overridden
+        capacity = os.getenv("PRICE_STORE_CAPACITY")
+        price_store = PriceStore(capacity=int(capacity) if capacity else TechnicalAnalyzer().lookback_days())
+    return price_store
@@ -0,0 +1,77 @@
+import numpy as np
+from datetime import date
+from typing import Dict, List, Optional
+from app.utils.database import get_supabase, upsert_in_chunks
+
+ROLLUP_LEVELS = ('sector', 'industry', 'market')
+SCORE_FIELDS = ('momentum_score', 'sentiment_score', 'volume_score', 'technical_score', 'final_score')
+
+class RollupService:
+    """Sector, industry and market averages of the daily per-ticker scores"""
+    
+    def __init__(self, model_version: str):
+        self.model_version = model_version
+        self.supabase = get_supabase()
+    
+    @staticmethod
+    def compute(rows: List[Dict]) -> List[Dict]:
+        """Group rows (one per ticker with sector/industry/market and SCORE_FIELDS) at every level"""
+        if not rows:
+            return []
+        
+        scores = np.array([[row[field] for field in SCORE_FIELDS] for row in rows], dtype=np.float64)
+        final = scores[:, SCORE_FIELDS.index('final_score')]
+        
+        rollups = []
+        for level in ROLLUP_LEVELS:
+            keys = np.array([row.get(level) or 'Unknown' for row in rows])
+            groups, inverse = np.unique(keys, return_inverse=True)
+            
+            # One scatter-add per statistic covers every group at once
+            counts = np.bincount(inverse, minlength=len(groups)).astype(np.float64)
+            sums = np.zeros((len(groups), len(SCORE_FIELDS)))
+            np.add.at(sums, inverse, scores)
+            means = sums / counts[:, None]
+            
+            final_sq = np.bincount(inverse, weights=final * final, minlength=len(groups))
+            final_std = np.sqrt(np.maximum(final_sq / counts - means[:, -1] ** 2, 0))
+            buys = np.bincount(inverse, weights=(final >= 0.7).astype(np.float64), minlength=len(groups))
+            sells = np.bincount(inverse, weights=(final < 0.4).astype(np.float64), minlength=len(groups))
+            
+            for g, group in enumerate(groups.tolist()):
+                rollup = {
+                    "level": level,
+                    "group_key": group,
+                    "stock_count": int(counts[g]),
+                    "final_score_std": float(final_std[g]),
+                    "buy_count": int(buys[g]),
+                    "sell_count": int(sells[g])
+                }
+                rollup.update({f"avg_{field}": float(means[g, j]) for j, field in enumerate(SCORE_FIELDS)})
+                rollups.append(rollup)
+        
+        return rollups
+    
+    def save(self, analysis_date: date, rollups: List[Dict]) -> Dict[str, int]:
+        rows = [
+            {**rollup, "analysis_date": analysis_date.isoformat(), "model_version": self.model_version}
+            for rollup in rollups
+        ]
+        return upsert_in_chunks('score_rollups', rows, on_conflict='analysis_date,level,group_key,model_version')
+    
+    def load(self, level: str, analysis_date: Optional[date] = None) -> List[Dict]:
+        """Rollups for a level on a date (the latest stored date when omitted), best final score first"""
+        if level not in ROLLUP_LEVELS:
+            raise ValueError(f"Unsupported level {level}; expected one of {list(ROLLUP_LEVELS)}")
+        
+        query = self.supabase.table('score_rollups').select('*').eq('level', level).eq('model_version', self.model_version)
+        
+        if analysis_date is None:
+            latest = query.order('analysis_date', desc=True).limit(1).execute().data
+            if not latest:
+                return []
+            analysis_date = date.fromisoformat(latest[0]['analysis_date'])
+            query = self.supabase.table('score_rollups').select('*').eq('level', level).eq('model_version', self.model_version)
+        
+        response = query.eq('analysis_date', analysis_date.isoformat()).order('avg_final_score', desc=True).execute()
+        return response.data or []
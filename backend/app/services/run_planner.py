@@ -0,0 +1,98 @@
+import os
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from app.utils.database import get_supabase, fetch_all_pages, upsert_in_chunks
+from app.services.sentiment_aggregator import parse_timestamp
+
+class RunPlanner:
+    """Decides which tickers the daily run re-analyzes and which carry yesterday's result forward"""
+    
+    def __init__(
+        self,
+        model_version: str,
+        budget: Optional[int] = None,
+        spike_z: float = 3.0,
+        max_carry_days: int = 5
+    ):
+        self.model_version = model_version
+        # Most tickers re-analyzed per run; None means every changed ticker
+        self.budget = budget
+        self.spike_z = spike_z
+        # Sentiment decays with time, so even a quiet ticker is refreshed after this many days
+        self.max_carry_days = max_carry_days
+        self.supabase = get_supabase()
+    
+    def _priority(self, activity: Dict, state: Optional[Dict], run_date: date) -> Optional[float]:
+        """Expected impact of re-analyzing a ticker; None when nothing changed since its last analysis"""
+        if state is None or state.get('model_version') != self.model_version:
+            return float('inf')
+        
+        age = max(0, (run_date - date.fromisoformat(state['analyzed_date'])).days)
+        
+        new_prices = bool(activity.get('last_price_date')) and activity['last_price_date'] > (state.get('price_watermark') or '')
+        new_news = bool(activity.get('last_news_at')) and (
+            not state.get('news_watermark') or parse_timestamp(activity['last_news_at']) > parse_timestamp(state['news_watermark'])
+        )
+        if not (new_prices or new_news or age >= self.max_carry_days):
+            return None
+        
+        # News and unusual moves shift scores far more than a routine new bar
+        move_z = float(activity.get('move_z') or 0.0) if new_prices else 0.0
+        return 3.0 * new_news + 1.0 * new_prices + (move_z if move_z >= self.spike_z else 0.0) + 0.5 * age
+    
+    def plan(self, stocks: List[Dict], run_date: date) -> Dict:
+        """Split stocks into those to analyze (highest expected impact first) and those to carry forward"""
+        activity = {row['stock_id']: row for row in fetch_all_pages(lambda: self.supabase.table('ticker_activity').select('*').order('stock_id'))}
+        states = {row['stock_id']: row for row in fetch_all_pages(lambda: self.supabase.table('ticker_run_state').select('*'))}
+        
+        candidates = []
+        carried = []
+        for stock in stocks:
+            state = states.get(stock['id'])
+            priority = self._priority(activity.get(stock['id'], {}), state, run_date)
+            if priority is None:
+                carried.append({"stock": stock, "result": state['result']})
+            else:
+                candidates.append((priority, stock))
+        
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        budget = len(candidates) if self.budget is None else self.budget
+        selected = [stock for _, stock in candidates[:budget]]
+        
+        # Over-budget tickers keep their previous result today and gain priority with age
+        deferred = []
+        for _, stock in candidates[budget:]:
+            state = states.get(stock['id'])
+            if state is not None:
+                carried.append({"stock": stock, "result": state['result']})
+            deferred.append(stock)
+        
+        return {
+            "analyze": selected,
+            "carried": carried,
+            "deferred": deferred,
+            "activity": activity
+        }
+    
+    def record(self, run_date: date, analyzed: List[Dict], activity: Dict[int, Dict]) -> Dict[str, int]:
+        """Save what each analyzed ticker's result was based on; analyzed holds {stock, result} entries"""
+        rows = []
+        for entry in analyzed:
+            seen = activity.get(entry['stock']['id'], {})
+            rows.append({
+                "stock_id": entry['stock']['id'],
+                "analyzed_date": run_date.isoformat(),
+                "price_watermark": seen.get('last_price_date'),
+                "news_watermark": seen.get('last_news_at'),
+                "model_version": self.model_version,
+                "result": entry['result'],
+                "updated_at": datetime.now().isoformat()
+            })
+        if not rows:
+            return {"saved": 0, "failed": 0, "chunks": 0}
+        return upsert_in_chunks('ticker_run_state', rows, on_conflict='stock_id')
+
+def load_run_budget() -> Optional[int]:
+    """Per-run analysis budget from DAILY_ANALYSIS_BUDGET (unset or 0 means no limit)"""
+    raw = os.getenv("DAILY_ANALYSIS_BUDGET")
+    return int(raw) if raw and int(raw) > 0 else None
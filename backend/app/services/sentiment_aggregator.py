@@ -0,0 +1,117 @@
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from app.utils.database import get_supabase
+
+def parse_timestamp(value) -> datetime:
+    """Parse a PostgREST timestamp into an aware UTC datetime"""
+    if isinstance(value, datetime):
+        timestamp = value
+    else:
+        timestamp = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+class SentimentAggregator:
+    """Per-ticker exponentially time-decayed sentiment, maintained incrementally"""
+    
+    def __init__(self, half_life_hours: float = 48.0, window_days: int = 7):
+        self.half_life_hours = half_life_hours
+        self.window_days = window_days
+        self.decay_rate = np.log(2) / (half_life_hours * 3600)
+        self.supabase = get_supabase()
+    
+    @property
+    def window(self) -> timedelta:
+        return timedelta(days=self.window_days)
+    
+    def empty_state(self, stock_id: int, now: datetime) -> Dict:
+        return {
+            "stock_id": stock_id,
+            "weighted_sentiment_sum": 0.0,
+            "weighted_confidence_sum": 0.0,
+            "weight_sum": 0.0,
+            "article_count": 0,
+            "half_life_hours": self.half_life_hours,
+            "window_days": self.window_days,
+            "last_published_at": None,
+            "as_of": now.isoformat()
+        }
+    
+    def load(self, stock_id: int) -> Optional[Dict]:
+        """Fetch the stored aggregate, ignoring it if it was built with different decay settings"""
+        response = self.supabase.table('sentiment_aggregates').select('*').eq('stock_id', stock_id).execute()
+        if not response.data:
+            return None
+        
+        state = response.data[0]
+        if float(state['half_life_hours']) != self.half_life_hours or int(state['window_days']) != self.window_days:
+            return None
+        return state
+    
+    def save(self, state: Dict, added: List[Dict]) -> None:
+        """Store the aggregate and the base weights of the articles just folded in, in one transaction"""
+        weights = [{"article_id": a['id'], "aggregate_weight": a['aggregate_weight']} for a in added]
+        self.supabase.rpc('save_sentiment_aggregate', {'aggregate': state, 'weights': weights}).execute()
+    
+    def _contributions(self, articles: List[Dict], now: datetime) -> Tuple[float, float, float]:
+        """Decayed (sentiment, confidence, weight) sums of a set of articles at time now"""
+        if not articles:
+            return 0.0, 0.0, 0.0
+        
+        ages = np.array([(now - parse_timestamp(a['published_at'])).total_seconds() for a in articles])
+        base = np.array([a['aggregate_weight'] for a in articles], dtype=float)
+        sentiment = np.array([a['sentiment'] for a in articles], dtype=float)
+        confidence = np.array([a['confidence'] for a in articles], dtype=float)
+        
+        weights = base * np.exp(-self.decay_rate * np.maximum(ages, 0))
+        return float(weights @ sentiment), float(weights @ confidence), float(weights.sum())
+    
+    def advance(self, state: Dict, now: datetime, added: List[Dict], expired: List[Dict]) -> Dict:
+        """Decay the running sums to now, add new articles and subtract ones that left the window"""
+        elapsed = max((now - parse_timestamp(state['as_of'])).total_seconds(), 0)
+        decay = float(np.exp(-self.decay_rate * elapsed))
+        
+        add_s, add_c, add_w = self._contributions(added, now)
+        exp_s, exp_c, exp_w = self._contributions(expired, now)
+        
+        article_count = int(state['article_count']) + len(added) - len(expired)
+        weight_sum = float(state['weight_sum']) * decay + add_w - exp_w
+        
+        # Guard against float drift once everything has expired
+        if article_count <= 0 or weight_sum <= 1e-12:
+            new_state = self.empty_state(state['stock_id'], now)
+        else:
+            new_state = dict(state)
+            new_state.update({
+                "weighted_sentiment_sum": float(state['weighted_sentiment_sum']) * decay + add_s - exp_s,
+                "weighted_confidence_sum": float(state['weighted_confidence_sum']) * decay + add_c - exp_c,
+                "weight_sum": weight_sum,
+                "article_count": article_count,
+                "as_of": now.isoformat()
+            })
+        
+        if added:
+            latest = max(parse_timestamp(a['published_at']) for a in added)
+            previous = state.get('last_published_at')
+            if previous is None or latest > parse_timestamp(previous):
+                new_state['last_published_at'] = latest.isoformat()
+            else:
+                new_state['last_published_at'] = previous
+        elif article_count > 0:
+            new_state['last_published_at'] = state.get('last_published_at')
+        
+        new_state.pop('updated_at', None)
+        return new_state
+    
+    @staticmethod
+    def value(state: Optional[Dict]) -> Tuple[float, float]:
+        """O(1) read of (sentiment, confidence); the shared decay factor cancels in the ratio"""
+        if not state or float(state['weight_sum']) <= 0:
+            return 0.0, 0.0
+        
+        weight_sum = float(state['weight_sum'])
+        sentiment = float(state['weighted_sentiment_sum']) / weight_sum
+        confidence = float(state['weighted_confidence_sum']) / weight_sum
+        return float(np.clip(sentiment, -1, 1)), float(np.clip(confidence, 0, 1))
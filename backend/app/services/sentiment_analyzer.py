@@ -2,17 +2,83 @@ import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import os
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.utils.circuit_breaker import get_breaker, text_budget_scale
+
+# Columnar per-batch result: one row per text, one field per model output
+SENTIMENT_DTYPE = np.dtype([
+    ('sentiment', np.float32),
+    ('confidence', np.float32),
+    ('finbert_score', np.float32),
+    ('finbert_confidence', np.float32),
+    ('textblob_score', np.float32),
+    ('textblob_confidence', np.float32),
+    ('vader_score', np.float32),
+    ('vader_confidence', np.float32)
+])
+
+MODEL_NAMES = ('finbert', 'textblob', 'vader')
+
+def load_ensemble_weights() -> Tuple[float, float, float]:
+    """FinBERT, TextBlob, VADER weights from SENTIMENT_ENSEMBLE_WEIGHTS (e.g. "0.5,0.3,0.2")"""
+    raw = os.getenv("SENTIMENT_ENSEMBLE_WEIGHTS")
+    if not raw:
+        return (0.5, 0.3, 0.2)
+    weights = tuple(float(w) for w in raw.split(','))
+    if len(weights) != len(MODEL_NAMES):
+        raise ValueError(f"SENTIMENT_ENSEMBLE_WEIGHTS needs {len(MODEL_NAMES)} values, got {raw!r}")
+    return weights
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(
+        self,
+        ensemble_weights: Optional[Sequence[float]] = None,
+        batch_size: int = 32,
+        long_documents: Optional[bool] = None,
+        token_budget: Optional[int] = None,
+        max_document_tokens: Optional[int] = None,
+        window_tokens: int = 512,
+        window_stride: int = 384,
+        headline_temperature: float = 0.1
+    ):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.finbert_tokenizer = None
         self.finbert_model = None
         self.vader_analyzer = SentimentIntensityAnalyzer()
+        # Most windows per forward pass; token_budget is the binding limit for long windows
+        self.batch_size = batch_size
+        
+        # Long-document mode scores every overlapping window instead of truncating at window_tokens
+        if long_documents is None:
+            long_documents = os.getenv("SENTIMENT_LONG_DOCUMENTS", "true").lower() in ("1", "true", "yes")
+        self.long_documents = long_documents
+        # Padded tokens per forward pass, so memory follows the budget rather than article length
+        self.token_budget = max(token_budget or int(os.getenv("SENTIMENT_TOKEN_BUDGET", "8192")), window_tokens)
+        self.max_document_tokens = max_document_tokens or int(os.getenv("SENTIMENT_MAX_DOCUMENT_TOKENS", "4096"))
+        self.window_tokens = window_tokens
+        self.window_stride = window_stride
+        self.headline_temperature = headline_temperature
+        self.token_stats = {
+            "documents": 0,
+            "long_documents": 0,
+            "windows": 0,
+            "tokens": 0,
+            "padded_tokens": 0,
+            "batches": 0,
+            "max_batch_tokens": 0
+        }
+        self.set_ensemble_weights(ensemble_weights or load_ensemble_weights())
         self._load_models()
     
+    def set_ensemble_weights(self, weights: Sequence[float]):
+        """Set per-model ensemble weights (FinBERT, TextBlob, VADER); they are normalized to sum to 1"""
+        weights = np.asarray(weights, dtype=np.float32)
+        if weights.shape != (len(MODEL_NAMES),) or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError(f"Invalid ensemble weights: {weights.tolist()}")
+        self.ensemble_weights = weights / weights.sum()
+    
     def _load_models(self):
         """Load FinBERT model for financial sentiment analysis"""
         try:
@@ -42,7 +108,7 @@ class SentimentAnalyzer:
             with torch.no_grad():
                 outputs = self.finbert_model(**inputs)
                 predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                
+            
             # FinBERT returns: [negative, neutral, positive]
             negative, neutral, positive = predictions[0].cpu().numpy()
             
@@ -58,15 +124,11 @@ class SentimentAnalyzer:
             return 0.0, 0.0
     
     def analyze_textblob(self, text: str) -> Tuple[float, float]:
-        """Analyze sentiment using TextBlob"""
-        try:
-            blob = TextBlob(text)
-            sentiment_score = blob.sentiment.polarity
-            confidence = abs(blob.sentiment.polarity) + (1 - abs(blob.sentiment.subjectivity)) / 2
-            return float(sentiment_score), float(confidence)
-        except Exception as e:
-            print(f"TextBlob analysis error: {e}")
-            return 0.0, 0.0
+        """Analyze sentiment using TextBlob (errors propagate to score_batch's breaker)"""
+        blob = TextBlob(text)
+        sentiment_score = blob.sentiment.polarity
+        confidence = abs(blob.sentiment.polarity) + (1 - abs(blob.sentiment.subjectivity)) / 2
+        return float(sentiment_score), float(confidence)
     
     def analyze_vader(self, text: str) -> Tuple[float, float]:
         """Analyze sentiment using VADER"""
@@ -79,37 +141,195 @@ class SentimentAnalyzer:
             print(f"VADER analysis error: {e}")
             return 0.0, 0.0
     
+    def _windows(self, ids: List[int]) -> List[List[int]]:
+        """Overlapping token windows over a document, each leaving room for [CLS] and [SEP]"""
+        size = self.window_tokens - 2
+        if not self.long_documents or len(ids) <= size:
+            return [ids[:size]]
+        
+        # Articles lead with what matters, so the document cap drops the tail rather than sampling it
+        ids = ids[:self.max_document_tokens]
+        return [ids[start:start + size] for start in range(0, max(len(ids) - size, 0) + self.window_stride, self.window_stride)]
+    
+    def _run_windows(self, windows: List[List[int]]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """FinBERT probabilities and [CLS] embeddings per window, packed into batches under the token budget"""
+        probabilities = np.zeros((len(windows), 3), dtype=np.float32)
+        embeddings = None
+        
+        # Similar lengths share a batch so little of the budget goes to padding; a padded
+        # batch is (windows x longest window) tokens, which is what bounds activation memory
+        order = sorted(range(len(windows)), key=lambda i: len(windows[i]))
+        start = 0
+        while start < len(order):
+            end = start + 1
+            while (
+                end < len(order)
+                and end - start < self.batch_size
+                and (end - start + 1) * (len(windows[order[end]]) + 2) <= self.token_budget
+            ):
+                end += 1
+            rows = order[start:end]
+            start = end
+            
+            inputs = self.finbert_tokenizer.pad(
+                {"input_ids": [self.finbert_tokenizer.build_inputs_with_special_tokens(windows[i]) for i in rows]},
+                return_tensors="pt"
+            ).to(self.device)
+            
+            with torch.no_grad():
+                outputs = self.finbert_model(**inputs, output_hidden_states=True)
+                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1).cpu().numpy()
+                cls = outputs.hidden_states[-1][:, 0, :].float().cpu().numpy()
+            
+            if embeddings is None:
+                embeddings = np.zeros((len(windows), cls.shape[1]), dtype=np.float32)
+            probabilities[rows] = predictions
+            embeddings[rows] = cls
+            
+            padded = int(inputs['input_ids'].numel())
+            self.token_stats['tokens'] += int(inputs['attention_mask'].sum())
+            self.token_stats['padded_tokens'] += padded
+            self.token_stats['batches'] += 1
+            self.token_stats['max_batch_tokens'] = max(self.token_stats['max_batch_tokens'], padded)
+        
+        return probabilities, embeddings
+    
+    def _headline_attention(self, embeddings: Optional[np.ndarray], rows: List[int], headline_row: Optional[int], lengths: np.ndarray) -> np.ndarray:
+        """Weights over a document's windows: softmax of [CLS] similarity to the headline, else token share"""
+        if headline_row is None or embeddings is None:
+            return lengths / lengths.sum()
+        
+        vectors = embeddings[rows]
+        query = embeddings[headline_row]
+        similarity = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query) + 1e-8)
+        logits = similarity / self.headline_temperature
+        weights = np.exp(logits - logits.max())
+        return weights / weights.sum()
+    
+    def analyze_finbert_batch(self, texts: List[str], headlines: Optional[List[Optional[str]]] = None) -> np.ndarray:
+        """Run FinBERT over texts under the per-batch token budget; returns an (n, 2) array of score, confidence"""
+        results = np.zeros((len(texts), 2), dtype=np.float32)
+        if not texts:
+            return results
+        
+        # Failures (model missing, tokenizer errors, CUDA OOM) propagate so the caller's breaker
+        # counts them and the ensemble drops FinBERT instead of blending in zeros
+        if not self.finbert_tokenizer or not self.finbert_model:
+            raise RuntimeError("FinBERT model is not loaded")
+        
+        encoded = self.finbert_tokenizer(list(texts), add_special_tokens=False, verbose=False)['input_ids']
+        
+        # Flatten every document's windows into one list; long documents with a headline
+        # also get the headline as its own window to steer the aggregation
+        windows: List[List[int]] = []
+        spans: List[Tuple[List[int], Optional[int]]] = []
+        for i, ids in enumerate(encoded):
+            document = self._windows(ids)
+            rows = list(range(len(windows), len(windows) + len(document)))
+            windows.extend(document)
+            
+            headline_row = None
+            headline = headlines[i] if headlines else None
+            if len(document) > 1 and headline:
+                headline_ids = self.finbert_tokenizer(headline, add_special_tokens=False, verbose=False)['input_ids']
+                if headline_ids:
+                    headline_row = len(windows)
+                    windows.append(headline_ids[:self.window_tokens - 2])
+            spans.append((rows, headline_row))
+        
+        probabilities, embeddings = self._run_windows(windows)
+        
+        for i, (rows, headline_row) in enumerate(spans):
+            if len(rows) == 1:
+                document = probabilities[rows[0]]
+            else:
+                lengths = np.array([len(windows[row]) for row in rows], dtype=np.float32)
+                document = self._headline_attention(embeddings, rows, headline_row, lengths) @ probabilities[rows]
+                self.token_stats['long_documents'] += 1
+            
+            # FinBERT returns: [negative, neutral, positive]
+            results[i, 0] = document[2] - document[0]
+            results[i, 1] = document.max() if document.any() else 0.0
+        
+        self.token_stats['documents'] += len(texts)
+        self.token_stats['windows'] += len(windows)
+        return results
+    
+    def get_token_stats(self) -> Dict[str, int]:
+        """Cumulative FinBERT workload since startup (tokens excludes padding)"""
+        return dict(self.token_stats)
+    
+    def score_batch(self, texts: List[str], headlines: Optional[List[Optional[str]]] = None) -> np.ndarray:
+        """Score a batch of texts (with optional per-text headlines) and return a structured array (see SENTIMENT_DTYPE)"""
+        results = np.zeros(len(texts), dtype=SENTIMENT_DTYPE)
+        if not texts:
+            return results
+        
+        # Texts that are too short stay at zero sentiment and confidence
+        valid = np.array([bool(text) and len(text.strip()) >= 10 for text in texts])
+        valid_idx = np.flatnonzero(valid)
+        if len(valid_idx) == 0:
+            return results
+        
+        valid_texts = [texts[i] for i in valid_idx]
+        
+        # Model outputs as (n, models) matrices
+        scores = np.empty((len(valid_texts), len(MODEL_NAMES)), dtype=np.float32)
+        confidences = np.empty_like(scores)
+        
+        valid_headlines = [headlines[i] for i in valid_idx] if headlines else None
+        # Large batches (the daily run, long articles) get proportionally more time before counting as slow
+        budget_scale = text_budget_scale(valid_texts)
+        
+        # FinBERT and TextBlob each sit behind a breaker; a skipped model leaves NaN in its
+        # columns and the ensemble is re-weighted over the rest. VADER is the fallback and always runs.
+        try:
+            finbert = get_breaker("finbert").call_sync(lambda: self.analyze_finbert_batch(valid_texts, valid_headlines), budget_scale)
+            scores[:, 0], confidences[:, 0] = finbert[:, 0], finbert[:, 1]
+        except Exception as e:
+            print(f"Skipping FinBERT for this batch: {e}")
+            scores[:, 0] = confidences[:, 0] = np.nan
+        
+        try:
+            textblob = get_breaker("textblob").call_sync(lambda: [self.analyze_textblob(text) for text in valid_texts], budget_scale)
+            scores[:, 1], confidences[:, 1] = np.array(textblob, dtype=np.float32).reshape(-1, 2).T
+        except Exception as e:
+            print(f"Skipping TextBlob for this batch: {e}")
+            scores[:, 1] = confidences[:, 1] = np.nan
+        
+        for i, text in enumerate(valid_texts):
+            scores[i, 2], confidences[i, 2] = self.analyze_vader(text)
+        
+        available = ~np.isnan(scores[0])
+        weights = np.where(available, self.ensemble_weights, 0.0)
+        if weights.sum() == 0:
+            weights = available.astype(np.float64)
+        weights = weights / weights.sum()
+        
+        # Weighted ensemble and normalization as single matrix operations
+        results['sentiment'][valid_idx] = np.clip(np.nan_to_num(scores) @ weights, -1, 1)
+        results['confidence'][valid_idx] = np.clip(np.nan_to_num(confidences) @ weights, 0, 1)
+        
+        for column, name in enumerate(MODEL_NAMES):
+            results[f'{name}_score'][valid_idx] = scores[:, column]
+            results[f'{name}_confidence'][valid_idx] = confidences[:, column]
+        
+        return results
+    
     def analyze_sentiment(self, text: str) -> Dict[str, float]:
         """Analyze sentiment using multiple methods and return ensemble result"""
-        if not text or len(text.strip()) < 10:
-            return {"sentiment": 0.0, "confidence": 0.0}
-        
-        # Get sentiment scores from different methods
-        finbert_score, finbert_conf = self.analyze_finbert(text)
-        textblob_score, textblob_conf = self.analyze_textblob(text)
-        vader_score, vader_conf = self.analyze_vader(text)
-        
-        # Weighted ensemble (FinBERT gets higher weight for financial text)
-        weights = [0.5, 0.3, 0.2]  # FinBERT, TextBlob, VADER
-        scores = [finbert_score, textblob_score, vader_score]
-        confidences = [finbert_conf, textblob_conf, vader_conf]
-        
-        # Calculate weighted average
-        ensemble_score = np.average(scores, weights=weights)
-        ensemble_confidence = np.average(confidences, weights=weights)
-        
-        # Normalize to [-1, 1] range
-        ensemble_score = np.clip(ensemble_score, -1, 1)
-        ensemble_confidence = np.clip(ensemble_confidence, 0, 1)
-        
-        return {
-            "sentiment": float(ensemble_score),
-            "confidence": float(ensemble_confidence),
-            "finbert_score": finbert_score,
-            "textblob_score": textblob_score,
-            "vader_score": vader_score
-        }
+        return self.analyze_batch([text])[0]
     
     def analyze_batch(self, texts: List[str]) -> List[Dict[str, float]]:
-        """Analyze sentiment for multiple texts"""
-        return [self.analyze_sentiment(text) for text in texts]
+        """Analyze sentiment for multiple texts (row-dict view of score_batch)"""
+        results = self.score_batch(texts)
+        return [
+            {
+                "sentiment": float(row['sentiment']),
+                "confidence": float(row['confidence']),
+                "finbert_score": float(row['finbert_score']),
+                "textblob_score": float(row['textblob_score']),
+                "vader_score": float(row['vader_score'])
+            }
+            for row in results
+        ]
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+from app.services.inference_scheduler import BatchScheduler
+
+# Wire format: 4-byte big-endian length prefix, then a UTF-8 JSON body.
+# Request {"texts": [...], "headlines": [...]}; response {"fields": [...], "rows": [[...], ...]} or {"error": "..."}.
+# Request {"stats": true} returns {"stats": {...}} with the model's token counters.
+HEADER = struct.Struct('>I')
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+def encode_frame(payload: Dict) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return HEADER.pack(len(body)) + body
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Dict]:
+    """Read one frame; None when the peer closed the connection"""
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds limit")
+    return json.loads(await reader.readexactly(length))
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Sentiment server closed the connection")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+class SentimentServer:
+    """Single process that owns the sentiment models and batches requests from every API worker"""
+    
+    def __init__(self, socket_path: str, max_batch: int = 64, max_wait_ms: float = 10.0):
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.scheduler: Optional[BatchScheduler] = None
+        self.analyzer = None
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await read_frame(reader)
+                if request is None:
+                    break
+                
+                try:
+                    if request.get('stats'):
+                        writer.write(encode_frame({"stats": self.analyzer.get_token_stats()}))
+                        await writer.drain()
+                        continue
+                    
+                    results = await self.scheduler.submit(list(request.get('texts') or []), request.get('headlines'))
+                    fields = list(results.dtype.names)
+                    writer.write(encode_frame({"fields": fields, "rows": [list(map(float, row)) for row in results.tolist()]}))
+                except Exception as e:
+                    writer.write(encode_frame({"error": str(e)}))
+                await writer.drain()
+        except Exception as e:
+            print(f"Sentiment server connection error: {e}")
+        finally:
+            writer.close()
+    
+    async def serve(self):
+        from app.services.sentiment_analyzer import SentimentAnalyzer
+        
+        self.analyzer = SentimentAnalyzer()
+        self.scheduler = BatchScheduler(self.analyzer.score_batch, self.max_batch, self.max_wait_ms)
+        
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        print(f"Sentiment server listening on {self.socket_path}")
+        
+        async with server:
+            await server.serve_forever()
+
+class RemoteSentimentAnalyzer:
+    """Drop-in for SentimentAnalyzer.score_batch that forwards texts to the shared sentiment server"""
+    
+    def __init__(self, socket_path: str, timeout: float = 120.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+    
+    def _request(self, payload: Dict) -> Dict:
+        frame = encode_frame(payload)
+        with self._lock:
+            # One reconnect covers a server restart between calls
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    self._sock.sendall(frame)
+                    (length,) = HEADER.unpack(_recv_exactly(self._sock, HEADER.size))
+                    return json.loads(_recv_exactly(self._sock, length))
+                except (OSError, ConnectionError):
+                    if self._sock is not None:
+                        self._sock.close()
+                        self._sock = None
+                    if attempt == 1:
+                        raise
+    
+    def score_batch(self, texts: List[str], headlines: Optional[List[Optional[str]]] = None) -> np.ndarray:
+        """Score a batch of texts remotely; same structured array as SentimentAnalyzer.score_batch"""
+        payload = {"texts": list(texts)}
+        if headlines:
+            payload["headlines"] = list(headlines)
+        response = self._request(payload)
+        if 'error' in response:
+            raise RuntimeError(f"Sentiment server error: {response['error']}")
+        
+        fields = response['fields']
+        rows = np.asarray(response['rows'], dtype=np.float32).reshape(len(texts), len(fields))
+        results = np.zeros(len(texts), dtype=[(field, np.float32) for field in fields])
+        for column, field in enumerate(fields):
+            results[field] = rows[:, column]
+        return results
+    
+    def get_token_stats(self) -> Dict[str, int]:
+        """The server's cumulative FinBERT workload"""
+        response = self._request({"stats": True})
+        if 'error' in response:
+            raise RuntimeError(f"Sentiment server error: {response['error']}")
+        return response['stats']
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        results = self.score_batch(texts)
+        return [
+            {
+                "sentiment": float(row['sentiment']),
+                "confidence": float(row['confidence']),
+                "finbert_score": float(row['finbert_score']),
+                "textblob_score": float(row['textblob_score']),
+                "vader_score": float(row['vader_score'])
+            }
+            for row in results
+        ]
+    
+    def analyze_sentiment(self, text: str) -> Dict[str, float]:
+        return self.analyze_batch([text])[0]
+
+class VaderSentimentAnalyzer:
+    """VADER-only stand-in for score_batch, used when the full ensemble is unavailable or too slow"""
+    
+    # Same fields as SENTIMENT_DTYPE; models that did not run are NaN
+    FIELDS = (
+        'sentiment', 'confidence',
+        'finbert_score', 'finbert_confidence',
+        'textblob_score', 'textblob_confidence',
+        'vader_score', 'vader_confidence'
+    )
+    
+    def __init__(self):
+        self._analyzer = None
+    
+    def score_batch(self, texts: List[str], headlines: Optional[List[Optional[str]]] = None) -> np.ndarray:
+        if self._analyzer is None:
+            # Imported lazily; VADER is pure Python and cheap enough to run on any API worker
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+            self._analyzer = SentimentIntensityAnalyzer()
+        
+        results = np.zeros(len(texts), dtype=[(field, np.float32) for field in self.FIELDS])
+        for field in ('finbert_score', 'finbert_confidence', 'textblob_score', 'textblob_confidence'):
+            results[field] = np.nan
+        
+        for i, text in enumerate(texts):
+            # Texts that are too short stay at zero sentiment and confidence, as in the ensemble
+            if not text or len(text.strip()) < 10:
+                continue
+            compound = self._analyzer.polarity_scores(text)['compound']
+            results['sentiment'][i] = results['vader_score'][i] = compound
+            results['confidence'][i] = results['vader_confidence'][i] = abs(compound)
+        return results
+
+def create_sentiment_analyzer():
+    """Remote client when SENTIMENT_SERVER_SOCKET is set, otherwise an in-process SentimentAnalyzer"""
+    socket_path = os.getenv("SENTIMENT_SERVER_SOCKET")
+    if socket_path:
+        return RemoteSentimentAnalyzer(socket_path)
+    
+    # Imported lazily so API workers using the server never load torch/transformers
+    from app.services.sentiment_analyzer import SentimentAnalyzer
+    return SentimentAnalyzer()
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve sentiment models to API workers over a Unix socket")
+    parser.add_argument("--socket", default=os.getenv("SENTIMENT_SERVER_SOCKET", "/tmp/sentiment.sock"))
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    
+    asyncio.run(SentimentServer(args.socket, args.max_batch, args.max_wait_ms).serve())
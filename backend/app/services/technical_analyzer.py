@@ -4,57 +4,94 @@ import ta
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
+# Default horizons (in bars) and how much each contributes to the blended score
+DEFAULT_HORIZONS = (5, 20, 60, 120)
+DEFAULT_HORIZON_WEIGHTS = {5: 0.2, 20: 0.4, 60: 0.25, 120: 0.15}
+
 class TechnicalAnalyzer:
-    def __init__(self):
+    def __init__(self, horizons: Tuple[int, ...] = DEFAULT_HORIZONS, horizon_weights: Optional[Dict[int, float]] = None):
         self.indicators = {}
+        self.horizons = tuple(sorted(horizons))
+        self.horizon_weights = horizon_weights or {h: DEFAULT_HORIZON_WEIGHTS.get(h, 1.0) for h in self.horizons}
     
-    def calculate_momentum(self, prices: pd.Series, window: int = 20) -> float:
-        """Calculate price momentum score"""
-        if len(prices) < window:
-            return 0.0
-        
-        # Calculate rate of change
-        roc = (prices.iloc[-1] - prices.iloc[-window]) / prices.iloc[-window]
-        
-        # Calculate moving average momentum
-        ma_short = prices.rolling(window=5).mean()
-        ma_long = prices.rolling(window=window).mean()
-        ma_momentum = (ma_short.iloc[-1] - ma_long.iloc[-1]) / ma_long.iloc[-1]
+    def lookback_days(self) -> int:
+        """Calendar days of daily bars needed to cover the longest horizon (5 trading days a week plus holidays)"""
+        return int(np.ceil(max(self.horizons) * 7 / 5)) + 10
+    
+    def calculate_horizon_scores(self, df: pd.DataFrame) -> Dict[int, Dict[str, float]]:
+        """Momentum and volume scores for every horizon in one pass over shared cumulative sums"""
+        # Every input is windowed to the horizon's last h bars, including the price-volume
+        # correlation, so horizons differ in more than their moving averages
+        close = df['close'].to_numpy(dtype=float)
+        volume = df['volume'].to_numpy(dtype=float)
+        n = len(close)
+        if n < 2:
+            return {}
+        
+        # Prefix sums give any trailing-window mean in O(1)
+        close_cs = np.concatenate(([0.0], np.cumsum(close)))
+        volume_cs = np.concatenate(([0.0], np.cumsum(volume)))
+        
+        # Price/volume percentage changes and the running sums needed for a windowed correlation
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.diff(close) / close[:-1]
+            y = np.diff(volume) / volume[:-1]
+        valid = np.isfinite(x) & np.isfinite(y)
+        x = np.where(valid, x, 0.0)
+        y = np.where(valid, y, 0.0)
+        sums = {
+            name: np.concatenate(([0.0], np.cumsum(values)))
+            for name, values in (('n', valid.astype(float)), ('x', x), ('y', y), ('xy', x * y), ('xx', x * x), ('yy', y * y))
+        }
         
-        # Combine momentum indicators
-        momentum_score = (roc + ma_momentum) / 2
+        short = min(5, n)
+        ma_short = (close_cs[n] - close_cs[n - short]) / short
+        
+        scores = {}
+        for h in self.horizons:
+            if n < h:
+                continue
+            
+            # Momentum: rate of change plus short vs. horizon moving average
+            roc = (close[-1] - close[-h]) / close[-h]
+            ma_long = (close_cs[n] - close_cs[n - h]) / h
+            momentum = (roc + (ma_short - ma_long) / ma_long) / 2
+            momentum_score = max(0, min(1, (momentum + 0.1) / 0.2))
+            
+            # Volume: current vs. horizon average, plus price-volume correlation over the h-1
+            # changes inside the horizon's h bars; zero-volume bars are left out of the correlation
+            avg_vol = (volume_cs[n] - volume_cs[n - h]) / h
+            vol_ratio = volume[-1] / avg_vol if avg_vol > 0 else 1
+            
+            m = len(x)
+            start = max(0, m - (h - 1))
+            count, sx, sy, sxy, sxx, syy = (sums[name][m] - sums[name][start] for name in ('n', 'x', 'y', 'xy', 'xx', 'yy'))
+            correlation = 0.0
+            if count > 1:
+                cov = sxy - sx * sy / count
+                var_x = sxx - sx * sx / count
+                var_y = syy - sy * sy / count
+                if var_x > 0 and var_y > 0:
+                    correlation = cov / np.sqrt(var_x * var_y)
+            
+            volume_score = max(0, min(1, (vol_ratio + (correlation + 1) / 2) / 2))
+            
+            scores[h] = {
+                "momentum_score": float(momentum_score),
+                "volume_score": float(volume_score)
+            }
         
-        # Normalize to [0, 1] range
-        return max(0, min(1, (momentum_score + 0.1) / 0.2))
+        return scores
     
-    def calculate_volume_score(self, volumes: pd.Series, prices: pd.Series, window: int = 20) -> float:
-        """Calculate volume-based score"""
-        if len(volumes) < window or len(prices) < window:
-            return 0.5
-        
-        # Volume moving average
-        vol_ma = volumes.rolling(window=window).mean()
-        current_vol = volumes.iloc[-1]
-        avg_vol = vol_ma.iloc[-1]
-        
-        # Volume ratio
-        vol_ratio = current_vol / avg_vol if avg_vol > 0 else 1
-        
-        # Price-volume correlation
-        price_change = prices.pct_change().dropna()
-        vol_change = volumes.pct_change().dropna()
-        
-        if len(price_change) > 0 and len(vol_change) > 0:
-            correlation = price_change.corr(vol_change)
-            correlation = correlation if not np.isnan(correlation) else 0
-        else:
-            correlation = 0
-        
-        # Combine volume indicators
-        volume_score = (vol_ratio + (correlation + 1) / 2) / 2
-        
-        # Normalize to [0, 1] range
-        return max(0, min(1, volume_score))
+    def blend_horizons(self, horizon_scores: Dict[int, Dict[str, float]], key: str, default: float) -> float:
+        """Weighted average of one score across the horizons that had enough data"""
+        available = [h for h in horizon_scores if self.horizon_weights.get(h, 0) > 0]
+        if not available:
+            return default
+        
+        weights = np.array([self.horizon_weights[h] for h in available])
+        values = np.array([horizon_scores[h][key] for h in available])
+        return float(values @ weights / weights.sum())
     
     def calculate_technical_indicators(self, df: pd.DataFrame) -> Dict[str, float]:
         """Calculate various technical indicators"""
@@ -94,9 +131,10 @@ class TechnicalAnalyzer:
             "williams_r": williams_r if not np.isnan(williams_r) else -50
         }
     
-    def calculate_technical_score(self, df: pd.DataFrame) -> float:
+    def calculate_technical_score(self, df: pd.DataFrame, indicators: Optional[Dict[str, float]] = None) -> float:
         """Calculate overall technical analysis score"""
-        indicators = self.calculate_technical_indicators(df)
+        if indicators is None:
+            indicators = self.calculate_technical_indicators(df)
         
         # RSI score (30-70 range is good)
         rsi_score = 1 - abs(indicators["rsi"] - 50) / 50
@@ -131,9 +169,11 @@ class TechnicalAnalyzer:
                 "overall_score": 0.5
             }
         
-        momentum_score = self.calculate_momentum(df['close'])
-        volume_score = self.calculate_volume_score(df['volume'], df['close'])
-        technical_score = self.calculate_technical_score(df)
+        horizon_scores = self.calculate_horizon_scores(df)
+        momentum_score = self.blend_horizons(horizon_scores, "momentum_score", 0.0)
+        volume_score = self.blend_horizons(horizon_scores, "volume_score", 0.5)
+        indicators = self.calculate_technical_indicators(df)
+        technical_score = self.calculate_technical_score(df, indicators)
         
         # Overall score (weighted average)
         overall_score = (momentum_score * 0.4 + volume_score * 0.2 + technical_score * 0.4)
@@ -142,5 +182,10 @@ class TechnicalAnalyzer:
             "momentum_score": momentum_score,
             "volume_score": volume_score,
             "technical_score": technical_score,
-            "overall_score": overall_score
+            "overall_score": overall_score,
+            "horizon_scores": horizon_scores,
+            "indicators": {name: float(value) for name, value in indicators.items()},
+            "last_close": float(df['close'].iloc[-1]),
+            "last_volume": float(df['volume'].iloc[-1]),
+            "bars": len(df)
         }
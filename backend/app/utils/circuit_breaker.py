@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Set, Tuple
+
+# Per-dependency (latency budget, hard timeout) in seconds; overridden by
+# <NAME>_LATENCY_BUDGET_MS and <NAME>_TIMEOUT_MS
+DEPENDENCY_LIMITS: Dict[str, Tuple[float, float]] = {
+    "database": (2.0, 10.0),
+    "sentiment": (3.0, 10.0),
+    "finbert": (3.0, 10.0),
+    "textblob": (1.0, 5.0)
+}
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+class CircuitBreaker:
+    """Fails fast on a dependency after repeated errors or latency budget overruns, then probes it again"""
+    
+    # closed: calls pass through. open: calls are rejected until reset_timeout has passed.
+    # half-open: a single probe call decides between closing and re-opening; a call that
+    # errors or takes longer than latency_budget counts as a failure either way.
+    
+    def __init__(self, name: str, latency_budget: float, timeout: float, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.latency_budget = latency_budget
+        # Hard cap on a single call where the caller can enforce one
+        self.timeout = max(timeout, latency_budget)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+    
+    def allow(self) -> bool:
+        """Whether a call may go ahead now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+    
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+    
+    def record(self, elapsed: float, ok: bool, scale: float = 1.0):
+        """Outcome of an allowed call; slow successes count as failures. The budget is
+        multiplied by scale (at least 1) for calls doing several units of work."""
+        with self._lock:
+            self.calls += 1
+            self._probing = False
+            if ok and elapsed <= self.latency_budget * max(scale, 1.0):
+                self._consecutive_failures = 0
+                if self.state != "closed":
+                    print(f"Circuit breaker {self.name} closed")
+                    self.state = "closed"
+                return
+            
+            self.failures += 1
+            self._consecutive_failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self._consecutive_failures >= self.failure_threshold):
+                print(f"Circuit breaker {self.name} opened after {self._consecutive_failures} failed or slow calls")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self.opened += 1
+    
+    def call_sync(self, fn: Callable[[], Any], scale: float = 1.0) -> Any:
+        """Run fn if the breaker allows it; its duration is checked against the (scaled) budget afterwards"""
+        self.check()
+        start = time.monotonic()
+        ok = False
+        try:
+            result = fn()
+            ok = True
+            return result
+        finally:
+            self.record(time.monotonic() - start, ok, scale)
+    
+    async def call(self, fn: Callable[[], Awaitable[Any]], scale: float = 1.0) -> Any:
+        """Await fn if the breaker allows it, giving up after the (scaled) hard timeout"""
+        self.check()
+        start = time.monotonic()
+        ok = False
+        try:
+            result = await asyncio.wait_for(fn(), timeout=self.timeout * max(scale, 1.0))
+            ok = True
+            return result
+        finally:
+            self.record(time.monotonic() - start, ok, scale)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "latency_budget_ms": self.latency_budget * 1000,
+            "timeout_ms": self.timeout * 1000,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opened": self.opened
+        }
+
+def text_budget_scale(texts: List[str]) -> float:
+    """Budget multiplier for a batch of texts: one budget per SENTIMENT_BUDGET_CHARS characters"""
+    return sum(len(text) for text in texts) / int(os.getenv("SENTIMENT_BUDGET_CHARS", "20000"))
+
+breakers: Dict[str, CircuitBreaker] = {}
+breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get the process-wide breaker for a dependency, configured from the environment on first use"""
+    with breakers_lock:
+        if name not in breakers:
+            budget, timeout = DEPENDENCY_LIMITS.get(name, (5.0, 30.0))
+            prefix = name.upper()
+            breakers[name] = CircuitBreaker(
+                name,
+                latency_budget=float(os.getenv(f"{prefix}_LATENCY_BUDGET_MS", budget * 1000)) / 1000,
+                timeout=float(os.getenv(f"{prefix}_TIMEOUT_MS", timeout * 1000)) / 1000,
+                failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+            )
+        return breakers[name]
+
+def breaker_stats() -> List[Dict[str, Any]]:
+    with breakers_lock:
+        return [breaker.stats() for breaker in breakers.values()]
+
+# Components that fell back during the current request; one set per open track_degradation block
+degraded_components: ContextVar[Tuple[Set[str], ...]] = ContextVar("degraded_components", default=())
+
+@contextmanager
+def track_degradation() -> Iterator[Set[str]]:
+    """Collect the components that fell back while the block runs; enclosing blocks see them too"""
+    components: Set[str] = set()
+    token = degraded_components.set(degraded_components.get() + (components,))
+    try:
+        yield components
+    finally:
+        degraded_components.reset(token)
+
+def mark_degraded(component: str):
+    """Note that a component fell back (or failed) for the current request"""
+    for components in degraded_components.get():
+        components.add(component)
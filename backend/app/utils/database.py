@@ -1,25 +1,130 @@
 import os
+import time
+import httpx
+from postgrest.utils import SyncClient
 from supabase import create_client, Client
-from typing import Optional
+from supabase.lib.client_options import ClientOptions
+from typing import Any, Callable, Dict, List, Optional
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker, mark_degraded
 
 # Global Supabase client
 supabase: Optional[Client] = None
 
-async def init_db():
-    """Initialize Supabase database connection"""
-    global supabase
+class GuardedTransport(httpx.BaseTransport):
+    """HTTP transport behind a circuit breaker: rejected instantly while the breaker is open"""
     
+    def __init__(self, breaker: CircuitBreaker, transport: Optional[httpx.BaseTransport] = None):
+        self.breaker = breaker
+        self.transport = transport or httpx.HTTPTransport()
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            self.breaker.check()
+        except CircuitOpenError:
+            mark_degraded(self.breaker.name)
+            raise
+        
+        start = time.monotonic()
+        ok = False
+        try:
+            response = self.transport.handle_request(request)
+            # 4xx is the caller's mistake; only server errors say the dependency is unhealthy
+            ok = response.status_code < 500
+            return response
+        finally:
+            self.breaker.record(time.monotonic() - start, ok)
+            if not ok:
+                mark_degraded(self.breaker.name)
+    
+    def close(self):
+        self.transport.close()
+
+def _create_client_from_env() -> Client:
     supabase_url = os.getenv("SUPABASE_URL")
     supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     
     if not supabase_url or not supabase_key:
         raise ValueError("Supabase credentials not found in environment variables")
     
-    supabase = create_client(supabase_url, supabase_key)
+    breaker = get_breaker("database")
+    client = create_client(supabase_url, supabase_key, options=ClientOptions(postgrest_client_timeout=breaker.timeout))
+    
+    # Every table/rpc query goes through this session, so one transport guards them all
+    postgrest = client.postgrest
+    session = postgrest.session
+    postgrest.session = SyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        transport=GuardedTransport(breaker)
+    )
+    session.close()
+    return client
+
+async def init_db():
+    """Initialize Supabase database connection"""
+    global supabase
+    
+    if supabase is None:
+        supabase = _create_client_from_env()
     print("Database connection initialized successfully")
 
 def get_supabase() -> Client:
-    """Get Supabase client instance"""
+    """Get Supabase client instance, connecting on first use"""
+    global supabase
+    
+    # Routers build their services at import time, before the startup event runs init_db
     if supabase is None:
-        raise RuntimeError("Database not initialized. Call init_db() first.")
+        supabase = _create_client_from_env()
     return supabase
+
+def upsert_in_chunks(
+    table: str,
+    rows: List[Dict[str, Any]],
+    on_conflict: str,
+    chunk_size: int = 500,
+    max_retries: int = 3,
+    retry_delay: float = 0.5
+) -> Dict[str, int]:
+    """Upsert rows in fixed-size chunks, retrying each chunk with exponential backoff"""
+    client = get_supabase()
+    saved = 0
+    failed = 0
+    chunks = 0
+    
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        chunks += 1
+        
+        for attempt in range(max_retries):
+            try:
+                response = client.table(table).upsert(chunk, on_conflict=on_conflict).execute()
+                saved += len(response.data or chunk)
+                break
+            except CircuitOpenError as e:
+                # Retrying cannot help until the breaker lets calls through again
+                print(f"Error upserting chunk {chunks} into {table}: {e}")
+                failed += len(chunk)
+                break
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    print(f"Error upserting chunk {chunks} into {table}: {e}")
+                    failed += len(chunk)
+                else:
+                    time.sleep(retry_delay * (2 ** attempt))
+    
+    return {"saved": saved, "failed": failed, "chunks": chunks}
+
+def fetch_all_pages(build_query: Callable[[], Any], page_size: int = 1000) -> List[Dict[str, Any]]:
+    """Run a query page by page (PostgREST caps rows per response) and return every row"""
+    rows = []
+    offset = 0
+    
+    while True:
+        page = build_query().range(offset, offset + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            break
+        offset += page_size
+    
+    return rows
@@ -0,0 +1,67 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Hard cap on rows per page for every paginated list endpoint
+MAX_PAGE_SIZE = 200
+
+# (column, descending) pairs; the last key must be unique so the order is total
+SortKeys = Sequence[Tuple[str, bool]]
+
+def encode_cursor(keys: SortKeys, row: Dict[str, Any]) -> str:
+    """Opaque cursor holding the sort-key values of the last row on a page"""
+    payload = {"k": [column for column, _ in keys], "v": [row.get(column) for column, _ in keys]}
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(keys: SortKeys, cursor: str) -> List[Any]:
+    """Sort-key values from a cursor; ValueError if it is malformed or from a different ordering"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except Exception:
+        raise ValueError("Malformed cursor")
+    
+    if not isinstance(payload, dict) or payload.get("k") != [column for column, _ in keys] or len(payload.get("v") or []) != len(keys):
+        raise ValueError("Cursor does not match this listing")
+    return payload["v"]
+
+def _literal(value: Any) -> str:
+    # Strings are quoted so timestamps and dates with reserved characters survive the logic tree
+    if isinstance(value, str):
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return json.dumps(value)
+
+def apply_keyset(query, keys: SortKeys, cursor: Optional[str], limit: int):
+    """Order by the keys, resume strictly after the cursor row, and fetch one extra row to detect a next page"""
+    if cursor:
+        values = decode_cursor(keys, cursor)
+        
+        # (a, b) after (x, y) in the key order: a beyond x, or a = x and b beyond y, and so on
+        branches = []
+        for i, (column, desc) in enumerate(keys):
+            ties = [f"{keys[j][0]}.eq.{_literal(values[j])}" for j in range(i)]
+            step = f"{column}.{'lt' if desc else 'gt'}.{_literal(values[i])}"
+            branches.append(f"and({','.join(ties + [step])})" if ties else step)
+        expression = f"({','.join(branches)})"
+        
+        if hasattr(query, 'or_'):
+            query = query.or_(expression[1:-1])
+        else:
+            # Older postgrest-py has no or_(); add the same query parameter filter() would
+            query.params = query.params.add('or', expression)
+    
+    # One order parameter listing every key; repeated order() calls are not merged by older clients
+    query.params = query.params.add('order', ','.join(f"{column}.{'desc' if desc else 'asc'}" for column, desc in keys))
+    return query.limit(limit + 1)
+
+def split_page(keys: SortKeys, rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page (None on the last page)"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(keys, page[-1])
+
+def page_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    """Next-page cursor travels in a header so list bodies keep their existing shape"""
+    return {"X-Next-Cursor": next_cursor} if next_cursor else {}
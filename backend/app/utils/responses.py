@@ -0,0 +1,23 @@
+from fastapi.responses import Response
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+    import json
+
+class TrustedJSONResponse(Response):
+    """JSON response for trusted DB rows: encoded directly, skipping response_model revalidation"""
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def to_columnar(rows: List[Dict[str, Any]], fields: Optional[Sequence[str]] = None) -> Dict[str, List[Any]]:
+    """Convert a list of row dicts into one array per field"""
+    if fields is None:
+        fields = list(rows[0].keys()) if rows else []
+    return {field: [row.get(field) for row in rows] for field in fields}
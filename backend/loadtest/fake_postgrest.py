@@ -0,0 +1,501 @@
+import asyncio
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# In-memory stand-in for the PostgREST API behind Supabase, covering the query
+# shapes the backend issues: column filters (also on embedded resources), or/and
+# logic trees, ordering, limit/offset and Range paging, many-to-one embedding,
+# upserts, updates, deletes and the RPCs the API routes call. It is a load-test
+# fixture, not a database: no constraints, types or transactions.
+
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns', 'or', 'and'}
+OPERATORS = ('eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'in', 'is', 'fts', 'plfts', 'phfts', 'wfts', 'cs', 'cd')
+
+# Columns kept in hash indexes so point lookups do not scan whole tables
+INDEXED_COLUMNS = {
+    'stocks': ('id', 'ticker'),
+    'stock_prices': ('stock_id',),
+    'news': ('id', 'stock_id'),
+    'recommendations': ('id', 'stock_id', 'recommended_date')
+}
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes"""
+    parts = []
+    depth = 0
+    quoted = False
+    current = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quoted:
+            current.append(char)
+            if char == '\\' and i + 1 < len(text):
+                current.append(text[i + 1])
+                i += 1
+            elif char == '"':
+                quoted = False
+        elif char == '"':
+            quoted = True
+            current.append(char)
+        elif char == '(':
+            depth += 1
+            current.append(char)
+        elif char == ')':
+            depth -= 1
+            current.append(char)
+        elif char == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    if current:
+        parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+def _coerce(sample: Any, value: str) -> Any:
+    """Parse a filter value to the type of the stored column value"""
+    if isinstance(sample, bool):
+        return value.lower() == 'true'
+    if isinstance(sample, (int, float)):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+def _compare(op: str, actual: Any, raw: str) -> bool:
+    if op == 'is':
+        target = raw.lower()
+        if target == 'null':
+            return actual is None
+        return actual is (target == 'true')
+    if actual is None:
+        return False
+    if op == 'in':
+        members = [_unquote(member) for member in _split_top_level(raw.strip()[1:-1])]
+        return any(actual == _coerce(actual, member) for member in members)
+    if op in ('like', 'ilike'):
+        pattern = '^' + re.escape(raw).replace('%', '.*').replace(r'\*', '.*').replace('_', '.') + '$'
+        return re.match(pattern, str(actual), re.IGNORECASE if op == 'ilike' else 0) is not None
+    if op in ('fts', 'plfts', 'phfts', 'wfts'):
+        terms = re.findall(r'\w+', raw.lower())
+        return all(term in str(actual).lower() for term in terms)
+    if op in ('cs', 'cd'):
+        return True
+    
+    target = _coerce(actual, raw)
+    if isinstance(target, str) and not isinstance(actual, str):
+        actual = str(actual)
+    try:
+        if op == 'eq':
+            return actual == target
+        if op == 'neq':
+            return actual != target
+        if op == 'gt':
+            return actual > target
+        if op == 'gte':
+            return actual >= target
+        if op == 'lt':
+            return actual < target
+        if op == 'lte':
+            return actual <= target
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator {op}")
+
+def parse_condition(text: str) -> Callable[[Dict], bool]:
+    """Predicate for `col.op.value`, `col.not.op.value`, `and(...)`, `or(...)` or `not.and(...)`"""
+    negate = False
+    if text.startswith('not.'):
+        negate, text = True, text[4:]
+    
+    for logic in ('and', 'or'):
+        if text.startswith(logic + '('):
+            parts = [parse_condition(part) for part in _split_top_level(text[len(logic) + 1:-1])]
+            combine = all if logic == 'and' else any
+            predicate = lambda row, parts=parts, combine=combine: combine(part(row) for part in parts)
+            return (lambda row: not predicate(row)) if negate else predicate
+    
+    column, rest = text.split('.', 1)
+    predicate = parse_filter(column, rest)
+    return (lambda row: not predicate(row)) if negate else predicate
+
+def parse_filter(column: str, expression: str) -> Callable[[Dict], bool]:
+    """Predicate for a query-string filter such as `stock_id=eq.3` or `date=not.is.null`"""
+    negate = False
+    if expression.startswith('not.'):
+        negate, expression = True, expression[4:]
+    op, _, raw = expression.partition('.')
+    if op not in OPERATORS:
+        raise ValueError(f"Unsupported operator {op}")
+    # Strip modifiers such as fts(english)
+    op = op.split('(')[0]
+    raw = raw if op == 'in' else _unquote(raw)
+    
+    def predicate(row: Dict) -> bool:
+        return _compare(op, row.get(column), raw) != negate
+    return predicate
+
+def parse_select(select: str) -> Tuple[List[str], Dict[str, Tuple[List[str], bool]]]:
+    """Top-level columns and embedded resources {table: (columns, inner join)}"""
+    columns = []
+    embeds = {}
+    for part in _split_top_level(select or '*'):
+        match = re.match(r'^(?:\w+:)?(\w+)(!inner)?\((.*)\)$', part)
+        if match:
+            embeds[match.group(1)] = ([c.strip() for c in _split_top_level(match.group(3))] or ['*'], bool(match.group(2)))
+        else:
+            columns.append(part.split('::')[0].strip())
+    return columns, embeds
+
+def _project(row: Optional[Dict], columns: List[str]) -> Optional[Dict]:
+    if row is None or '*' in columns:
+        return dict(row) if row is not None else None
+    return {column: row.get(column) for column in columns}
+
+def _sort_rows(rows: List[Dict], order: str) -> List[Dict]:
+    # Stable sorts from the last key to the first; Postgres puts NULLs last ascending, first descending
+    for term in reversed(_split_top_level(order)):
+        parts = term.split('.')
+        column = parts[0]
+        desc = 'desc' in parts[1:]
+        nulls_first = 'nullsfirst' in parts[1:] or (desc and 'nullslast' not in parts[1:])
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+class FakeDatabase:
+    """Tables as lists of row dicts with lazily built hash indexes"""
+    
+    def __init__(self):
+        self.tables: Dict[str, List[Dict]] = {}
+        self._next_id: Dict[str, int] = {}
+        self._indexes: Dict[Tuple[str, str], Dict[Any, List[Dict]]] = {}
+        self.views: Dict[str, Callable[[], List[Dict]]] = {
+            'latest_price_dates': self._latest_price_dates
+        }
+    
+    def _invalidate(self, table: str):
+        # Embeds index any table by id, not only those in INDEXED_COLUMNS
+        for key in [key for key in self._indexes if key[0] == table]:
+            del self._indexes[key]
+    
+    def _index(self, table: str, column: str) -> Dict[Any, List[Dict]]:
+        key = (table, column)
+        if key not in self._indexes:
+            index: Dict[Any, List[Dict]] = {}
+            for row in self.tables.get(table, []):
+                index.setdefault(row.get(column), []).append(row)
+            self._indexes[key] = index
+        return self._indexes[key]
+    
+    def rows(self, table: str, filters: List[Tuple[str, str]]) -> List[Dict]:
+        """Candidate rows, narrowed by an index when a filter is an equality on an indexed column"""
+        if table in self.views:
+            return self.views[table]()
+        for column, expression in filters:
+            if column in INDEXED_COLUMNS.get(table, ()) and expression.startswith('eq.'):
+                sample = next(iter(self.tables.get(table) or [{}])).get(column)
+                value = _coerce(sample, _unquote(expression[3:]))
+                if isinstance(sample, int) and isinstance(value, float) and value.is_integer():
+                    value = int(value)
+                return list(self._index(table, column).get(value, []))
+        return list(self.tables.get(table, []))
+    
+    def insert(self, table: str, rows: List[Dict], on_conflict: Optional[List[str]], merge: bool) -> List[Dict]:
+        stored = self.tables.setdefault(table, [])
+        existing = {}
+        if on_conflict:
+            existing = {tuple(row.get(column) for column in on_conflict): row for row in stored}
+        
+        now = datetime.now(timezone.utc).isoformat()
+        written = []
+        for row in rows:
+            key = tuple(row.get(column) for column in on_conflict) if on_conflict else None
+            if key is not None and key in existing:
+                if merge:
+                    existing[key].update(row)
+                written.append(existing[key])
+                continue
+            
+            record = {"created_at": now, **row}
+            if 'id' not in record:
+                self._next_id[table] = max(self._next_id.get(table, 0), len(stored)) + 1
+                record['id'] = self._next_id[table]
+            stored.append(record)
+            if key is not None:
+                existing[key] = record
+            written.append(record)
+        
+        self._invalidate(table)
+        return written
+    
+    def delete(self, table: str, doomed: List[Dict]) -> List[Dict]:
+        ids = {id(row) for row in doomed}
+        self.tables[table] = [row for row in self.tables.get(table, []) if id(row) not in ids]
+        self._invalidate(table)
+        return doomed
+    
+    def _latest_price_dates(self) -> List[Dict]:
+        latest: Dict[int, str] = {}
+        for row in self.tables.get('stock_prices', []):
+            if row['date'] > latest.get(row['stock_id'], ''):
+                latest[row['stock_id']] = row['date']
+        return [{"stock_id": stock_id, "last_date": last_date} for stock_id, last_date in latest.items()]
+
+class FakePostgrest:
+    """Starlette app serving /rest/v1 over a FakeDatabase"""
+    
+    def __init__(self, database: FakeDatabase, latency_ms: float = 0.0):
+        self.db = database
+        # Added to every response to stand in for the network round trip to Supabase
+        self.latency = latency_ms / 1000
+        self.rpcs: Dict[str, Callable[[Dict], Any]] = {
+            'upsert_recommendations': self._rpc_upsert_recommendations,
+            'save_sentiment_aggregate': self._rpc_save_sentiment_aggregate,
+            'search_news': self._rpc_search_news
+        }
+        self.requests = 0
+        self.app = Starlette(routes=[
+            Route('/rest/v1/rpc/{name}', self.handle_rpc, methods=['POST', 'GET']),
+            Route('/rest/v1/{table}', self.handle_table, methods=['GET', 'HEAD', 'POST', 'PATCH', 'DELETE']),
+            Route('/rest/v1/', self.handle_root, methods=['GET'])
+        ])
+    
+    async def handle_root(self, request: Request) -> Response:
+        return JSONResponse({"tables": sorted(self.db.tables), "requests": self.requests})
+    
+    def _filters(self, request: Request) -> List[Tuple[str, str]]:
+        return [(key, value) for key, value in request.query_params.multi_items() if key not in RESERVED_PARAMS]
+    
+    def _select(self, table: str, request: Request) -> List[Dict]:
+        params = request.query_params
+        filters = self._filters(request)
+        columns, embeds = parse_select(params.get('select', '*'))
+        
+        top_level = [parse_filter(column, expression) for column, expression in filters if '.' not in column]
+        logic = [parse_condition(f"{key}{value}") for key, value in params.multi_items() if key in ('or', 'and')]
+        rows = [row for row in self.db.rows(table, filters) if all(p(row) for p in top_level) and all(p(row) for p in logic)]
+        
+        # Many-to-one embeds follow <singular>_id; filters on them null the embed unless !inner drops the row
+        embedded_filters: Dict[str, List[Callable[[Dict], bool]]] = {}
+        for column, expression in filters:
+            if '.' in column:
+                resource, field = column.split('.', 1)
+                embedded_filters.setdefault(resource, []).append(parse_filter(field, expression))
+        
+        for resource, (embed_columns, inner) in embeds.items():
+            foreign_key = resource[:-1] + '_id' if resource.endswith('s') else resource + '_id'
+            lookup = self.db._index(resource, 'id')
+            kept = []
+            for row in rows:
+                target = (lookup.get(row.get(foreign_key)) or [None])[0]
+                if target is not None and not all(p(target) for p in embedded_filters.get(resource, [])):
+                    target = None
+                if target is None and inner:
+                    continue
+                kept.append((row, target))
+            rows = [{**row, "__embed__" + resource: target} for row, target in kept]
+        
+        if params.get('order'):
+            rows = _sort_rows(rows, params['order'])
+        
+        offset = int(params.get('offset') or 0)
+        limit = int(params['limit']) if params.get('limit') else None
+        range_header = request.headers.get('range')
+        if range_header and '-' in range_header:
+            start, end = range_header.split('-', 1)
+            offset = int(start)
+            limit = int(end) - int(start) + 1 if end else None
+        total = len(rows)
+        rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+        
+        result = []
+        for row in rows:
+            projected = _project({k: v for k, v in row.items() if not k.startswith('__embed__')}, columns) if columns else {}
+            for resource, (embed_columns, _) in embeds.items():
+                projected[resource] = _project(row.get('__embed__' + resource), embed_columns)
+            result.append(projected)
+        request.state.total = total
+        request.state.offset = offset
+        return result
+    
+    def _respond(self, request: Request, rows: Any, status: int = 200) -> Response:
+        headers = {}
+        prefer = request.headers.get('prefer', '')
+        if isinstance(rows, list):
+            offset = getattr(request.state, 'offset', 0)
+            total = getattr(request.state, 'total', len(rows))
+            total_part = str(total) if 'count=' in prefer else '*'
+            headers['Content-Range'] = f"{offset}-{offset + len(rows) - 1}/{total_part}" if rows else f"*/{total_part}"
+        
+        if 'return=minimal' in prefer:
+            return Response(status_code=201 if status == 201 else 204, headers=headers)
+        if 'vnd.pgrst.object' in request.headers.get('accept', '') and isinstance(rows, list):
+            if len(rows) != 1:
+                return JSONResponse({"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"}, status_code=406)
+            rows = rows[0]
+        return JSONResponse(rows, status_code=status, headers=headers)
+    
+    async def handle_table(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        table = request.path_params['table']
+        
+        try:
+            if request.method in ('GET', 'HEAD'):
+                return self._respond(request, self._select(table, request))
+            
+            if request.method == 'POST':
+                body = await request.json()
+                rows = body if isinstance(body, list) else [body]
+                prefer = request.headers.get('prefer', '')
+                on_conflict = request.query_params.get('on_conflict')
+                upsert = 'resolution=' in prefer
+                keys = on_conflict.split(',') if on_conflict else (['id'] if upsert else None)
+                written = self.db.insert(table, rows, keys, merge='merge-duplicates' in prefer)
+                return self._respond(request, written, status=201)
+            
+            matched = self._matching(table, request)
+            if request.method == 'PATCH':
+                changes = await request.json()
+                for row in matched:
+                    row.update(changes)
+                self.db._invalidate(table)
+                return self._respond(request, matched)
+            
+            return self._respond(request, self.db.delete(table, matched))
+        except (ValueError, KeyError) as e:
+            return JSONResponse({"code": "PGRST100", "message": str(e)}, status_code=400)
+    
+    def _matching(self, table: str, request: Request) -> List[Dict]:
+        filters = self._filters(request)
+        predicates = [parse_filter(column, expression) for column, expression in filters]
+        predicates += [parse_condition(f"{key}{value}") for key, value in request.query_params.multi_items() if key in ('or', 'and')]
+        return [row for row in self.db.rows(table, filters) if all(p(row) for p in predicates)]
+    
+    async def handle_rpc(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        name = request.path_params['name']
+        if name not in self.rpcs:
+            return JSONResponse({"code": "PGRST202", "message": f"Could not find the function public.{name}"}, status_code=404)
+        
+        args = await request.json() if request.method == 'POST' else dict(request.query_params)
+        try:
+            return JSONResponse(self.rpcs[name](args or {}))
+        except (ValueError, KeyError, TypeError) as e:
+            return JSONResponse({"code": "P0001", "message": str(e)}, status_code=400)
+    
+    def _rpc_upsert_recommendations(self, args: Dict) -> int:
+        rows = args.get('payload') or []
+        return len(self.db.insert('recommendations', rows, ['stock_id', 'recommended_date'], merge=True))
+    
+    def _rpc_save_sentiment_aggregate(self, args: Dict) -> None:
+        aggregate = args['aggregate']
+        weights = {row['article_id']: row['aggregate_weight'] for row in args.get('weights') or []}
+        for row in self.db.rows('article_tickers', [('stock_id', f"eq.{aggregate['stock_id']}")]):
+            if row['article_id'] in weights:
+                row['aggregate_weight'] = weights[row['article_id']]
+        self.db._invalidate('article_tickers')
+        self.db.insert('sentiment_aggregates', [aggregate], ['stock_id'], merge=True)
+    
+    def _rpc_search_news(self, args: Dict) -> List[Dict]:
+        """Term-overlap stand-in for the search_news ranking over articles, with the same filters and keyset"""
+        terms = re.findall(r'\w+', (args.get('search_query') or '').lower())
+        stocks = {row['id']: row for row in self.db.tables.get('stocks', [])}
+        links: Dict[int, List[Dict]] = {}
+        for link in self.db.tables.get('article_tickers', []):
+            links.setdefault(link['article_id'], []).append(link)
+        
+        stock_id = None
+        if args.get('search_ticker'):
+            matches = self.db.rows('stocks', [('ticker', f"eq.{args['search_ticker']}")])
+            if not matches:
+                return []
+            stock_id = matches[0]['id']
+        
+        hits = []
+        for row in self.db.tables.get('articles', []):
+            linked = links.get(row['id'], [])
+            if not linked or (stock_id is not None and all(link['stock_id'] != stock_id for link in linked)):
+                continue
+            if args.get('published_from') and row['published_at'] < args['published_from']:
+                continue
+            if args.get('published_to') and row['published_at'] >= args['published_to']:
+                continue
+            sentiment = row.get('sentiment')
+            if args.get('min_sentiment') is not None and (sentiment is None or sentiment < args['min_sentiment']):
+                continue
+            if args.get('max_sentiment') is not None and (sentiment is None or sentiment > args['max_sentiment']):
+                continue
+            
+            rank = 0.0
+            if terms:
+                text = f"{row.get('headline') or ''} {row.get('content') or ''}".lower()
+                rank = sum(term in text for term in terms) / len(terms)
+                if rank == 0:
+                    continue
+            primary = sorted(linked, key=lambda link: (link['stock_id'] != stock_id, -(link.get('relevance') or 1), link['stock_id']))[0]
+            hits.append({
+                "id": row['id'],
+                "stock_id": primary['stock_id'],
+                "ticker": stocks.get(primary['stock_id'], {}).get('ticker'),
+                "tickers": sorted(stocks.get(link['stock_id'], {}).get('ticker') or '' for link in linked),
+                "headline": row['headline'],
+                "url": row['url'],
+                "source": row.get('source'),
+                "sentiment": sentiment,
+                "confidence": row.get('confidence'),
+                "published_at": row['published_at'],
+                "rank": rank
+            })
+        
+        hits.sort(key=lambda hit: (hit['rank'], hit['published_at'], hit['id']), reverse=True)
+        if args.get('after_id') is not None:
+            after = (args.get('after_rank') or 0.0, args['after_published_at'], args['after_id'])
+            hits = [hit for hit in hits if (hit['rank'], hit['published_at'], hit['id']) < after]
+        return hits[:max(1, min(int(args.get('page_size') or 20), 201))]
+
+def create_app(stocks: int = 200, days: int = 260, seed: int = 7, latency_ms: float = 0.0) -> Starlette:
+    from loadtest.seed import seed_database
+    
+    database = FakeDatabase()
+    seed_database(database, stocks=stocks, days=days, seed=seed)
+    return FakePostgrest(database, latency_ms=latency_ms).app
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Serve a seeded in-memory PostgREST stand-in for load tests")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--stocks", type=int, default=200)
+    parser.add_argument("--days", type=int, default=260)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=float(os.getenv("FAKE_POSTGREST_LATENCY_MS", "2")))
+    args = parser.parse_args()
+    
+    uvicorn.run(
+        create_app(args.stocks, args.days, args.seed, args.latency_ms),
+        host="127.0.0.1",
+        port=args.port,
+        log_level="warning"
+    )
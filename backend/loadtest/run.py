@@ -0,0 +1,420 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import httpx
+import numpy as np
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Closed-loop load test of the API against the seeded PostgREST stand-in. Each
+# concurrency level runs `concurrency` workers that issue requests back to back,
+# picking routes by weight, for a fixed duration; the report holds latency
+# percentiles and throughput per route plus the API process RSS, as JSON.
+#
+#   python -m loadtest.run --levels 1,8,32,64 --duration 20 --output report.json
+#   python -m loadtest.run --baseline previous.json --fail-on-slo
+
+PathBuilder = Callable[[random.Random, List[str]], str]
+
+def _ticker(rng: random.Random, tickers: List[str]) -> str:
+    return rng.choice(tickers)
+
+# (route, weight, path builder); weights follow a read-heavy dashboard mix
+MIX: List[Tuple[str, int, PathBuilder]] = [
+    ("GET /api/recommendations/", 15, lambda r, t: "/api/recommendations/?limit=20"),
+    ("GET /api/recommendations/today", 10, lambda r, t: f"/api/recommendations/today?market={r.choice(['US', 'KR'])}"),
+    ("GET /api/recommendations/top/{market}", 5, lambda r, t: f"/api/recommendations/top/{r.choice(['US', 'KR'])}"),
+    ("GET /api/recommendations/stock/{ticker}", 5, lambda r, t: f"/api/recommendations/stock/{_ticker(r, t)}"),
+    ("GET /api/recommendations/performance/summary", 2, lambda r, t: "/api/recommendations/performance/summary"),
+    ("GET /api/news/", 10, lambda r, t: f"/api/news/?ticker={_ticker(r, t)}&limit=50"),
+    ("GET /api/news/search", 5, lambda r, t: f"/api/news/search?q={r.choice(['earnings', 'buyback', 'guidance cut', 'contract', 'probe'])}"),
+    ("GET /api/news/sentiment/summary", 4, lambda r, t: f"/api/news/sentiment/summary?ticker={_ticker(r, t)}"),
+    ("GET /api/news/trending/top", 3, lambda r, t: "/api/news/trending/top"),
+    ("GET /api/stocks/", 8, lambda r, t: "/api/stocks/?limit=100"),
+    ("GET /api/stocks/{ticker}", 10, lambda r, t: f"/api/stocks/{_ticker(r, t)}"),
+    ("GET /api/stocks/{ticker}/prices", 8, lambda r, t: f"/api/stocks/{_ticker(r, t)}/prices?days=90"),
+    ("GET /api/stocks/{ticker}/performance", 4, lambda r, t: f"/api/stocks/{_ticker(r, t)}/performance?days=30"),
+    ("GET /api/analyze/technical/{ticker}", 6, lambda r, t: f"/api/analyze/technical/{_ticker(r, t)}"),
+    ("GET /api/analyze/rollups", 2, lambda r, t: f"/api/analyze/rollups?level={r.choice(['sector', 'industry', 'market'])}"),
+    ("GET /api/analyze/correlation", 2, lambda r, t: "/api/analyze/correlation?tickers=" + ",".join(r.sample(t, min(5, len(t)))))
+]
+
+# Routes that need the sentiment models (a local FinBERT or SENTIMENT_SERVER_SOCKET)
+SENTIMENT_MIX: List[Tuple[str, int, PathBuilder]] = [
+    ("GET /api/analyze/stock/{ticker}", 4, lambda r, t: f"/api/analyze/stock/{_ticker(r, t)}"),
+    ("GET /api/analyze/sentiment/{ticker}", 2, lambda r, t: f"/api/analyze/sentiment/{_ticker(r, t)}")
+]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process for {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=2.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"{url} did not come up within {timeout}s")
+
+def _process_tree(pid: int) -> List[int]:
+    """pid and all its descendants (uvicorn workers are children of the supervisor)"""
+    parents: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+    
+    tree = [pid]
+    for current in tree:
+        tree.extend(parents.get(current, []))
+    return tree
+
+def read_rss_mb(pid: Optional[int]) -> Optional[float]:
+    """Resident set size of a process tree in MiB (Linux /proc); None when unavailable"""
+    if pid is None:
+        return None
+    total = 0
+    for member in _process_tree(pid):
+        try:
+            with open(f'/proc/{member}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total / 1024 if total else None
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, float]:
+    if not latencies_ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    values = np.asarray(latencies_ms)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "mean": round(float(values.mean()), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+class LoadTest:
+    """Drives weighted route mixes at increasing concurrency against a running API"""
+    
+    def __init__(self, base_url: str, mix: List[Tuple[str, int, PathBuilder]], pid: Optional[int] = None, seed: int = 7, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.mix = mix
+        self.pid = pid
+        self.seed = seed
+        self.timeout = timeout
+        self.tickers: List[str] = []
+    
+    async def discover_tickers(self, client: httpx.AsyncClient):
+        response = await client.get("/api/stocks/?limit=200")
+        response.raise_for_status()
+        self.tickers = [row['ticker'] for row in response.json()]
+        if not self.tickers:
+            raise RuntimeError("No stocks returned by /api/stocks/; is the database seeded?")
+    
+    async def warm_up(self, client: httpx.AsyncClient):
+        """One request per route so first-use loads (price rings, caches) are not measured"""
+        rng = random.Random(self.seed)
+        for name, _, build in self.mix:
+            try:
+                await client.get(build(rng, self.tickers))
+            except httpx.HTTPError as e:
+                print(f"Warm-up request for {name} failed: {e}")
+    
+    async def _sample_rss(self, samples: List[float], stop: asyncio.Event):
+        while not stop.is_set():
+            rss = read_rss_mb(self.pid)
+            if rss is not None:
+                samples.append(rss)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=0.5)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def run_level(self, scenario: str, mix: List[Tuple[str, int, PathBuilder]], concurrency: int, duration: float) -> Dict:
+        names = [name for name, _, _ in mix]
+        weights = [weight for _, weight, _ in mix]
+        builders = {name: build for name, _, build in mix}
+        records: Dict[str, List[float]] = {name: [] for name in names}
+        errors: Dict[str, int] = {name: 0 for name in names}
+        statuses: Dict[str, Dict[str, int]] = {name: {} for name in names}
+        
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            deadline = time.perf_counter() + duration
+            
+            async def worker(index: int):
+                rng = random.Random(self.seed * 1000 + index)
+                while time.perf_counter() < deadline:
+                    name = rng.choices(names, weights)[0]
+                    path = builders[name](rng, self.tickers)
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(path)
+                        status = str(response.status_code)
+                        ok = response.status_code < 400
+                    except httpx.HTTPError as e:
+                        status = type(e).__name__
+                        ok = False
+                    records[name].append((time.perf_counter() - started) * 1000)
+                    statuses[name][status] = statuses[name].get(status, 0) + 1
+                    if not ok:
+                        errors[name] += 1
+            
+            rss_samples: List[float] = []
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(self._sample_rss(rss_samples, stop))
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(i) for i in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await sampler
+        
+        all_latencies = [latency for name in names for latency in records[name]]
+        total_errors = sum(errors.values())
+        return {
+            "scenario": scenario,
+            "concurrency": concurrency,
+            "duration_s": round(elapsed, 2),
+            "requests": len(all_latencies),
+            "errors": total_errors,
+            "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+            "throughput_rps": round(len(all_latencies) / elapsed, 2),
+            "latency_ms": summarize_latencies(all_latencies),
+            "rss_mb": {
+                "start": round(rss_samples[0], 1) if rss_samples else None,
+                "peak": round(max(rss_samples), 1) if rss_samples else None,
+                "end": round(rss_samples[-1], 1) if rss_samples else None
+            },
+            "endpoints": {
+                name: {
+                    "requests": len(records[name]),
+                    "errors": errors[name],
+                    "statuses": statuses[name],
+                    "throughput_rps": round(len(records[name]) / elapsed, 2),
+                    "latency_ms": summarize_latencies(records[name])
+                }
+                for name in names if records[name]
+            }
+        }
+    
+    async def run(self, levels: List[int], duration: float, isolate: bool = False) -> List[Dict]:
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout) as client:
+            await self.discover_tickers(client)
+            await self.warm_up(client)
+        
+        runs = []
+        for concurrency in levels:
+            run = await self.run_level("mix", self.mix, concurrency, duration)
+            print(
+                f"mix c={concurrency}: {run['throughput_rps']} req/s, p50 {run['latency_ms']['p50']}ms, "
+                f"p99 {run['latency_ms']['p99']}ms, errors {run['errors']}, peak RSS {run['rss_mb']['peak']} MiB"
+            )
+            runs.append(run)
+            
+            # Each route alone, so throughput and RSS can be attributed to it
+            if isolate:
+                for entry in self.mix:
+                    run = await self.run_level(entry[0], [entry], concurrency, duration)
+                    print(f"{entry[0]} c={concurrency}: {run['throughput_rps']} req/s, p99 {run['latency_ms']['p99']}ms, peak RSS {run['rss_mb']['peak']} MiB")
+                    runs.append(run)
+        return runs
+
+def find_saturation(runs: List[Dict], min_gain: float = 0.1) -> Optional[Dict]:
+    """First mix level where more concurrency stopped raising throughput by min_gain"""
+    mix_runs = sorted((run for run in runs if run['scenario'] == 'mix'), key=lambda run: run['concurrency'])
+    for previous, current in zip(mix_runs, mix_runs[1:]):
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 + min_gain):
+            return {
+                "concurrency": previous['concurrency'],
+                "throughput_rps": previous['throughput_rps'],
+                "p99_ms": previous['latency_ms']['p99']
+            }
+    return None
+
+def find_slo_violations(runs: List[Dict], p99_ms: float, max_error_rate: float) -> List[Dict]:
+    violations = []
+    for run in runs:
+        for name, endpoint in run['endpoints'].items():
+            error_rate = endpoint['errors'] / endpoint['requests'] if endpoint['requests'] else 0.0
+            if endpoint['latency_ms']['p99'] > p99_ms or error_rate > max_error_rate:
+                violations.append({
+                    "scenario": run['scenario'],
+                    "concurrency": run['concurrency'],
+                    "endpoint": name,
+                    "p99_ms": endpoint['latency_ms']['p99'],
+                    "error_rate": round(error_rate, 4)
+                })
+    return violations
+
+def compare_reports(current: Dict, baseline: Dict) -> List[Dict]:
+    """Relative p99 and throughput change per (scenario, concurrency, endpoint) present in both reports"""
+    previous = {
+        (run['scenario'], run['concurrency'], name): endpoint
+        for run in baseline.get('runs', [])
+        for name, endpoint in run['endpoints'].items()
+    }
+    changes = []
+    for run in current['runs']:
+        for name, endpoint in run['endpoints'].items():
+            before = previous.get((run['scenario'], run['concurrency'], name))
+            if not before:
+                continue
+            changes.append({
+                "scenario": run['scenario'],
+                "concurrency": run['concurrency'],
+                "endpoint": name,
+                "p99_change": round(endpoint['latency_ms']['p99'] / before['latency_ms']['p99'] - 1, 4) if before['latency_ms']['p99'] else None,
+                "throughput_change": round(endpoint['throughput_rps'] / before['throughput_rps'] - 1, 4) if before['throughput_rps'] else None
+            })
+    return changes
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def start_stack(args) -> Tuple[str, List[subprocess.Popen], int]:
+    """Boot the PostgREST stand-in and the API against it; returns the API URL, processes and API pid"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fake_port = _free_port()
+    api_port = _free_port()
+    
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "loadtest.fake_postgrest", "--port", str(fake_port), "--stocks", str(args.stocks),
+         "--days", str(args.days), "--seed", str(args.seed), "--latency-ms", str(args.db_latency_ms)],
+        cwd=backend_dir
+    )
+    processes = [fake]
+    try:
+        _wait_until_up(f"http://127.0.0.1:{fake_port}/rest/v1/", fake)
+        
+        env = {
+            **os.environ,
+            "SUPABASE_URL": f"http://127.0.0.1:{fake_port}",
+            # Any JWT-shaped string passes the client's key check; the stand-in ignores auth
+            "SUPABASE_SERVICE_ROLE_KEY": "loadtest.loadtest.loadtest",
+            "PRICE_PROVIDER": "file"
+        }
+        if not args.with_sentiment:
+            # Keep API workers from loading FinBERT; sentiment routes are excluded from the mix
+            env["SENTIMENT_SERVER_SOCKET"] = os.path.join(backend_dir, ".loadtest-no-sentiment.sock")
+        
+        api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(api_port),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=backend_dir,
+            env=env
+        )
+        processes.append(api)
+        _wait_until_up(f"http://127.0.0.1:{api_port}/health", api)
+    except Exception:
+        stop_stack(processes)
+        raise
+    return f"http://127.0.0.1:{api_port}", processes, api.pid
+
+def stop_stack(processes: List[subprocess.Popen]):
+    for process in reversed(processes):
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API and write a latency/throughput/RSS report as JSON")
+    parser.add_argument("--levels", default="1,8,32,64", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--isolate", action="store_true", help="Also drive each route alone at every level")
+    parser.add_argument("--with-sentiment", action="store_true", help="Include routes that run the sentiment models")
+    parser.add_argument("--target", help="Existing API base URL instead of booting the stack")
+    parser.add_argument("--pid", type=int, help="API process id for RSS sampling with --target")
+    parser.add_argument("--workers", type=int, default=1, help="Uvicorn workers for the booted API")
+    parser.add_argument("--stocks", type=int, default=200)
+    parser.add_argument("--days", type=int, default=260)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="Simulated round trip to the database")
+    parser.add_argument("--slo-p99-ms", type=float, default=500.0)
+    parser.add_argument("--slo-error-rate", type=float, default=0.01)
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--output", default="loadtest-report.json")
+    parser.add_argument("--fail-on-slo", action="store_true", help="Exit non-zero when an SLO is violated")
+    args = parser.parse_args()
+    
+    mix = MIX + (SENTIMENT_MIX if args.with_sentiment else [])
+    levels = [int(level) for level in args.levels.split(',')]
+    
+    processes: List[subprocess.Popen] = []
+    if args.target:
+        base_url, pid = args.target, args.pid
+    else:
+        base_url, processes, pid = start_stack(args)
+    
+    try:
+        runs = asyncio.run(LoadTest(base_url, mix, pid=pid, seed=args.seed).run(levels, args.duration, args.isolate))
+    finally:
+        stop_stack(processes)
+    
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "target": args.target or "booted",
+            "workers": None if args.target else args.workers,
+            "dataset": {"stocks": args.stocks, "days": args.days, "seed": args.seed},
+            "db_latency_ms": None if args.target else args.db_latency_ms,
+            "levels": levels,
+            "duration_s": args.duration
+        },
+        "runs": runs,
+        "saturation": find_saturation(runs),
+        "slo": {
+            "p99_ms": args.slo_p99_ms,
+            "error_rate": args.slo_error_rate,
+            "violations": find_slo_violations(runs, args.slo_p99_ms, args.slo_error_rate)
+        }
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare_reports(report, json.load(f))
+    
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print(f"Saturation: {report['saturation']}")
+    print(f"SLO violations: {len(report['slo']['violations'])}")
+    print(f"Report written to {args.output}")
+    
+    if args.fail_on_slo and report['slo']['violations']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import hashlib
+import numpy as np
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List
+
+SECTORS = {
+    "Technology": ["Semiconductors", "Software", "Hardware"],
+    "Financials": ["Banks", "Insurance", "Capital Markets"],
+    "Healthcare": ["Biotechnology", "Pharmaceuticals", "Medical Devices"],
+    "Consumer": ["Retail", "Automobiles", "Food & Beverage"],
+    "Energy": ["Oil & Gas", "Renewables"],
+    "Industrials": ["Machinery", "Aerospace", "Shipbuilding"]
+}
+
+SOURCES = ["Reuters", "Bloomberg", "Yonhap", "MarketWatch", "Hankyung", "CNBC"]
+
+HEADLINES = [
+    "{name} beats quarterly earnings estimates as {industry} demand recovers",
+    "{name} shares slide after guidance cut",
+    "Analysts upgrade {name} on strong {industry} outlook",
+    "{name} announces share buyback program",
+    "{name} faces regulatory probe over accounting practices",
+    "{name} expands {industry} capacity with new plant",
+    "{name} CEO signals cautious second half",
+    "{name} wins major supply contract"
+]
+
+def _trading_days(end: date, count: int) -> List[date]:
+    days = []
+    current = end
+    while len(days) < count:
+        if current.weekday() < 5:
+            days.append(current)
+        current -= timedelta(days=1)
+    return days[::-1]
+
+def build_rows(stocks: int = 200, days: int = 260, seed: int = 7, news_per_stock: int = 40) -> Dict[str, List[Dict]]:
+    """Deterministic synthetic stocks, daily prices, news and recommendations ending today"""
+    rng = np.random.default_rng(seed)
+    today = datetime.now().date()
+    created_at = datetime.combine(today - timedelta(days=days * 2), time(0, 0), tzinfo=timezone.utc).isoformat()
+    sector_names = list(SECTORS)
+    
+    stock_rows = []
+    for i in range(stocks):
+        market = "US" if i % 2 == 0 else "KR"
+        sector = sector_names[i % len(sector_names)]
+        industry = SECTORS[sector][(i // len(sector_names)) % len(SECTORS[sector])]
+        stock_rows.append({
+            "id": i + 1,
+            "ticker": f"SYN{i:04d}" if market == "US" else f"{100000 + i:06d}.KS",
+            "name": f"Synthetic {sector} {i}",
+            "market": market,
+            "sector": sector,
+            "industry": industry,
+            "market_cap": int(10 ** rng.uniform(8, 12)),
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+    
+    # Geometric random walks with per-stock drift and volatility
+    trading_days = _trading_days(today, days)
+    returns = rng.normal(rng.normal(0.0003, 0.0005, (stocks, 1)), rng.uniform(0.01, 0.03, (stocks, 1)), (stocks, days))
+    closes = rng.uniform(20, 500, (stocks, 1)) * np.exp(np.cumsum(returns, axis=1))
+    spreads = np.abs(rng.normal(0, 0.01, (stocks, days)))
+    volumes = rng.lognormal(13, 0.6, (stocks, days)).astype(np.int64)
+    
+    price_rows = []
+    price_id = 0
+    for s in range(stocks):
+        for d, day in enumerate(trading_days):
+            close = float(closes[s, d])
+            previous = float(closes[s, d - 1]) if d else close
+            price_id += 1
+            price_rows.append({
+                "id": price_id,
+                "stock_id": s + 1,
+                "date": day.isoformat(),
+                "open": round(previous, 4),
+                "high": round(max(previous, close) * (1 + spreads[s, d]), 4),
+                "low": round(min(previous, close) * (1 - spreads[s, d]), 4),
+                "close": round(close, 4),
+                "volume": int(volumes[s, d]),
+                "adjusted_close": round(close, 4),
+                "created_at": datetime.combine(day, time(21, 0), tzinfo=timezone.utc).isoformat()
+            })
+    
+    news_rows = []
+    now = datetime.now(timezone.utc)
+    news_id = 0
+    for s, stock in enumerate(stock_rows):
+        ages = np.sort(rng.exponential(4 * 24 * 3600, news_per_stock))
+        for age in ages:
+            news_id += 1
+            template = HEADLINES[int(rng.integers(len(HEADLINES)))]
+            headline = template.format(name=stock['name'], industry=stock['industry'].lower())
+            url = f"https://news.example.com/{stock['ticker'].lower()}/{news_id}"
+            news_rows.append({
+                "id": news_id,
+                "stock_id": s + 1,
+                "headline": headline,
+                "url": url,
+                "url_hash": hashlib.sha256(url.encode('utf-8')).hexdigest(),
+                "content": f"{headline}. " + " ".join(["Market participants weighed the announcement against sector peers."] * int(rng.integers(3, 30))),
+                "sentiment": round(float(np.clip(rng.normal(0.05, 0.4), -1, 1)), 2),
+                "confidence": round(float(rng.uniform(0.3, 0.99)), 2),
+                "source": SOURCES[int(rng.integers(len(SOURCES)))],
+                "published_at": (now - timedelta(seconds=float(age))).isoformat(),
+                "created_at": (now - timedelta(seconds=float(age))).isoformat()
+            })
+    
+    # Twenty recommendations a day for the last month, today included
+    recommendation_rows = []
+    recommendation_id = 0
+    for offset in range(30):
+        day = today - timedelta(days=offset)
+        for stock_index in rng.choice(stocks, size=min(20, stocks), replace=False):
+            components = rng.uniform(0.2, 1.0, 4).round(2)
+            recommendation_id += 1
+            recommendation_rows.append({
+                "id": recommendation_id,
+                "stock_id": int(stock_index) + 1,
+                "score": round(float(components.mean()), 2),
+                "reason": "Synthetic recommendation for load testing",
+                "momentum_score": float(components[0]),
+                "sentiment_score": float(components[1]),
+                "volume_score": float(components[2]),
+                "technical_score": float(components[3]),
+                "recommended_date": day.isoformat(),
+                "created_at": datetime.combine(day, time(6, 0), tzinfo=timezone.utc).isoformat()
+            })
+    
+    return {
+        "stocks": stock_rows,
+        "stock_prices": price_rows,
+        "news": news_rows,
+        "recommendations": recommendation_rows
+    }
+
+def seed_database(database, stocks: int = 200, days: int = 260, seed: int = 7) -> Dict[str, int]:
+    """Load synthetic rows into a FakeDatabase; returns row counts per table"""
+    counts = {}
+    for table, rows in build_rows(stocks, days, seed).items():
+        database.tables[table] = rows
+        database._next_id[table] = len(rows)
+        counts[table] = len(rows)
+    return counts
@@ -1,5 +1,4 @@
 import { serve } from "https://deno.land/std@0.168.0/http/server.ts"
-import { createClient } from 'https://esm.sh/@supabase/supabase-js@2'
 
 const corsHeaders = {
   'Access-Control-Allow-Origin': '*',
@@ -13,26 +12,23 @@ serve(async (req) => {
   }
 
   try {
-    // Initialize Supabase client
-    const supabaseClient = createClient(
-      Deno.env.get('SUPABASE_URL') ?? '',
-      Deno.env.get('SUPABASE_SERVICE_ROLE_KEY') ?? ''
-    )
-
     // Get AI server URL
     const aiServerUrl = Deno.env.get('AI_SERVER_URL')
     if (!aiServerUrl) {
       throw new Error('AI_SERVER_URL environment variable is not set')
     }
 
-    // Trigger AI analysis
+    // Trigger AI analysis; the AI server persists recommendations itself
+    // with one batched upsert and only returns a summary
     const analysisResponse = await fetch(`${aiServerUrl}/api/analyze/daily`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
       body: JSON.stringify({
-        date: new Date().toISOString().split('T')[0]
+        date: new Date().toISOString().split('T')[0],
+        persist: true,
+        transactional: true
       })
     })
 
@@ -42,35 +38,27 @@ serve(async (req) => {
 
     const analysisResult = await analysisResponse.json()
 
-    // Store recommendations in database
-    if (analysisResult.recommendations && analysisResult.recommendations.length > 0) {
-      for (const rec of analysisResult.recommendations) {
-        const { error } = await supabaseClient
-          .from('recommendations')
-          .upsert({
-            stock_id: rec.stock_id,
-            score: rec.score,
-            reason: rec.reason,
-            momentum_score: rec.momentum_score,
-            sentiment_score: rec.sentiment_score,
-            volume_score: rec.volume_score,
-            technical_score: rec.technical_score,
-            recommended_date: new Date().toISOString().split('T')[0]
-          }, {
-            onConflict: 'stock_id,recommended_date'
-          })
-
-        if (error) {
-          console.error('Error storing recommendation:', error)
-        }
-      }
+    if (!analysisResult.success) {
+      // The save is all-or-nothing, so a failed save means nothing was stored
+      console.error('Error storing recommendations:', analysisResult.saved)
+      return new Response(
+        JSON.stringify({
+          success: false,
+          error: 'Failed to store recommendations',
+          failed_count: analysisResult.saved?.failed_count || 0
+        }),
+        {
+          headers: { ...corsHeaders, 'Content-Type': 'application/json' },
+          status: 502,
+        },
+      )
     }
 
     return new Response(
       JSON.stringify({
         success: true,
         message: 'Daily analysis completed successfully',
-        recommendations_count: analysisResult.recommendations?.length || 0
+        recommendations_count: analysisResult.saved?.saved_count || 0
       }),
       {
         headers: { ...corsHeaders, 'Content-Type': 'application/json' },
@@ -0,0 +1,49 @@
+-- Batched, all-or-nothing upsert of daily recommendations.
+-- The whole payload runs inside the function's transaction, so either every
+-- row is written or none is.
+CREATE OR REPLACE FUNCTION upsert_recommendations(payload JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  affected INTEGER;
+BEGIN
+  INSERT INTO recommendations (
+    stock_id,
+    score,
+    reason,
+    momentum_score,
+    sentiment_score,
+    volume_score,
+    technical_score,
+    recommended_date
+  )
+  SELECT
+    r.stock_id,
+    r.score,
+    r.reason,
+    r.momentum_score,
+    r.sentiment_score,
+    r.volume_score,
+    r.technical_score,
+    r.recommended_date
+  FROM jsonb_to_recordset(payload) AS r(
+    stock_id INTEGER,
+    score NUMERIC(3, 2),
+    reason TEXT,
+    momentum_score NUMERIC(3, 2),
+    sentiment_score NUMERIC(3, 2),
+    volume_score NUMERIC(3, 2),
+    technical_score NUMERIC(3, 2),
+    recommended_date DATE
+  )
+  ON CONFLICT (stock_id, recommended_date) DO UPDATE SET
+    score = EXCLUDED.score,
+    reason = EXCLUDED.reason,
+    momentum_score = EXCLUDED.momentum_score,
+    sentiment_score = EXCLUDED.sentiment_score,
+    volume_score = EXCLUDED.volume_score,
+    technical_score = EXCLUDED.technical_score;
+
+  GET DIAGNOSTICS affected = ROW_COUNT;
+  RETURN affected;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
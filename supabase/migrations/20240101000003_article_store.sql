@@ -0,0 +1,79 @@
+-- Article store keyed by URL hash, shared across every ticker an article mentions.
+-- Sentiment is computed once per article and fanned out through article_tickers.
+CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+
+CREATE TABLE articles (
+  id SERIAL PRIMARY KEY,
+  url_hash CHAR(64) NOT NULL UNIQUE,
+  url TEXT NOT NULL,
+  headline TEXT NOT NULL,
+  content TEXT,
+  source VARCHAR(100),
+  published_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  sentiment NUMERIC(3, 2) CHECK (sentiment >= -1 AND sentiment <= 1),
+  confidence NUMERIC(3, 2) CHECK (confidence >= 0 AND confidence <= 1),
+  scored_at TIMESTAMP WITH TIME ZONE,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE article_tickers (
+  article_id INTEGER REFERENCES articles(id) ON DELETE CASCADE,
+  stock_id INTEGER REFERENCES stocks(id) ON DELETE CASCADE,
+  relevance NUMERIC(3, 2) NOT NULL DEFAULT 1 CHECK (relevance > 0 AND relevance <= 1),
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (article_id, stock_id)
+);
+
+CREATE INDEX idx_articles_published_at ON articles(published_at DESC);
+CREATE INDEX idx_articles_unscored ON articles(published_at DESC) WHERE scored_at IS NULL;
+CREATE INDEX idx_article_tickers_stock_id ON article_tickers(stock_id);
+
+ALTER TABLE articles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE article_tickers ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read access" ON articles FOR SELECT USING (true);
+CREATE POLICY "Allow public read access" ON article_tickers FOR SELECT USING (true);
+
+-- Backfill from the per-stock news table (one article per URL)
+INSERT INTO articles (url_hash, url, headline, content, source, published_at)
+SELECT DISTINCT ON (url)
+  encode(digest(url, 'sha256'), 'hex'),
+  url,
+  headline,
+  content,
+  source,
+  published_at
+FROM news
+ORDER BY url, published_at DESC
+ON CONFLICT (url_hash) DO NOTHING;
+
+INSERT INTO article_tickers (article_id, stock_id)
+SELECT a.id, n.stock_id
+FROM news n
+JOIN articles a ON a.url_hash = encode(digest(n.url, 'sha256'), 'hex')
+WHERE n.stock_id IS NOT NULL
+ON CONFLICT (article_id, stock_id) DO NOTHING;
+
+-- Keep the article store in sync with collectors that still write to news
+CREATE OR REPLACE FUNCTION sync_news_to_articles()
+RETURNS TRIGGER AS $$
+DECLARE
+  target_article_id INTEGER;
+BEGIN
+  INSERT INTO articles (url_hash, url, headline, content, source, published_at)
+  VALUES (encode(digest(NEW.url, 'sha256'), 'hex'), NEW.url, NEW.headline, NEW.content, NEW.source, NEW.published_at)
+  ON CONFLICT (url_hash) DO UPDATE SET url_hash = EXCLUDED.url_hash
+  RETURNING id INTO target_article_id;
+
+  IF NEW.stock_id IS NOT NULL THEN
+    INSERT INTO article_tickers (article_id, stock_id)
+    VALUES (target_article_id, NEW.stock_id)
+    ON CONFLICT (article_id, stock_id) DO NOTHING;
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER sync_news_to_articles AFTER INSERT OR UPDATE ON news
+    FOR EACH ROW EXECUTE FUNCTION sync_news_to_articles();
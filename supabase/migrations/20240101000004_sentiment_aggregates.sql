@@ -0,0 +1,24 @@
+-- Per-ticker, time-decayed sentiment aggregate maintained incrementally.
+-- Sums are stored relative to as_of; since every term decays by the same
+-- factor, sentiment = weighted_sentiment_sum / weight_sum at any time.
+CREATE TABLE sentiment_aggregates (
+  stock_id INTEGER PRIMARY KEY REFERENCES stocks(id) ON DELETE CASCADE,
+  weighted_sentiment_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  weighted_confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  weight_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  article_count INTEGER NOT NULL DEFAULT 0,
+  half_life_hours DOUBLE PRECISION NOT NULL,
+  window_days INTEGER NOT NULL,
+  last_published_at TIMESTAMP WITH TIME ZONE,
+  as_of TIMESTAMP WITH TIME ZONE NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Base weight each article contributed, so it can be subtracted exactly on expiry
+ALTER TABLE article_tickers ADD COLUMN aggregate_weight DOUBLE PRECISION;
+
+ALTER TABLE sentiment_aggregates ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON sentiment_aggregates FOR SELECT USING (true);
+
+CREATE TRIGGER update_sentiment_aggregates_updated_at BEFORE UPDATE ON sentiment_aggregates
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
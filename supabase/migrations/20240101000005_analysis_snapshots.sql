@@ -0,0 +1,19 @@
+-- Per-(stock, date) component scores, so point-in-time analysis of past
+-- dates is served from here instead of being recomputed.
+CREATE TABLE analysis_snapshots (
+  stock_id INTEGER REFERENCES stocks(id) ON DELETE CASCADE,
+  analysis_date DATE NOT NULL,
+  model_version VARCHAR(20) NOT NULL,
+  momentum_score DOUBLE PRECISION,
+  sentiment_score DOUBLE PRECISION,
+  sentiment_confidence DOUBLE PRECISION,
+  volume_score DOUBLE PRECISION,
+  technical_score DOUBLE PRECISION,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (stock_id, analysis_date, model_version)
+);
+
+CREATE INDEX idx_analysis_snapshots_date ON analysis_snapshots(analysis_date DESC);
+
+ALTER TABLE analysis_snapshots ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON analysis_snapshots FOR SELECT USING (true);
@@ -0,0 +1,35 @@
+-- 1-minute intraday bars, range-partitioned by month on the bar timestamp.
+-- Coarser intervals (5m, 15m, 1h) are resampled on the fly by the AI server.
+CREATE TABLE intraday_bars (
+  stock_id INTEGER NOT NULL REFERENCES stocks(id) ON DELETE CASCADE,
+  ts TIMESTAMP WITH TIME ZONE NOT NULL,
+  open REAL,
+  high REAL,
+  low REAL,
+  close REAL,
+  volume BIGINT,
+  PRIMARY KEY (stock_id, ts)
+) PARTITION BY RANGE (ts);
+
+CREATE TABLE intraday_bars_default PARTITION OF intraday_bars DEFAULT;
+
+-- Create the monthly partition containing a given timestamp if it does not exist yet
+CREATE OR REPLACE FUNCTION create_intraday_partition(month_start DATE)
+RETURNS VOID AS $$
+DECLARE
+  start_date DATE := date_trunc('month', month_start)::DATE;
+  end_date DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::DATE;
+  partition_name TEXT := 'intraday_bars_' || to_char(start_date, 'YYYY_MM');
+BEGIN
+  EXECUTE format(
+    'CREATE TABLE IF NOT EXISTS %I PARTITION OF intraday_bars FOR VALUES FROM (%L) TO (%L)',
+    partition_name, start_date, end_date
+  );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+SELECT create_intraday_partition(CURRENT_DATE);
+SELECT create_intraday_partition((CURRENT_DATE + INTERVAL '1 month')::DATE);
+
+ALTER TABLE intraday_bars ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON intraday_bars FOR SELECT USING (true);
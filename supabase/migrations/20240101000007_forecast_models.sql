@@ -0,0 +1,21 @@
+-- Cached per-stock return forecasts. params holds the model state needed to
+-- warm-start the next refit (ridge sufficient statistics or Prophet stan_init).
+CREATE TABLE forecast_models (
+  stock_id INTEGER PRIMARY KEY REFERENCES stocks(id) ON DELETE CASCADE,
+  model VARCHAR(20) NOT NULL,
+  horizon INTEGER NOT NULL,
+  history_start DATE NOT NULL,
+  last_bar_date DATE NOT NULL,
+  params JSONB NOT NULL,
+  expected_return DOUBLE PRECISION,
+  fitted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE forecast_models ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON forecast_models FOR SELECT USING (true);
+
+-- Latest bar per stock, used to find models that are behind their data
+CREATE VIEW latest_price_dates AS
+SELECT stock_id, MAX(date) AS last_date
+FROM stock_prices
+GROUP BY stock_id;
@@ -0,0 +1,6 @@
+-- Keyset pagination orders every listing by its natural index order plus id as
+-- a tie-breaker; these indexes cover those orders so each page is an index range scan.
+CREATE INDEX idx_news_stock_id_published_at_id ON news(stock_id, published_at DESC, id DESC);
+CREATE INDEX idx_news_published_at_id ON news(published_at DESC, id DESC);
+CREATE INDEX idx_recommendations_date_score_id ON recommendations(recommended_date, score DESC, id DESC);
+CREATE INDEX idx_recommendations_stock_id_date_id ON recommendations(stock_id, recommended_date DESC, id DESC);
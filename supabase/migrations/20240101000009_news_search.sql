@@ -0,0 +1,98 @@
+-- Indexed news search: weighted full-text vector (headline A, content B) plus a
+-- trigram index on headlines for fuzzy and partial-word matches.
+ALTER TABLE news ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+  setweight(to_tsvector('english', coalesce(headline, '')), 'A') ||
+  setweight(to_tsvector('english', coalesce(content, '')), 'B')
+) STORED;
+
+CREATE INDEX idx_news_search_vector ON news USING GIN(search_vector);
+CREATE INDEX idx_news_headline_trgm ON news USING GIN(headline gin_trgm_ops);
+CREATE INDEX idx_news_sentiment_published_at ON news(sentiment, published_at DESC);
+
+-- Ranked, keyset-paginated search. Every filter is optional. The statement is
+-- built per call so the planner sees only the filters actually in use instead
+-- of one generic plan full of "param IS NULL OR ..." branches.
+--
+-- With a query, hits are ordered by rank (full-text cover density plus headline
+-- trigram similarity); without one, newest first straight off the
+-- (published_at, id) indexes. Pass the last row's (rank, published_at, id) as
+-- after_* to fetch the next page.
+CREATE OR REPLACE FUNCTION search_news(
+  search_query TEXT DEFAULT NULL,
+  search_ticker TEXT DEFAULT NULL,
+  published_from TIMESTAMPTZ DEFAULT NULL,
+  published_to TIMESTAMPTZ DEFAULT NULL,
+  min_sentiment NUMERIC DEFAULT NULL,
+  max_sentiment NUMERIC DEFAULT NULL,
+  page_size INTEGER DEFAULT 20,
+  after_rank REAL DEFAULT NULL,
+  after_published_at TIMESTAMPTZ DEFAULT NULL,
+  after_id INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+  id INTEGER,
+  stock_id INTEGER,
+  ticker VARCHAR,
+  headline TEXT,
+  url TEXT,
+  source VARCHAR,
+  sentiment NUMERIC,
+  confidence NUMERIC,
+  published_at TIMESTAMPTZ,
+  rank REAL
+) AS $$
+DECLARE
+  has_query BOOLEAN := search_query IS NOT NULL AND btrim(search_query) <> '';
+  target_stock INTEGER;
+  filters TEXT := '';
+  statement TEXT;
+BEGIN
+  IF search_ticker IS NOT NULL THEN
+    SELECT s.id INTO target_stock FROM stocks s WHERE s.ticker = search_ticker;
+    IF target_stock IS NULL THEN
+      RETURN;
+    END IF;
+    filters := filters || ' AND n.stock_id = $2';
+  END IF;
+
+  IF published_from IS NOT NULL THEN
+    filters := filters || ' AND n.published_at >= $3';
+  END IF;
+  IF published_to IS NOT NULL THEN
+    filters := filters || ' AND n.published_at < $4';
+  END IF;
+  IF min_sentiment IS NOT NULL THEN
+    filters := filters || ' AND n.sentiment >= $5';
+  END IF;
+  IF max_sentiment IS NOT NULL THEN
+    filters := filters || ' AND n.sentiment <= $6';
+  END IF;
+
+  IF has_query THEN
+    statement :=
+      'SELECT * FROM ('
+      || ' SELECT n.id, n.stock_id, s.ticker::VARCHAR, n.headline, n.url, n.source::VARCHAR,'
+      || '   n.sentiment::NUMERIC, n.confidence::NUMERIC, n.published_at,'
+      || '   (ts_rank_cd(n.search_vector, websearch_to_tsquery(''english'', $1)) + similarity(n.headline, $1))::REAL AS rank'
+      || ' FROM news n JOIN stocks s ON s.id = n.stock_id'
+      || ' WHERE (n.search_vector @@ websearch_to_tsquery(''english'', $1) OR n.headline % $1)'
+      || filters
+      || ') m'
+      || CASE WHEN after_id IS NOT NULL THEN ' WHERE (m.rank, m.published_at, m.id) < ($7, $8, $9)' ELSE '' END
+      || ' ORDER BY m.rank DESC, m.published_at DESC, m.id DESC LIMIT $10';
+  ELSE
+    statement :=
+      'SELECT n.id, n.stock_id, s.ticker::VARCHAR, n.headline, n.url, n.source::VARCHAR,'
+      || ' n.sentiment::NUMERIC, n.confidence::NUMERIC, n.published_at, 0::REAL AS rank'
+      || ' FROM news n JOIN stocks s ON s.id = n.stock_id'
+      || ' WHERE true'
+      || filters
+      || CASE WHEN after_id IS NOT NULL THEN ' AND (n.published_at, n.id) < ($8, $9)' ELSE '' END
+      || ' ORDER BY n.published_at DESC, n.id DESC LIMIT $10';
+  END IF;
+
+  RETURN QUERY EXECUTE statement
+    USING search_query, target_stock, published_from, published_to, min_sentiment, max_sentiment,
+          after_rank, after_published_at, after_id, LEAST(GREATEST(page_size, 1), 200);
+END;
+$$ LANGUAGE plpgsql STABLE;
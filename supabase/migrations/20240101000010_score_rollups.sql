@@ -0,0 +1,24 @@
+-- Daily sector/industry/market averages of the per-ticker scores, written by
+-- the daily analysis next to analysis_snapshots.
+CREATE TABLE score_rollups (
+  analysis_date DATE NOT NULL,
+  level VARCHAR(20) NOT NULL CHECK (level IN ('sector', 'industry', 'market')),
+  group_key VARCHAR(100) NOT NULL,
+  model_version VARCHAR(20) NOT NULL,
+  stock_count INTEGER NOT NULL,
+  avg_momentum_score DOUBLE PRECISION,
+  avg_sentiment_score DOUBLE PRECISION,
+  avg_volume_score DOUBLE PRECISION,
+  avg_technical_score DOUBLE PRECISION,
+  avg_final_score DOUBLE PRECISION,
+  final_score_std DOUBLE PRECISION,
+  buy_count INTEGER,
+  sell_count INTEGER,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (analysis_date, level, group_key, model_version)
+);
+
+CREATE INDEX idx_score_rollups_level_date ON score_rollups(level, model_version, analysis_date DESC);
+
+ALTER TABLE score_rollups ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON score_rollups FOR SELECT USING (true);
@@ -0,0 +1,53 @@
+-- Change detection for the daily analysis run.
+--
+-- ticker_activity: per stock, the newest price bar, the newest news item and
+-- how unusual the latest daily move is (|last return| / stddev of the previous
+-- ~20 returns).
+CREATE VIEW ticker_activity AS
+WITH recent AS (
+  SELECT
+    stock_id,
+    date,
+    close / NULLIF(LAG(close) OVER (PARTITION BY stock_id ORDER BY date), 0) - 1 AS daily_return,
+    ROW_NUMBER() OVER (PARTITION BY stock_id ORDER BY date DESC) AS age
+  FROM stock_prices
+  WHERE date >= CURRENT_DATE - 45
+),
+moves AS (
+  SELECT
+    stock_id,
+    MAX(ABS(daily_return)) FILTER (WHERE age = 1) / NULLIF(STDDEV_SAMP(daily_return) FILTER (WHERE age > 1), 0) AS move_z
+  FROM recent
+  GROUP BY stock_id
+),
+latest_prices AS (
+  SELECT stock_id, MAX(date) AS last_price_date FROM stock_prices GROUP BY stock_id
+),
+latest_news AS (
+  SELECT stock_id, MAX(published_at) AS last_news_at FROM news GROUP BY stock_id
+)
+SELECT
+  s.id AS stock_id,
+  s.ticker,
+  lp.last_price_date,
+  ln.last_news_at,
+  m.move_z
+FROM stocks s
+LEFT JOIN latest_prices lp ON lp.stock_id = s.id
+LEFT JOIN latest_news ln ON ln.stock_id = s.id
+LEFT JOIN moves m ON m.stock_id = s.id;
+
+-- What each ticker's last analysis saw, so unchanged tickers can carry their
+-- result forward instead of being re-analyzed.
+CREATE TABLE ticker_run_state (
+  stock_id INTEGER PRIMARY KEY REFERENCES stocks(id) ON DELETE CASCADE,
+  analyzed_date DATE NOT NULL,
+  price_watermark DATE,
+  news_watermark TIMESTAMP WITH TIME ZONE,
+  model_version VARCHAR(20) NOT NULL,
+  result JSONB NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE ticker_run_state ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON ticker_run_state FOR SELECT USING (true);
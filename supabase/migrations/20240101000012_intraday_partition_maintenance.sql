@@ -0,0 +1,69 @@
+-- Keep monthly intraday_bars partitions ahead of the data.
+-- The first migration only created this month's and next month's partitions, so later
+-- bars fell into intraday_bars_default, and a monthly partition whose range already has
+-- rows in the default partition cannot be created with CREATE TABLE ... PARTITION OF.
+
+-- Create (or repair) the monthly partition containing a date: rows for that month that
+-- landed in the default partition are moved into it before it is attached
+CREATE OR REPLACE FUNCTION create_intraday_partition(month_start DATE)
+RETURNS VOID AS $$
+DECLARE
+  start_date DATE := date_trunc('month', month_start)::DATE;
+  end_date DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::DATE;
+  partition_name TEXT := 'intraday_bars_' || to_char(start_date, 'YYYY_MM');
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM pg_inherits
+    WHERE inhparent = 'intraday_bars'::regclass
+      AND inhrelid = to_regclass(partition_name)
+  ) THEN
+    RETURN;
+  END IF;
+
+  -- Serialize with concurrent writers while rows move out of the default partition
+  LOCK TABLE intraday_bars_default IN EXCLUSIVE MODE;
+
+  EXECUTE format(
+    'CREATE TABLE IF NOT EXISTS %I (LIKE intraday_bars INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+    partition_name
+  );
+  EXECUTE format(
+    'WITH moved AS (DELETE FROM intraday_bars_default WHERE ts >= %L AND ts < %L RETURNING *)
+     INSERT INTO %I SELECT * FROM moved',
+    start_date, end_date, partition_name
+  );
+  EXECUTE format(
+    'ALTER TABLE intraday_bars ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+    partition_name, start_date, end_date
+  );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Partitions for every month already sitting in the default partition, plus the current
+-- month and the next months_ahead months
+CREATE OR REPLACE FUNCTION ensure_intraday_partitions(months_ahead INTEGER DEFAULT 2)
+RETURNS VOID AS $$
+DECLARE
+  bar_month DATE;
+BEGIN
+  FOR bar_month IN SELECT DISTINCT date_trunc('month', ts)::DATE FROM intraday_bars_default LOOP
+    PERFORM create_intraday_partition(bar_month);
+  END LOOP;
+
+  FOR i IN 0..months_ahead LOOP
+    PERFORM create_intraday_partition((date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE);
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+SELECT ensure_intraday_partitions();
+
+-- Monthly maintenance where pg_cron is available; the AI server also creates the
+-- partition for any month it writes bars into (IntradayStore.save_bars)
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+    PERFORM cron.schedule('ensure-intraday-partitions', '0 3 * * *', 'SELECT ensure_intraday_partitions()');
+  END IF;
+END;
+$$;
@@ -0,0 +1,90 @@
+-- search_news fixes:
+-- * news.sentiment is never written (scores live on articles), so sentiment filters and
+--   the returned sentiment/confidence now come from the matching article, joined on the
+--   URL hash the article store keys on.
+-- * The API asks for page size + 1 rows to detect a next page, so the clamp allows
+--   201 rows (MAX_PAGE_SIZE in app/utils/pagination.py plus the look-ahead row).
+DROP INDEX IF EXISTS idx_news_sentiment_published_at;
+
+CREATE OR REPLACE FUNCTION search_news(
+  search_query TEXT DEFAULT NULL,
+  search_ticker TEXT DEFAULT NULL,
+  published_from TIMESTAMPTZ DEFAULT NULL,
+  published_to TIMESTAMPTZ DEFAULT NULL,
+  min_sentiment NUMERIC DEFAULT NULL,
+  max_sentiment NUMERIC DEFAULT NULL,
+  page_size INTEGER DEFAULT 20,
+  after_rank REAL DEFAULT NULL,
+  after_published_at TIMESTAMPTZ DEFAULT NULL,
+  after_id INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+  id INTEGER,
+  stock_id INTEGER,
+  ticker VARCHAR,
+  headline TEXT,
+  url TEXT,
+  source VARCHAR,
+  sentiment NUMERIC,
+  confidence NUMERIC,
+  published_at TIMESTAMPTZ,
+  rank REAL
+) AS $$
+DECLARE
+  has_query BOOLEAN := search_query IS NOT NULL AND btrim(search_query) <> '';
+  target_stock INTEGER;
+  filters TEXT := '';
+  statement TEXT;
+BEGIN
+  IF search_ticker IS NOT NULL THEN
+    SELECT s.id INTO target_stock FROM stocks s WHERE s.ticker = search_ticker;
+    IF target_stock IS NULL THEN
+      RETURN;
+    END IF;
+    filters := filters || ' AND n.stock_id = $2';
+  END IF;
+
+  IF published_from IS NOT NULL THEN
+    filters := filters || ' AND n.published_at >= $3';
+  END IF;
+  IF published_to IS NOT NULL THEN
+    filters := filters || ' AND n.published_at < $4';
+  END IF;
+  -- Unscored articles have no sentiment and drop out of sentiment-filtered searches
+  IF min_sentiment IS NOT NULL THEN
+    filters := filters || ' AND a.sentiment >= $5';
+  END IF;
+  IF max_sentiment IS NOT NULL THEN
+    filters := filters || ' AND a.sentiment <= $6';
+  END IF;
+
+  IF has_query THEN
+    statement :=
+      'SELECT * FROM ('
+      || ' SELECT n.id, n.stock_id, s.ticker::VARCHAR, n.headline, n.url, n.source::VARCHAR,'
+      || '   a.sentiment::NUMERIC, a.confidence::NUMERIC, n.published_at,'
+      || '   (ts_rank_cd(n.search_vector, websearch_to_tsquery(''english'', $1)) + similarity(n.headline, $1))::REAL AS rank'
+      || ' FROM news n JOIN stocks s ON s.id = n.stock_id'
+      || ' LEFT JOIN articles a ON a.url_hash = encode(digest(n.url, ''sha256''), ''hex'')'
+      || ' WHERE (n.search_vector @@ websearch_to_tsquery(''english'', $1) OR n.headline % $1)'
+      || filters
+      || ') m'
+      || CASE WHEN after_id IS NOT NULL THEN ' WHERE (m.rank, m.published_at, m.id) < ($7, $8, $9)' ELSE '' END
+      || ' ORDER BY m.rank DESC, m.published_at DESC, m.id DESC LIMIT $10';
+  ELSE
+    statement :=
+      'SELECT n.id, n.stock_id, s.ticker::VARCHAR, n.headline, n.url, n.source::VARCHAR,'
+      || ' a.sentiment::NUMERIC, a.confidence::NUMERIC, n.published_at, 0::REAL AS rank'
+      || ' FROM news n JOIN stocks s ON s.id = n.stock_id'
+      || ' LEFT JOIN articles a ON a.url_hash = encode(digest(n.url, ''sha256''), ''hex'')'
+      || ' WHERE true'
+      || filters
+      || CASE WHEN after_id IS NOT NULL THEN ' AND (n.published_at, n.id) < ($8, $9)' ELSE '' END
+      || ' ORDER BY n.published_at DESC, n.id DESC LIMIT $10';
+  END IF;
+
+  RETURN QUERY EXECUTE statement
+    USING search_query, target_stock, published_from, published_to, min_sentiment, max_sentiment,
+          after_rank, after_published_at, after_id, LEAST(GREATEST(page_size, 1), 201);
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,41 @@
+-- ticker_activity.last_news_at read the per-stock news table, which misses articles
+-- linked to a ticker only through the article store (POST /api/news/articles and
+-- multi-ticker articles). Take it from article_tickers joined to articles instead.
+-- An article counts as new activity when it is published, linked to the ticker or
+-- scored, so an older story linked or scored late still triggers a re-analysis.
+CREATE OR REPLACE VIEW ticker_activity AS
+WITH recent AS (
+  SELECT
+    stock_id,
+    date,
+    close / NULLIF(LAG(close) OVER (PARTITION BY stock_id ORDER BY date), 0) - 1 AS daily_return,
+    ROW_NUMBER() OVER (PARTITION BY stock_id ORDER BY date DESC) AS age
+  FROM stock_prices
+  WHERE date >= CURRENT_DATE - 45
+),
+moves AS (
+  SELECT
+    stock_id,
+    MAX(ABS(daily_return)) FILTER (WHERE age = 1) / NULLIF(STDDEV_SAMP(daily_return) FILTER (WHERE age > 1), 0) AS move_z
+  FROM recent
+  GROUP BY stock_id
+),
+latest_prices AS (
+  SELECT stock_id, MAX(date) AS last_price_date FROM stock_prices GROUP BY stock_id
+),
+latest_news AS (
+  SELECT at.stock_id, MAX(GREATEST(a.published_at, at.created_at, a.scored_at)) AS last_news_at
+  FROM article_tickers at
+  JOIN articles a ON a.id = at.article_id
+  GROUP BY at.stock_id
+)
+SELECT
+  s.id AS stock_id,
+  s.ticker,
+  lp.last_price_date,
+  ln.last_news_at,
+  m.move_z
+FROM stocks s
+LEFT JOIN latest_prices lp ON lp.stock_id = s.id
+LEFT JOIN latest_news ln ON ln.stock_id = s.id
+LEFT JOIN moves m ON m.stock_id = s.id;
@@ -0,0 +1,46 @@
+-- Store a ticker's sentiment aggregate together with the base weights of the articles
+-- it just folded in. Both writes share the function's transaction: an article whose
+-- weight was not saved would otherwise look unaggregated and be added a second time.
+CREATE OR REPLACE FUNCTION save_sentiment_aggregate(aggregate JSONB, weights JSONB)
+RETURNS VOID AS $$
+DECLARE
+  target_stock INTEGER := (aggregate->>'stock_id')::INTEGER;
+BEGIN
+  UPDATE article_tickers t
+  SET aggregate_weight = w.aggregate_weight
+  FROM jsonb_to_recordset(coalesce(weights, '[]'::JSONB)) AS w(article_id INTEGER, aggregate_weight DOUBLE PRECISION)
+  WHERE t.article_id = w.article_id AND t.stock_id = target_stock;
+
+  INSERT INTO sentiment_aggregates (
+    stock_id,
+    weighted_sentiment_sum,
+    weighted_confidence_sum,
+    weight_sum,
+    article_count,
+    half_life_hours,
+    window_days,
+    last_published_at,
+    as_of
+  )
+  SELECT
+    a.stock_id,
+    a.weighted_sentiment_sum,
+    a.weighted_confidence_sum,
+    a.weight_sum,
+    a.article_count,
+    a.half_life_hours,
+    a.window_days,
+    a.last_published_at,
+    a.as_of
+  FROM jsonb_populate_record(NULL::sentiment_aggregates, aggregate) AS a
+  ON CONFLICT (stock_id) DO UPDATE SET
+    weighted_sentiment_sum = EXCLUDED.weighted_sentiment_sum,
+    weighted_confidence_sum = EXCLUDED.weighted_confidence_sum,
+    weight_sum = EXCLUDED.weight_sum,
+    article_count = EXCLUDED.article_count,
+    half_life_hours = EXCLUDED.half_life_hours,
+    window_days = EXCLUDED.window_days,
+    last_published_at = EXCLUDED.last_published_at,
+    as_of = EXCLUDED.as_of;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
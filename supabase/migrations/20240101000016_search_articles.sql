@@ -0,0 +1,122 @@
+-- search_news over the article store. Articles ingested through POST /api/news/articles
+-- exist only in articles/article_tickers, and every news row is mirrored there by the
+-- sync_news_to_articles trigger, so articles is the one table that holds all news.
+-- Hits are articles (id is articles.id); stock_id/ticker is the requested ticker, or the
+-- most relevant linked one, and tickers lists every linked ticker.
+ALTER TABLE articles ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+  setweight(to_tsvector('english', coalesce(headline, '')), 'A') ||
+  setweight(to_tsvector('english', coalesce(content, '')), 'B')
+) STORED;
+
+CREATE INDEX idx_articles_search_vector ON articles USING GIN(search_vector);
+CREATE INDEX idx_articles_headline_trgm ON articles USING GIN(headline gin_trgm_ops);
+CREATE INDEX idx_articles_published_at_id ON articles(published_at DESC, id DESC);
+CREATE INDEX idx_articles_sentiment_published_at ON articles(sentiment, published_at DESC);
+
+-- The news copies are no longer searched
+DROP INDEX IF EXISTS idx_news_search_vector;
+DROP INDEX IF EXISTS idx_news_headline_trgm;
+ALTER TABLE news DROP COLUMN IF EXISTS search_vector;
+
+-- The result now carries a tickers column, so the old signature has to go first
+DROP FUNCTION IF EXISTS search_news(TEXT, TEXT, TIMESTAMPTZ, TIMESTAMPTZ, NUMERIC, NUMERIC, INTEGER, REAL, TIMESTAMPTZ, INTEGER);
+
+CREATE FUNCTION search_news(
+  search_query TEXT DEFAULT NULL,
+  search_ticker TEXT DEFAULT NULL,
+  published_from TIMESTAMPTZ DEFAULT NULL,
+  published_to TIMESTAMPTZ DEFAULT NULL,
+  min_sentiment NUMERIC DEFAULT NULL,
+  max_sentiment NUMERIC DEFAULT NULL,
+  page_size INTEGER DEFAULT 20,
+  after_rank REAL DEFAULT NULL,
+  after_published_at TIMESTAMPTZ DEFAULT NULL,
+  after_id INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+  id INTEGER,
+  stock_id INTEGER,
+  ticker VARCHAR,
+  tickers TEXT[],
+  headline TEXT,
+  url TEXT,
+  source VARCHAR,
+  sentiment NUMERIC,
+  confidence NUMERIC,
+  published_at TIMESTAMPTZ,
+  rank REAL
+) AS $$
+DECLARE
+  has_query BOOLEAN := search_query IS NOT NULL AND btrim(search_query) <> '';
+  target_stock INTEGER;
+  filters TEXT := '';
+  matches TEXT;
+  statement TEXT;
+BEGIN
+  IF search_ticker IS NOT NULL THEN
+    SELECT s.id INTO target_stock FROM stocks s WHERE s.ticker = search_ticker;
+    IF target_stock IS NULL THEN
+      RETURN;
+    END IF;
+    filters := filters || ' AND EXISTS (SELECT 1 FROM article_tickers f WHERE f.article_id = a.id AND f.stock_id = $2)';
+  ELSE
+    -- Articles not linked to any stock are skipped, as news rows without a stock were before
+    filters := filters || ' AND EXISTS (SELECT 1 FROM article_tickers f WHERE f.article_id = a.id)';
+  END IF;
+
+  IF published_from IS NOT NULL THEN
+    filters := filters || ' AND a.published_at >= $3';
+  END IF;
+  IF published_to IS NOT NULL THEN
+    filters := filters || ' AND a.published_at < $4';
+  END IF;
+  -- Unscored articles have no sentiment and drop out of sentiment-filtered searches
+  IF min_sentiment IS NOT NULL THEN
+    filters := filters || ' AND a.sentiment >= $5';
+  END IF;
+  IF max_sentiment IS NOT NULL THEN
+    filters := filters || ' AND a.sentiment <= $6';
+  END IF;
+
+  IF has_query THEN
+    matches :=
+      'SELECT a.id, a.headline, a.url, a.source, a.sentiment, a.confidence, a.published_at,'
+      || ' (ts_rank_cd(a.search_vector, websearch_to_tsquery(''english'', $1)) + similarity(a.headline, $1))::REAL AS rank'
+      || ' FROM articles a'
+      || ' WHERE (a.search_vector @@ websearch_to_tsquery(''english'', $1) OR a.headline % $1)'
+      || filters;
+    statement :=
+      'SELECT * FROM (' || matches || ') m'
+      || CASE WHEN after_id IS NOT NULL THEN ' WHERE (m.rank, m.published_at, m.id) < ($7, $8, $9)' ELSE '' END
+      || ' ORDER BY m.rank DESC, m.published_at DESC, m.id DESC LIMIT $10';
+  ELSE
+    statement :=
+      'SELECT a.id, a.headline, a.url, a.source, a.sentiment, a.confidence, a.published_at, 0::REAL AS rank'
+      || ' FROM articles a'
+      || ' WHERE true'
+      || filters
+      || CASE WHEN after_id IS NOT NULL THEN ' AND (a.published_at, a.id) < ($8, $9)' ELSE '' END
+      || ' ORDER BY a.published_at DESC, a.id DESC LIMIT $10';
+  END IF;
+
+  -- Ticker columns are looked up only for the page's rows
+  statement :=
+    'SELECT p.id, t.stock_id, s.ticker::VARCHAR, l.tickers, p.headline, p.url, p.source::VARCHAR,'
+    || ' p.sentiment::NUMERIC, p.confidence::NUMERIC, p.published_at, p.rank'
+    || ' FROM (' || statement || ') p'
+    || ' JOIN LATERAL ('
+    || '   SELECT at.stock_id FROM article_tickers at WHERE at.article_id = p.id'
+    || '   ORDER BY at.stock_id = $2 DESC NULLS LAST, at.relevance DESC, at.stock_id LIMIT 1'
+    || ' ) t ON true'
+    || ' JOIN stocks s ON s.id = t.stock_id'
+    || ' CROSS JOIN LATERAL ('
+    || '   SELECT array_agg(ls.ticker::TEXT ORDER BY ls.ticker) AS tickers'
+    || '   FROM article_tickers la JOIN stocks ls ON ls.id = la.stock_id WHERE la.article_id = p.id'
+    || ' ) l'
+    || ' ORDER BY p.rank DESC, p.published_at DESC, p.id DESC';
+
+  RETURN QUERY EXECUTE statement
+    USING search_query, target_stock, published_from, published_to, min_sentiment, max_sentiment,
+          after_rank, after_published_at, after_id, LEAST(GREATEST(page_size, 1), 201);
+END;
+$$ LANGUAGE plpgsql STABLE;
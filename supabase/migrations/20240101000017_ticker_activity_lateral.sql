@@ -0,0 +1,50 @@
+-- ticker_activity, take three.
+-- * last_news_at no longer includes articles.scored_at: the daily run scores articles
+--   itself after the planner has read this view, so every ticker with newly scored
+--   articles looked changed on the next run without any new information.
+-- * Every column is a per-stock index lookup instead of a scan of all of stock_prices
+--   and article_tickers, so reading the view (page by page, from RunPlanner.plan) costs
+--   the same however much history the tables hold.
+-- The newest link decides last_news_at: an article is new activity for a ticker when it
+-- is linked to it, or when it was published later than it was linked.
+CREATE INDEX IF NOT EXISTS idx_article_tickers_stock_id_created_at ON article_tickers(stock_id, created_at DESC);
+
+CREATE OR REPLACE VIEW ticker_activity AS
+SELECT
+  s.id AS stock_id,
+  s.ticker,
+  lp.last_price_date,
+  ln.last_news_at,
+  m.move_z
+FROM stocks s
+LEFT JOIN LATERAL (
+  SELECT p.date AS last_price_date
+  FROM stock_prices p
+  WHERE p.stock_id = s.id
+  ORDER BY p.date DESC
+  LIMIT 1
+) lp ON true
+LEFT JOIN LATERAL (
+  SELECT GREATEST(at.created_at, a.published_at) AS last_news_at
+  FROM article_tickers at
+  JOIN articles a ON a.id = at.article_id
+  WHERE at.stock_id = s.id
+  ORDER BY at.created_at DESC
+  LIMIT 1
+) ln ON true
+-- |latest daily return| / stddev of the ~20 returns before it, over the newest 22 bars
+LEFT JOIN LATERAL (
+  SELECT MAX(ABS(r.daily_return)) FILTER (WHERE r.age = 1) / NULLIF(STDDEV_SAMP(r.daily_return) FILTER (WHERE r.age > 1), 0) AS move_z
+  FROM (
+    SELECT
+      b.close / NULLIF(LEAD(b.close) OVER (ORDER BY b.date DESC), 0) - 1 AS daily_return,
+      ROW_NUMBER() OVER (ORDER BY b.date DESC) AS age
+    FROM (
+      SELECT p.date, p.close
+      FROM stock_prices p
+      WHERE p.stock_id = s.id AND p.date >= CURRENT_DATE - 45
+      ORDER BY p.date DESC
+      LIMIT 22
+    ) b
+  ) r
+) m ON true;